@@ -1,36 +1,84 @@
-from flask import Flask, render_template, jsonify, send_from_directory, request, redirect, url_for, session
-import requests
+from flask import Flask, Response, render_template, jsonify, send_from_directory, request, redirect, url_for, session, g, stream_with_context
 import json
 from datetime import datetime
 import numpy as np
 import time
-from models.location_optimizer import LocationOptimizer
+from models.location_optimizer import LocationScenario
 from models.wait_time_predictor import WaitTimePredictor
 from dataclasses import dataclass
 from typing import Dict, Any
 from models.station_calculating_model import ChargingStationCalculator
+from models.restricted_areas import load_restricted_areas
+from models.overpass_client import OverpassClient
+from models.metrics import metrics
+from models.request_profiler import RequestProfiler
+from models.station_clusters import StationClusterIndex
+from models.road_network import load_road_graph
+from models.elevation import load_elevation_model
+from models.model_registry import ModelRegistry
+from models.fleet_planner import FleetPlanner
+from models.optimization_jobs import OptimizationJobs
+from models.scenario_store import ScenarioStore
+from models.lru_cache import LRUCache
+from models.station_snapshot import SnapshotStore
+from models import geohash
+from models.station_shards import ShardedStationStore, load_station_shards
+from models.suitability_tiles import SCORE_LAYERS, SuitabilityTileStore, tile_bounds
 import os
 import pandas as pd
 import math
+import uuid
+import base64
+import threading
+import hashlib
+import shapely
 
 app = Flask(__name__, static_url_path='/static')
 
+# Optional road network (pre-converted with scripts/build_road_graph.py); without it
+# all distances stay straight-line haversine
+road_graph = load_road_graph(os.environ.get(
+    'QUICKFILL_ROAD_GRAPH', os.path.join(os.path.dirname(__file__), 'road_graph.npz')
+))
+
+# Optional SRTM elevation tiles (*.hgt) for terrain-aware fuel consumption
+elevation_model = load_elevation_model(os.environ.get(
+    'QUICKFILL_DEM_DIR', os.path.join(os.path.dirname(__file__), 'dem')
+))
+
 # Initialize models
-station_calculator = ChargingStationCalculator()
+station_calculator = ChargingStationCalculator(road_graph=road_graph, elevation=elevation_model)
 wait_time_predictor = WaitTimePredictor()
+MODEL_REGISTRY_DIR = os.environ.get(
+    'QUICKFILL_MODEL_REGISTRY', os.path.join(os.path.dirname(__file__), 'model_registry')
+)
+try:
+    # Prefer the tuned model registered by scripts/train_wait_model.py
+    registry = ModelRegistry(MODEL_REGISTRY_DIR)
+    if registry.latest_version('wait_time'):
+        started = time.perf_counter()
+        meta = wait_time_predictor.load_from_registry(registry, 'wait_time')
+        metrics.set_gauge('quickfill_model_load_seconds', time.perf_counter() - started, model='wait_time_predictor')
+        print(f"Wait time model {meta['version']} ({meta.get('family')}) loaded from registry")
+except Exception as e:
+    print(f"Wait time model registry load failed: {e}")
 try:
     wt_path_candidates = [
         os.path.join(os.path.dirname(__file__), 'CNG_pumps_with_Erlang-C_waiting_times.csv'),
         os.path.join(os.path.dirname(__file__), 'waiting_times.csv')
     ]
     for p in wt_path_candidates:
+        if wait_time_predictor.is_trained:
+            break
         if os.path.exists(p):
+            started = time.perf_counter()
             wait_time_predictor.train_from_csv(p)
+            metrics.set_gauge('quickfill_model_load_seconds', time.perf_counter() - started, model='wait_time_predictor')
             print(f"Wait time model trained from {os.path.basename(p)}")
             break
 except Exception as e:
     print(f"Wait time model training failed: {e}")
-location_optimizer = LocationOptimizer()
+overpass_client = OverpassClient()
 
 # Define water bodies and restricted areas in NCR
 RESTRICTED_AREAS = [
@@ -80,6 +128,16 @@ RESTRICTED_AREAS = [
     }
 ]
 
+# Compile restricted areas once into a buffered STRtree; more areas can be
+# supplied as a GeoJSON FeatureCollection without touching this file
+RESTRICTED_AREAS_GEOJSON = os.environ.get(
+    'RESTRICTED_AREAS_GEOJSON',
+    os.path.join(os.path.dirname(__file__), 'restricted_areas.geojson')
+)
+_started = time.perf_counter()
+restricted_area_index = load_restricted_areas(RESTRICTED_AREAS, RESTRICTED_AREAS_GEOJSON)
+metrics.set_gauge('quickfill_model_load_seconds', time.perf_counter() - _started, model='restricted_areas')
+
 # Define CNG models data structure
 cng_models = {
     'tesla_model_3': {
@@ -105,67 +163,13 @@ cng_models = {
     }
 }
 
-def point_in_polygon(point, polygon):
-    """Ray casting algorithm to determine if point is in polygon"""
-    x, y = point['lng'], point['lat']
-    inside = False
-    j = len(polygon) - 1
-    
-    for i in range(len(polygon)):
-        if ((polygon[i]['lng'] > x) != (polygon[j]['lng'] > x) and
-            y < (polygon[j]['lat'] - polygon[i]['lat']) * 
-            (x - polygon[i]['lng']) / 
-            (polygon[j]['lng'] - polygon[i]['lng']) + 
-            polygon[i]['lat']):
-            inside = not inside
-        j = i
-    
-    return inside
-
 def is_valid_location(lat, lng):
-    """Enhanced location validation with buffer zone"""
-    point = {'lat': lat, 'lng': lng}
-    
-    # Add a buffer zone around restricted areas (approximately 100 meters)
-    BUFFER = 0.001  # roughly 100 meters in degrees
-    
-    for area in RESTRICTED_AREAS:
-        # Check if point is in restricted area or buffer zone
-        for i in range(len(area['polygon'])):
-            p1 = area['polygon'][i]
-            p2 = area['polygon'][(i + 1) % len(area['polygon'])]
-            
-            # Calculate distance to line segment
-            if distance_to_line_segment(point, p1, p2) < BUFFER:
-                return False
-    
-    return True
+    """Check a single point against the restricted areas (including buffer zone)"""
+    return restricted_area_index.is_valid(lat, lng)
 
-def distance_to_line_segment(p, p1, p2):
-    """Calculate distance from point to line segment"""
-    x, y = p['lng'], p['lat']
-    x1, y1 = p1['lng'], p1['lat']
-    x2, y2 = p2['lng'], p2['lat']
-    
-    A = x - x1
-    B = y - y1
-    C = x2 - x1
-    D = y2 - y1
-    
-    dot = A * C + B * D
-    len_sq = C * C + D * D
-    
-    if len_sq == 0:
-        return np.sqrt(A * A + B * B)
-        
-    param = dot / len_sq
-    
-    if param < 0:
-        return np.sqrt(A * A + B * B)
-    elif param > 1:
-        return np.sqrt((x - x2) * (x - x2) + (y - y2) * (y - y2))
-    
-    return abs(A * D - C * B) / np.sqrt(len_sq)
+def validate_points(lats, lngs):
+    """Vectorized location validation; returns a boolean numpy array"""
+    return restricted_area_index.validate_points(lats, lngs)
 
 def get_time_info():
     """Get current time information"""
@@ -189,35 +193,24 @@ def get_time_info():
 
 def fetch_gas_stations(lat, lng, radius=3000):
     """Fetch gas stations and convert them to nodes for optimization"""
-    overpass_url = "http://overpass-api.de/api/interpreter"
-    
-    overpass_query = f"""
-    [out:json][timeout:25];
-    (
-        node["amenity"="fuel"](around:{radius},{lat},{lng});
-        way["amenity"="fuel"](around:{radius},{lat},{lng});
-    );
-    out body;
-    >;
-    out skel qt;
-    """
-    
     try:
-        response = requests.post(overpass_url, data=overpass_query)
-        data = response.json()
-        
+        elements = overpass_client.fetch_fuel_elements(lat, lng, radius)
+
         nodes = []
-        for element in data.get('elements', []):
+        for element in elements:
             if element.get('type') == 'node':
-                node = {
+                nodes.append({
                     'lat': element.get('lat'),
                     'lng': element.get('lon'),
                     'type': determine_area_type(element),
                     'name': element.get('tags', {}).get('name', 'Unnamed Station')
-                }
-                if is_valid_location(node['lat'], node['lng']):
-                    nodes.append(node)
-        return nodes
+                })
+        if not nodes:
+            return []
+
+        # Validate all nodes against restricted areas in one batch
+        valid = validate_points([n['lat'] for n in nodes], [n['lng'] for n in nodes])
+        return [node for node, ok in zip(nodes, valid) if ok]
     except Exception as e:
         print(f"Error fetching gas stations: {e}")
         return []
@@ -274,6 +267,56 @@ def analyze_location_suitability(gas_station, existing_stations):
 
 app.secret_key = 'your-secret-key-here'  # Replace with a secure secret key in production
 
+@app.before_request
+def _start_request_timer():
+    if metrics.enabled:
+        g.request_started = time.perf_counter()
+
+@app.after_request
+def _record_request_time(response):
+    started = g.pop('request_started', None)
+    if started is not None:
+        metrics.observe('quickfill_request_seconds', time.perf_counter() - started,
+                        endpoint=request.endpoint or 'unknown')
+    return response
+
+# Opt-in profiling of a single request, for admin sessions only:
+#   X-QuickFill-Profile: cprofile|sample   (or ?_profile=cprofile|sample)
+# Nobody is an admin unless QUICKFILL_ADMIN_USERS names them
+ADMIN_USERS = set(filter(None, os.environ.get('QUICKFILL_ADMIN_USERS', '').split(',')))
+request_profiler = RequestProfiler(os.environ.get(
+    'QUICKFILL_PROFILE_DIR', os.path.join(os.path.dirname(__file__), 'profiles')
+))
+
+@app.before_request
+def _start_request_profile():
+    mode = request.headers.get('X-QuickFill-Profile') or request.args.get('_profile')
+    if not mode or not session.get('is_admin'):
+        return
+    handle = request_profiler.start(mode.strip().lower())
+    if handle is not None:
+        g.profile_handle = handle
+        # The id names the profile file, so a client-supplied one is sanitized
+        g.profile_id = RequestProfiler.safe_name(request.headers.get('X-Request-ID', ''), 64) or uuid.uuid4().hex
+
+@app.after_request
+def _tag_request_profile(response):
+    if g.get('profile_handle') is None:
+        return response
+    response.headers['X-Profile-Id'] = g.profile_id
+    if response.is_streamed:
+        # NDJSON/SSE bodies are generated after the view returns: profile until the stream closes
+        handle, request_id, label = g.pop('profile_handle'), g.profile_id, request.endpoint or 'unknown'
+        response.call_on_close(lambda: request_profiler.finish(handle, request_id, label))
+    return response
+
+@app.teardown_request
+def _finish_request_profile(exc):
+    # Runs even when the view raised, so cProfile or the sampler thread is never left running
+    handle = g.pop('profile_handle', None)
+    if handle is not None:
+        request_profiler.finish(handle, g.profile_id, request.endpoint or 'unknown')
+
 @app.route('/login', methods=['GET', 'POST'])
 def login():
     if request.method == 'POST':
@@ -283,6 +326,7 @@ def login():
         if username == "Codex" and password == "codex":
             session['logged_in'] = True
             session['username'] = username
+            session['is_admin'] = username in ADMIN_USERS
             return redirect(url_for('dashboard'))
         else:
             return render_template('login.html', error="Invalid credentials")
@@ -304,37 +348,15 @@ def dashboard():
 def send_static(path):
     return send_from_directory('static', path)
 
-@app.route('/api/stations/<lat>/<lng>')
-def get_nearby_stations(lat, lng):
-    """Return stations from CSV/XLSX near the provided lat/lng, optional radius in km."""
-    lat, lng = float(lat), float(lng)
-    try:
-        radius_km = float(request.args.get('radius', 5))
-    except Exception:
-        radius_km = 5.0
-
-    data = _read_stations_file()
-    stations_file = data.get('stations', [])
-    if not stations_file:
-        return jsonify({'error': data.get('error', 'No stations data'), 'stations': []}), 400
-
-    def haversine_km(lat1, lon1, lat2, lon2):
-        R = 6371.0
-        dlat = np.radians(lat2 - lat1)
-        dlon = np.radians(lon2 - lon1)
-        a = np.sin(dlat/2)**2 + np.cos(np.radians(lat1)) * np.cos(np.radians(lat2)) * np.sin(dlon/2)**2
-        c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1-a))
-        return float(R * c)
+# Prediction interval reported with every nearby-station wait
+WAIT_QUANTILES = (0.1, 0.9)
 
+def _nearby_station_entries(lat, lng, radius_km):
+    """Stations within radius_km of a point with their predicted waits, unsorted"""
     result = []
-    for s in stations_file:
-        pos = s.get('position') or {}
-        slat = pos.get('lat')
-        slng = pos.get('lng')
-        if slat is None or slng is None:
-            continue
-        d = haversine_km(lat, lng, slat, slng)
-        if d <= radius_km:
+    with metrics.span('distance_filter'):
+        for s, d in _stations_within(lat, lng, radius_km):
+            slat, slng = s['position']['lat'], s['position']['lng']
             result.append({
                 'id': f"{slat:.6f},{slng:.6f}",
                 'name': s.get('name', 'CNG Station'),
@@ -347,19 +369,21 @@ def get_nearby_stations(lat, lng):
     # Predict wait times
     timeinfo = get_time_info()
     feature_recs = []
-    for st in result:
-        feature_recs.append({
-            'id': st['id'],
-            'active_chargers': st.get('active_chargers', 1),
-            'total_chargers': st.get('total_chargers', 2),
-            'current_queue_length': max(0, int(round(np.random.poisson(1)))),
-            'hour_of_day': timeinfo['hour'],
-            'day_of_week': timeinfo['day_of_week'],
-            'is_weekend': 1 if timeinfo['is_weekend'] else 0,
-            'traffic_density': 0.5,
-            'historical_avg_wait_time': 10.0
-        })
-    preds = wait_time_predictor.predict_wait_time(feature_recs)
+    with metrics.span('feature_build'):
+        for st in result:
+            feature_recs.append({
+                'id': st['id'],
+                'active_chargers': st.get('active_chargers', 1),
+                'total_chargers': st.get('total_chargers', 2),
+                'current_queue_length': max(0, int(round(np.random.poisson(1)))),
+                'hour_of_day': timeinfo['hour'],
+                'day_of_week': timeinfo['day_of_week'],
+                'is_weekend': 1 if timeinfo['is_weekend'] else 0,
+                'traffic_density': 0.5,
+                'historical_avg_wait_time': 10.0
+            })
+    with metrics.span('wait_prediction'):
+        preds = wait_time_predictor.predict_wait_time(feature_recs, quantiles=WAIT_QUANTILES)
     pred_map = {p['station_id']: p for p in preds}
 
     for st in result:
@@ -367,15 +391,113 @@ def get_nearby_stations(lat, lng):
         if pm:
             st['predicted_wait'] = round(float(pm['predicted_wait']), 2)
             st['prediction_confidence'] = round(float(pm['confidence']), 2)
+            if 'quantiles' in pm:
+                st['predicted_wait_interval'] = {k: round(v, 2) for k, v in pm['quantiles'].items()}
+    return result
 
-    # Sort by predicted wait then distance
-    result.sort(key=lambda x: (x.get('predicted_wait', 9999), x['distance_km']))
-    return jsonify({'stations': result})
+def _nearby_response(lat, lng, radius_km, result):
+    """Add road distances from the query point, sort and serialize nearby stations"""
+    # Network distance for the shortlisted stations in one one-to-many query
+    if road_graph is not None and result:
+        with metrics.span('road_distance'):
+            road_km = road_graph.distances_km(
+                lat, lng,
+                [st['position']['lat'] for st in result],
+                [st['position']['lng'] for st in result],
+                max_km=radius_km * 3  # bound the search; longer detours aren't "nearby"
+            )
+        for st, rk in zip(result, road_km):
+            if np.isfinite(rk):
+                st['road_distance_km'] = round(float(rk), 3)
+
+    # Sort by predicted wait (or its upper bound with ?sort=upper) then (road, if known) distance
+    if request.args.get('sort') == 'upper':
+        wait_key = lambda x: x.get('predicted_wait_interval', {}).get('p90', x.get('predicted_wait', 9999))
+    else:
+        wait_key = lambda x: x.get('predicted_wait', 9999)
+    result.sort(key=lambda x: (wait_key(x), x.get('road_distance_km', x['distance_km'])))
+    with metrics.span('jsonify'):
+        return jsonify({'stations': result})
+
+def _request_radius_km():
+    try:
+        return float(request.args.get('radius', 5))
+    except Exception:
+        return 5.0
+
+@app.route('/api/stations/<lat>/<lng>')
+def get_nearby_stations(lat, lng):
+    """Return stations from CSV/XLSX near the provided lat/lng, optional radius in km."""
+    lat, lng = float(lat), float(lng)
+    radius_km = _request_radius_km()
+
+    if station_shards is None:
+        with metrics.span('stations_file_read'):
+            data = _read_stations_file()
+        if not data.get('stations'):
+            return jsonify({'error': data.get('error', 'No stations data'), 'stations': []}), 400
+    return _nearby_response(lat, lng, radius_km, _nearby_station_entries(lat, lng, radius_km))
+
+# Nearby-station results per geohash cell, radius and hour. Queries from anywhere in a
+# cell share one computation around the cell centre and are re-filtered exactly
+nearby_cache = LRUCache(
+    'nearby_stations',
+    max_bytes=int(os.environ.get('QUICKFILL_NEARBY_CACHE_BYTES', 8 * 1024 * 1024)),
+    ttl=float(os.environ.get('QUICKFILL_NEARBY_CACHE_TTL', '3600'))
+)
+NEARBY_CELL_FRACTION = 0.25   # cell half-diagonal at most this share of the radius
+NEARBY_MAX_PRECISION = 9
+
+def _nearby_cell(lat, lng, radius_km):
+    """Coarsest geohash cell around a point whose half-diagonal (km) stays within
+    NEARBY_CELL_FRACTION of the radius, so a cell computation over-fetches little"""
+    for precision in range(1, NEARBY_MAX_PRECISION + 1):
+        height, width = geohash.cell_size(precision)
+        # 111.2 km per degree bounds both axes (longitude degrees only shrink off the equator)
+        half_diagonal_km = 0.5 * 111.2 * math.hypot(height, width)
+        if half_diagonal_km <= radius_km * NEARBY_CELL_FRACTION:
+            break
+    return geohash.encode(lat, lng, precision), half_diagonal_km
 
 @app.route('/api/stations-with-wait/<lat>/<lng>')
 def get_nearby_stations_with_wait(lat, lng):
-    # Proxy to existing endpoint logic
-    return get_nearby_stations(lat, lng)
+    """Nearby stations with waits, served from the geo-cell cache when possible"""
+    lat, lng = float(lat), float(lng)
+    radius_km = _request_radius_km()
+    if radius_km <= 0:
+        return get_nearby_stations(lat, lng)
+
+    cell, half_diagonal_km = _nearby_cell(lat, lng, radius_km)
+    timeinfo = get_time_info()
+    cache_key = (cell, radius_km, timeinfo['day_of_week'], timeinfo['hour'])
+    version = _stations_version()
+    cached = nearby_cache.get(cache_key, version=version)
+    hit = cached is not None
+    if not hit:
+        if station_shards is None and not _read_stations_file().get('stations'):
+            return get_nearby_stations(lat, lng)
+        bounds = geohash.cell_bounds(cell)
+        center_lat = (bounds['min_lat'] + bounds['max_lat']) / 2
+        center_lng = (bounds['min_lng'] + bounds['max_lng']) / 2
+        # Every station within radius_km of any point in the cell is within this of its centre
+        entries = _nearby_station_entries(center_lat, center_lng, radius_km + half_diagonal_km)
+        cached = (entries,
+                  np.array([st['position']['lat'] for st in entries], dtype=float),
+                  np.array([st['position']['lng'] for st in entries], dtype=float))
+        nearby_cache.put(cache_key, cached, size=len(json.dumps(entries)) + 200, version=version)
+
+    entries, slats, slngs = cached
+    with metrics.span('distance_filter'):
+        dlat = np.radians(slats - lat)
+        dlng = np.radians(slngs - lng)
+        a = np.sin(dlat / 2) ** 2 + np.cos(np.radians(lat)) * np.cos(np.radians(slats)) * np.sin(dlng / 2) ** 2
+        dist = 2 * 6371.0 * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+        # Copies: the cached entries are shared and the response adds per-request fields
+        result = [dict(entries[i], distance_km=round(float(dist[i]), 3))
+                  for i in np.flatnonzero(dist <= radius_km).tolist()]
+    response = _nearby_response(lat, lng, radius_km, result)
+    response.headers['X-Nearby-Cache'] = 'HIT' if hit else 'MISS'
+    return response
 
 def get_random_connectors():
     connector_types = ["Type 2", "CCS", "CHAdeMO"]
@@ -386,21 +508,172 @@ def get_random_power():
     power_options = ["50kW", "100kW", "150kW", "350kW"]
     return np.random.choice(power_options)
 
+# Location optimizations run as background jobs so a large region never ties up a
+# web worker; identical requests share one job and its cached result
+def _job_station_files(params):
+    """Station CSVs for a job: the shards around its area (plus the economic radius,
+    as for what-if scenarios), otherwise the current snapshot's file"""
+    bbox = ShardedStationStore.radius_bbox(params['lat'], params['lng'],
+                                           params['radius'] + LocationScenario.ECONOMIC_RADIUS_KM)
+    if station_shards is not None:
+        return station_shards.files_for_bbox(bbox)
+    path = current_snapshot().path
+    return [path] if path and path.endswith('.csv') else []
+
+optimization_jobs = OptimizationJobs(
+    os.environ.get('QUICKFILL_JOB_DIR', os.path.join(os.path.dirname(__file__), '.cache', 'jobs')),
+    station_files=_job_station_files,
+    max_workers=int(os.environ.get('QUICKFILL_JOB_WORKERS', '2')),
+    ttl=float(os.environ.get('QUICKFILL_JOB_TTL', '3600'))
+)
+# How long the legacy endpoint waits for a job before answering 202; kept short
+# because the wait holds a request thread (cached results still answer 200)
+OPTIMIZE_SYNC_WAIT = float(os.environ.get('QUICKFILL_OPTIMIZE_SYNC_WAIT', '1'))
+
+def _job_params(source, lat=None, lng=None):
+    timeinfo = get_time_info()
+    return {
+        'lat': lat if lat is not None else source['lat'],
+        'lng': lng if lng is not None else source['lng'],
+        'radius': source.get('radius', 10.0),
+        'num_stations': source.get('num_stations', 3),
+        'time_of_day': source.get('time_of_day', timeinfo['time_of_day']),
+        'is_weekend': str(source.get('is_weekend', timeinfo['is_weekend'])).lower() in ('1', 'true'),
+    }
+
+def _job_body(status):
+    body = dict(status)
+    body['status_url'] = url_for('optimize_job_status', job_id=status['job_id'])
+    body['events_url'] = url_for('optimize_job_events', job_id=status['job_id'])
+    return body
+
 @app.route('/api/optimize-locations/<lat>/<lng>')
 def get_optimal_locations(lat, lng):
-    # Dummy node data for demonstration
-    nodes = [
-        {'id': 1, 'type': 'Market', 'lat': float(lat) + 0.02, 'lng': float(lng) + 0.02},
-        {'id': 2, 'type': 'Office', 'lat': float(lat) - 0.02, 'lng': float(lng) - 0.02},
-        # Add more nodes...
-    ]
-    
-    # Dummy VSF matrix
-    vsf_matrix = np.random.rand(len(nodes), len(nodes))
-    
-    candidates = location_optimizer.get_candidate_locations(nodes, vsf_matrix)
-    
-    return jsonify({'candidates': candidates})
+    """Best new station locations around a point (radius, num_stations query args).
+
+    Waits up to QUICKFILL_OPTIMIZE_SYNC_WAIT seconds (default 1) for the job;
+    slower runs answer 202 with a job to poll instead of holding the request open.
+    """
+    try:
+        status = optimization_jobs.submit(_job_params(request.args, lat, lng))
+    except (KeyError, TypeError, ValueError) as e:
+        return jsonify({'error': f'Invalid parameters: {e}', 'candidates': []}), 400
+    status = optimization_jobs.wait(status['job_id'], OPTIMIZE_SYNC_WAIT) or status
+    if status['status'] == 'done':
+        return jsonify({'candidates': status['result'], 'job_id': status['job_id']})
+    if status['status'] == 'failed':
+        return jsonify({'error': status.get('error'), 'candidates': []}), 500
+    return jsonify(_job_body(status)), 202
+
+@app.route('/api/optimize-jobs', methods=['POST'])
+def submit_optimize_job():
+    """Submit {"lat", "lng", "radius", "num_stations", optional "time_of_day"/"is_weekend"}"""
+    try:
+        status = optimization_jobs.submit(_job_params(request.json or {}))
+    except (KeyError, TypeError, ValueError) as e:
+        return jsonify({'error': f'Invalid parameters: {e}'}), 400
+    return jsonify(_job_body(status)), 200 if status['status'] == 'done' else 202
+
+@app.route('/api/optimize-jobs/<job_id>')
+def optimize_job_status(job_id):
+    status = optimization_jobs.status(job_id)
+    if status is None:
+        return jsonify({'error': 'Unknown job'}), 404
+    return jsonify(_job_body(status))
+
+@app.route('/api/optimize-jobs/<job_id>/events')
+def optimize_job_events(job_id):
+    """Server-sent events with the job status until it finishes"""
+    if optimization_jobs.status(job_id) is None:
+        return jsonify({'error': 'Unknown job'}), 404
+
+    def generate():
+        last = None
+        while True:
+            status = optimization_jobs.status(job_id)
+            if status is None:
+                return
+            snapshot = (status['status'], status.get('progress'))
+            if snapshot != last:
+                last = snapshot
+                yield f"event: {status['status']}\ndata: {json.dumps(status, default=str)}\n\n"
+            if status['status'] in ('done', 'failed'):
+                return
+            time.sleep(0.5)
+
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+# What-if scenarios of the location optimizer UI, pickled to a directory every
+# web worker shares (like the job status files), oldest evicted first
+scenario_store = ScenarioStore(
+    os.environ.get('QUICKFILL_SCENARIO_DIR', os.path.join(os.path.dirname(__file__), '.cache', 'scenarios')),
+    max_scenarios=int(os.environ.get('QUICKFILL_MAX_SCENARIOS', '64'))
+)
+
+def _scenario_response(scenario_id, scenario, num_stations, **extra):
+    body = {'scenario_id': scenario_id, 'candidates': scenario.results(num_stations),
+            'stations': len(scenario.stations)}
+    body.update(extra)
+    return jsonify(body)
+
+@app.route('/api/optimize-scenarios', methods=['POST'])
+def create_optimize_scenario():
+    """Start a what-if scenario: {"lat", "lng", "radius", "num_stations"}"""
+    data = request.json or {}
+    try:
+        lat, lng = float(data['lat']), float(data['lng'])
+        radius = float(data.get('radius', 10.0))
+        num_stations = int(data.get('num_stations', 3))
+    except (KeyError, TypeError, ValueError) as e:
+        return jsonify({'error': f'Invalid scenario request: {e}'}), 400
+
+    # Stations up to the economic radius beyond the region affect its scores
+    optimizer = _station_optimizer(
+        ShardedStationStore.radius_bbox(lat, lng, radius + LocationScenario.ECONOMIC_RADIUS_KM))
+    if optimizer is None:
+        return jsonify({'error': 'Station data not available'}), 503
+    scenario = optimizer.start_scenario(lat, lng, radius_km=radius, time_info=get_time_info())
+    scenario_id = scenario_store.create(scenario)
+    nearby = scenario.stations_near(lat, lng, radius + LocationScenario.ECONOMIC_RADIUS_KM)
+    return _scenario_response(scenario_id, scenario, num_stations, existing_stations=nearby), 201
+
+@app.route('/api/optimize-scenarios/<scenario_id>/stations', methods=['POST'])
+def add_scenario_station(scenario_id):
+    """Add a hypothetical station: {"lat", "lng", optional "name"/arrival fields}"""
+    data = request.json or {}
+    try:
+        station = {k: float(v) for k, v in data.items()
+                   if k in ('lat', 'lng', 'morning_arrivals', 'evening_arrivals', 'overall_arrivals',
+                            'utilization', 'wait_time_morning', 'wait_time_evening', 'wait_time_overall')}
+        station['name'] = str(data.get('name', 'Hypothetical Station'))
+        if 'lat' not in station or 'lng' not in station:
+            raise KeyError('lat/lng')
+        num_stations = int(request.args.get('num_stations', 3))
+    except (KeyError, TypeError, ValueError) as e:
+        return jsonify({'error': f'Invalid station: {e}'}), 400
+
+    edited = scenario_store.update(scenario_id, lambda scenario: scenario.add_station(station))
+    if edited is None:
+        return jsonify({'error': 'Unknown scenario'}), 404
+    scenario, (station_id, updated) = edited
+    return _scenario_response(scenario_id, scenario, num_stations, station_id=station_id, updated=updated)
+
+@app.route('/api/optimize-scenarios/<scenario_id>/stations/<int:station_id>', methods=['DELETE'])
+def remove_scenario_station(scenario_id, station_id):
+    """Remove an existing or hypothetical station from the scenario"""
+    try:
+        num_stations = int(request.args.get('num_stations', 3))
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': f'Invalid num_stations: {e}'}), 400
+    try:
+        edited = scenario_store.update(scenario_id, lambda scenario: scenario.remove_station(station_id))
+    except KeyError as e:
+        return jsonify({'error': str(e)}), 404
+    if edited is None:
+        return jsonify({'error': 'Unknown scenario'}), 404
+    scenario, updated = edited
+    return _scenario_response(scenario_id, scenario, num_stations, station_id=station_id, updated=updated)
 
 @app.route('/nearby-stations')
 def nearby_stations():
@@ -440,36 +713,64 @@ def ev_switcher():
         return redirect(url_for('login'))
     return render_template('cng_switch_soon.html', username=session.get('username'))
 
+# Repeated plans (same commute, same vehicle) are served from an LRU cache keyed by
+# the simplified route, the vehicle specs and the fuel level rounded to this many %
+route_plan_cache = LRUCache(
+    'route_plan',
+    max_bytes=int(os.environ.get('QUICKFILL_ROUTE_CACHE_BYTES', 16 * 1024 * 1024)),
+    ttl=float(os.environ.get('QUICKFILL_ROUTE_CACHE_TTL', '21600'))
+)
+ROUTE_FUEL_QUANTUM = float(os.environ.get('QUICKFILL_ROUTE_FUEL_QUANTUM', '1.0'))
+ROUTE_KEY_TOLERANCE_DEG = 0.0002   # ~20 m: GPS jitter and re-routing noise map to one key
+
+def _route_plan_key(route, specs, current_charge):
+    """Canonical cache key of a route plan request"""
+    coords = np.asarray(route['coordinates'], dtype=float)
+    if len(coords) >= 2:
+        coords = np.asarray(shapely.simplify(shapely.LineString(coords), ROUTE_KEY_TOLERANCE_DEG).coords)
+    digest = hashlib.sha1(np.round(coords / ROUTE_KEY_TOLERANCE_DEG).astype(np.int64).tobytes())
+    digest.update(json.dumps([
+        round(float(route['distance']), 1),
+        route.get('duration'),
+        route.get('speeds'),
+        sorted(specs.items()),
+        round(current_charge / ROUTE_FUEL_QUANTUM)
+    ]).encode('utf-8'))
+    return digest.hexdigest()
+
+def _route_from_payload(payload):
+    """Route fields the calculator uses; duration (minutes) and per-segment speeds
+    (km/h) are optional and feed the speed-dependent consumption"""
+    route = {'distance': payload['distance'], 'coordinates': payload['coordinates']}
+    if payload.get('duration'):
+        route['duration'] = float(payload['duration'])
+    if payload.get('speeds'):
+        route['speeds'] = [float(v) for v in payload['speeds']]
+    return route
+
 @app.route('/api/route-plan', methods=['POST'])
 def plan_route():
     data = request.json
     
     # Extract route data
-    route = {
-        'distance': data['route']['distance'],
-        'coordinates': data['route']['coordinates']
-    }
+    route = _route_from_payload(data['route'])
     # Accept both old and new payload shapes
     ev_model = data.get('evModel', {}).get('name') or data.get('cngModel', {}).get('name') or 'CNG Vehicle'
     current_charge = float(data.get('currentCharge') or data.get('currentFuel'))
     
-    # Create CNG specs from the received data
-    cng_payload = data.get('cngModel') or {}
-    cng_specs = {
-        'tankCapacity': float(cng_payload.get('tankCapacity', 60)),
-        'range': float(cng_payload.get('range', 320)),
-        'fillingSpeed': float(cng_payload.get('fillingSpeed', 10)),
-        'consumption': float(cng_payload.get('consumption', 0.2))
-    }
-    
     try:
         # Map CNG specs to calculator's expected EV spec keys
-        ev_specs_mapped = {
-            'batteryCapacity': float(cng_specs['tankCapacity']),
-            'chargingSpeed': float(cng_specs['fillingSpeed']),
-            'consumption': float(cng_specs['consumption']),
-            'range': float(cng_specs['range'])
-        }
+        ev_specs_mapped = _cng_specs_mapped(data.get('cngModel'))
+
+        # Plans depend on the station snapshot, so its version scopes the cache
+        snapshot_version = _stations_version()
+        with metrics.span('route_cache_key'):
+            cache_key = _route_plan_key(route, ev_specs_mapped, current_charge)
+        stops_data = route_plan_cache.get(cache_key, version=snapshot_version)
+        if stops_data is not None:
+            response = jsonify({'fillingStops': stops_data})
+            response.headers['X-Route-Cache'] = 'HIT'
+            return response
 
         filling_stops = station_calculator.calculate_charging_stops(
             route_data=route,
@@ -492,15 +793,71 @@ def plan_route():
             }
             for stop in filling_stops
         ]
+        # Serialized size plus a rough allowance for the key and entry overhead
+        route_plan_cache.put(cache_key, stops_data, size=len(json.dumps(stops_data)) + 200,
+                             version=snapshot_version)
         
-        return jsonify({
+        response = jsonify({
             'fillingStops': stops_data
         })
+        response.headers['X-Route-Cache'] = 'MISS'
+        return response
         
     except Exception as e:
         print(f"Route planning error: {str(e)}")  # Add logging
         return jsonify({'error': str(e)}), 400
 
+def _station_optimizer(bbox):
+    """LocationOptimizer with the queueing parameters (servers, arrivals, service time)
+    of the stations around ``bbox``; shared by fleet planning and what-if scenarios"""
+    if station_shards is not None:
+        return station_shards.optimizer_for(bbox)
+    return current_snapshot().optimizer
+
+def _queue_stations(bbox):
+    optimizer = _station_optimizer(bbox)
+    return optimizer.existing_stations if optimizer else []
+
+def _cng_specs_mapped(cng_payload):
+    """Map a cngModel payload to the calculator's EV spec keys"""
+    cng_payload = cng_payload or {}
+    return {
+        'batteryCapacity': float(cng_payload.get('tankCapacity', 60)),
+        'chargingSpeed': float(cng_payload.get('fillingSpeed', 10)),
+        'consumption': float(cng_payload.get('consumption', 0.2)),
+        'range': float(cng_payload.get('range', 320))
+    }
+
+@app.route('/api/fleet-plan', methods=['POST'])
+def plan_fleet():
+    """Plan refuelling for a fleet jointly so vehicles spread over station capacity.
+
+    Body: {"vehicles": [{"id", "route": {"distance", "coordinates"}, "cngModel", "currentFuel"}],
+           "departureHour": 8}
+    """
+    data = request.json or {}
+    try:
+        vehicles = [{
+            'id': v.get('id', i),
+            'route': _route_from_payload(v['route']),
+            'ev_specs': _cng_specs_mapped(v.get('cngModel')),
+            'current_charge': float(v.get('currentFuel', v.get('currentCharge')))
+        } for i, v in enumerate(data.get('vehicles', []))]
+        departure_hour = int(data.get('departureHour', get_time_info()['hour']))
+    except (KeyError, TypeError, ValueError) as e:
+        return jsonify({'error': f'Invalid fleet payload: {e}'}), 400
+
+    coordinates = [c for v in vehicles for c in v['route']['coordinates']]
+    stations = _queue_stations(calculate_route_bbox(coordinates)) if coordinates else []
+    if not stations:
+        return jsonify({'error': 'Station capacity data not available'}), 503
+    try:
+        planner = FleetPlanner(station_calculator, stations)
+        return jsonify(planner.plan(vehicles, departure_hour=departure_hour))
+    except Exception as e:
+        print(f"Fleet planning error: {str(e)}")
+        return jsonify({'error': str(e)}), 400
+
 def calculate_route_bbox(coordinates):
     """Calculate the bounding box for a set of coordinates"""
     lats = [coord[0] for coord in coordinates]
@@ -518,8 +875,10 @@ def calculate_route_bbox(coordinates):
 
 def fetch_stations_in_bbox(bbox):
     """Fetch CNG stations within a bounding box using provided file data"""
-    data = _read_stations_file()
-    stations = data.get('stations', [])
+    if station_shards is not None:
+        stations = station_shards.stations_in_bbox(bbox)
+    else:
+        stations = _read_stations_file().get('stations', [])
     filtered_stations = []
     center_lat = (bbox['min_lat'] + bbox['max_lat']) / 2
     center_lng = (bbox['min_lng'] + bbox['max_lng']) / 2
@@ -552,16 +911,20 @@ def fetch_stations_in_bbox(bbox):
         c = 2 * math.atan2(math.sqrt(a), math.sqrt(1-a))
         return R * c
 
-    scored = []
-    for s in stations:
-        pos = s.get('position') or {}
-        lat = pos.get('lat')
-        lng = pos.get('lng')
-        if lat is None or lng is None:
-            continue
-        dist = haversine_km(center_lat, center_lng, lat, lng)
-        scored.append((dist, s))
-    scored.sort(key=lambda x: x[0])
+    if station_shards is not None:
+        # The bbox's own shards may hold nothing; search outward through the other shards
+        scored = [(dist, s) for s, dist in station_shards.nearest(center_lat, center_lng, 25)]
+    else:
+        scored = []
+        for s in stations:
+            pos = s.get('position') or {}
+            lat = pos.get('lat')
+            lng = pos.get('lng')
+            if lat is None or lng is None:
+                continue
+            dist = haversine_km(center_lat, center_lng, lat, lng)
+            scored.append((dist, s))
+        scored.sort(key=lambda x: x[0])
     nearest = []
     for _, s in scored[:25]:
         pos = s['position']
@@ -576,32 +939,73 @@ def fetch_stations_in_bbox(bbox):
         })
     return nearest
 
+STATION_FILE_CANDIDATES = [
+    'CNG_pumps_with_Erlang-C_waiting_times_250.csv',
+    'Trimmed_CNG_Pump_Data (1).csv',
+    'Trimmed_CNG_Pump_Data (1).xlsx',
+    'Trimmed_CNG_Pump_Data.csv',
+    'Trimmed_CNG_Pump_Data.xlsx'
+]
+
+def _resolve_stations_path():
+    """Return the first known stations file that exists, relative to the app root"""
+    base_dir = os.path.dirname(__file__)
+    for name in STATION_FILE_CANDIDATES:
+        p = os.path.join(base_dir, name)
+        if os.path.exists(p):
+            return p
+    return None
+
+def _build_stations_data(file_path):
+    started = time.perf_counter()
+    data = _parse_stations_file(file_path)
+    metrics.set_gauge('quickfill_model_load_seconds', time.perf_counter() - started, model='stations_file')
+    return data
+
+# Versioned, immutable station snapshot. A watcher thread rebuilds it in the background
+# when the file changes and swaps it in atomically (QUICKFILL_SNAPSHOT_POLL seconds, 0 = off)
+station_snapshots = SnapshotStore(
+    _resolve_stations_path, _build_stations_data,
+    poll_interval=float(os.environ.get('QUICKFILL_SNAPSHOT_POLL', '30'))
+)
+
+@app.before_request
+def _ensure_snapshot_watcher():
+    # Started lazily so every (forked) worker process runs its own watcher
+    station_snapshots.start_watching()
+
+def current_snapshot():
+    """The published snapshot; take it once per request and use that object throughout"""
+    return station_snapshots.get()
+
+# Optional region shards (scripts/build_station_shards.py). When configured, radius,
+# bbox and optimizer queries load only the shards they touch, LRU-evicted under
+# QUICKFILL_SHARD_MEMORY_MB; the bulk list endpoints keep serving the snapshot
+station_shards = load_station_shards(
+    os.environ.get('QUICKFILL_STATION_SHARDS'), _build_stations_data,
+    memory_budget_mb=float(os.environ.get('QUICKFILL_SHARD_MEMORY_MB', '256'))
+)
+
+def _stations_version():
+    """Version of the station data behind radius/bbox queries, for cache scoping"""
+    if station_shards is not None:
+        return station_shards.version
+    return current_snapshot().version
+
 def _read_stations_file():
-    """Read stations from the provided Excel file and return as JSON.
+    """Return the parsed stations dict of the current snapshot.
+    The returned dict is shared between requests and must not be mutated.
+    """
+    snapshot = current_snapshot()
+    if snapshot.path is None:
+        return { 'error': 'File not found: ' + ', '.join(STATION_FILE_CANDIDATES), 'stations': [] }
+    return snapshot.data
+
+def _parse_stations_file(file_path):
+    """Read stations from the provided CSV/Excel file and return as JSON.
     Attempts to infer latitude/longitude/name columns case-insensitively.
     """
     try:
-        # Resolve file path relative to app root
-        # Try multiple known filenames in order
-        candidates = [
-            'CNG_pumps_with_Erlang-C_waiting_times_250.csv',
-            'Trimmed_CNG_Pump_Data (1).csv',
-            'Trimmed_CNG_Pump_Data (1).xlsx',
-            'Trimmed_CNG_Pump_Data.csv',
-            'Trimmed_CNG_Pump_Data.xlsx'
-        ]
-        base_dir = os.path.dirname(__file__)
-        use_path = None
-        for name in candidates:
-            p = os.path.join(base_dir, name)
-            if os.path.exists(p):
-                use_path = p
-                break
-        if not use_path:
-            return { 'error': 'File not found: ' + ', '.join(candidates), 'stations': [] }
-        filename = os.path.basename(use_path)
-        file_path = use_path
-
         if file_path.endswith('.csv'):
             df = pd.read_csv(file_path)
         else:
@@ -645,19 +1049,312 @@ def _read_stations_file():
     except Exception as e:
         return { 'error': str(e), 'stations': [] }
 
+STATION_FIELDS = ('name', 'position', 'lat', 'lng')
+MAX_PAGE_SIZE = 5000
+
+def _parse_bbox(value):
+    """Parse 'min_lng,min_lat,max_lng,max_lat' into a bbox dict"""
+    parts = [float(p) for p in value.split(',')]
+    if len(parts) != 4:
+        raise ValueError('bbox must be min_lng,min_lat,max_lng,max_lat')
+    return {'min_lng': parts[0], 'min_lat': parts[1], 'max_lng': parts[2], 'max_lat': parts[3]}
+
+def _project_station(s, fields):
+    """Return only the requested fields of a station; lat/lng are flattened from position"""
+    if fields is None:
+        return s
+    pos = s.get('position') or {}
+    out = {}
+    for f in fields:
+        if f in ('lat', 'lng'):
+            out[f] = pos.get(f)
+        else:
+            out[f] = s.get(f)
+    return out
+
+def _encode_cursor(offset, version):
+    raw = json.dumps({'o': offset, 'v': version}, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def _decode_cursor(cursor):
+    padded = cursor + '=' * (-len(cursor) % 4)
+    payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    return int(payload['o']), payload.get('v')
+
+def _iter_stations(stations, bbox, start=0):
+    """Yield (index, station) pairs from start, optionally restricted to a bbox"""
+    for i in range(start, len(stations)):
+        s = stations[i]
+        if bbox is not None:
+            pos = s.get('position') or {}
+            if not (bbox['min_lat'] <= pos.get('lat', 91) <= bbox['max_lat'] and
+                    bbox['min_lng'] <= pos.get('lng', 181) <= bbox['max_lng']):
+                continue
+        yield i, s
+
 @app.route('/api/stations-from-file')
 def stations_from_file():
+    """All stations, or a page/stream of them.
+
+    Query parameters (all optional; without any the full list is returned as before):
+      limit   page size (max MAX_PAGE_SIZE); the response carries next_cursor
+      cursor  opaque cursor from a previous page
+      fields  comma-separated subset of name,position,lat,lng
+      bbox    min_lng,min_lat,max_lng,max_lat
+      format  'ndjson' streams one station per line (also via Accept: application/x-ndjson)
+    """
     data = _read_stations_file()
-    status = 200
     if data.get('error'):
         status = 400 if 'not found' not in data['error'].lower() else 404
-    return jsonify(data), status
+        return jsonify(data), status
+
+    stations = data['stations']
+    version = data.get('version')
+    try:
+        fields = None
+        if request.args.get('fields'):
+            fields = [f.strip() for f in request.args['fields'].split(',') if f.strip()]
+            unknown = [f for f in fields if f not in STATION_FIELDS]
+            if unknown:
+                raise ValueError('Unknown fields: ' + ', '.join(unknown))
+        bbox = _parse_bbox(request.args['bbox']) if request.args.get('bbox') else None
+        start = 0
+        if request.args.get('cursor'):
+            start, cursor_version = _decode_cursor(request.args['cursor'])
+            if cursor_version != version:
+                return jsonify({'error': 'Cursor expired: station data has changed', 'stations': []}), 410
+        limit = request.args.get('limit')
+        limit = min(max(int(limit), 1), MAX_PAGE_SIZE) if limit else None
+    except (ValueError, TypeError, KeyError) as e:
+        return jsonify({'error': f'Invalid query: {e}', 'stations': []}), 400
+
+    wants_ndjson = (request.args.get('format') == 'ndjson' or
+                    request.accept_mimetypes.best == 'application/x-ndjson')
+    if wants_ndjson:
+        def generate():
+            sent = 0
+            for _, s in _iter_stations(stations, bbox, start):
+                if limit is not None and sent >= limit:
+                    break
+                yield json.dumps(_project_station(s, fields)) + '\n'
+                sent += 1
+        headers = {'X-Stations-Version': version} if version else {}
+        return Response(stream_with_context(generate()), mimetype='application/x-ndjson', headers=headers)
+
+    if limit is None and bbox is None and fields is None and start == 0:
+        return jsonify(data), 200
+
+    page = []
+    next_cursor = None
+    for i, s in _iter_stations(stations, bbox, start):
+        if limit is not None and len(page) >= limit:
+            next_cursor = _encode_cursor(i, version)
+            break
+        page.append(_project_station(s, fields))
+    return jsonify({'stations': page, 'next_cursor': next_cursor, 'version': version}), 200
+
+def _stations_within(lat, lng, radius_km):
+    """Stations within radius_km; (station, km) pairs, nearest first"""
+    if station_shards is not None:
+        return sorted(station_shards.within(lat, lng, radius_km), key=lambda p: p[1])
+    snapshot = current_snapshot()
+    idx, dist = snapshot.within(lat, lng, radius_km)
+    order = np.argsort(dist, kind='stable')
+    return [(snapshot.stations[idx[j]], float(dist[j])) for j in order.tolist()]
+
+@app.route('/api/wait-forecast/<lat>/<lng>')
+def wait_forecast(lat, lng):
+    """Hourly wait forecast (station x hour) for stations near a point, in one batched prediction"""
+    try:
+        lat, lng = float(lat), float(lng)
+        radius_km = float(request.args.get('radius', 5))
+        hours = min(max(int(request.args.get('hours', 24)), 1), 168)
+    except ValueError as e:
+        return jsonify({'error': f'Invalid query: {e}', 'stations': []}), 400
+
+    nearby = _stations_within(lat, lng, radius_km)
+    ids = [f"{s['position']['lat']:.6f},{s['position']['lng']:.6f}" for s, _ in nearby]
+    hour_starts, matrix = wait_time_predictor.forecast(ids, hours=hours)
+
+    stations = []
+    for (s, dist), sid, row in zip(nearby, ids, matrix):
+        best = int(np.argmin(row))
+        stations.append({
+            'id': sid,
+            'name': s.get('name', 'CNG Station'),
+            'position': s['position'],
+            'distance_km': round(dist, 3),
+            'forecast': [round(float(w), 2) for w in row],
+            'best_hour': hour_starts[best].isoformat(),
+            'best_wait': round(float(row[best]), 2)
+        })
+    return jsonify({'hours': [t.isoformat() for t in hour_starts], 'stations': stations})
+
+ONLINE_REFIT_INTERVAL = float(os.environ.get('QUICKFILL_REFIT_INTERVAL', 900))
+
+@app.route('/api/wait-reports', methods=['POST'])
+def wait_reports():
+    """Accept observed waits: one object or a list of
+    {station_id, timestamp (ISO 8601 or epoch seconds), wait_minutes, features?}.
+
+    Reports are buffered and refit per process. With several gunicorn workers
+    each one learns only from the reports it received; run one worker (or
+    route /api/wait-reports to a single instance) when all reports must
+    reach the same model.
+    """
+    payload = request.get_json(silent=True)
+    reports = payload if isinstance(payload, list) else [payload]
+    accepted = 0
+    errors = []
+    for i, report in enumerate(reports):
+        try:
+            if not isinstance(report, dict):
+                raise TypeError('each report must be an object')
+            if not isinstance(report.get('features') or {}, dict):
+                raise TypeError('features must be an object')
+            wait_time_predictor.ingest_observation(
+                report['station_id'],
+                report.get('timestamp') or datetime.now(),
+                report['wait_minutes'],
+                report.get('features')
+            )
+            accepted += 1
+        except (KeyError, TypeError, ValueError) as e:
+            errors.append({'index': i, 'error': str(e)})
+
+    if accepted:
+        # The refit thread is started lazily so each (forked) worker gets its own
+        wait_time_predictor.start_online_learning(interval_seconds=ONLINE_REFIT_INTERVAL)
+    status = 202 if accepted else 400
+    return jsonify({'accepted': accepted, 'errors': errors,
+                    'online_learning': wait_time_predictor.online_stats}), status
+
+# Cluster index over the station snapshot, rebuilt when the snapshot or the hour changes
+_cluster_cache = {'key': None, 'index': None}
+
+def _baseline_station_waits(stations, timeinfo):
+    """Predicted wait per station for the current hour with typical (non-random) load"""
+    feature_recs = [{
+        'id': i,
+        'active_chargers': 1,
+        'total_chargers': 2,
+        'current_queue_length': 1,
+        'hour_of_day': timeinfo['hour'],
+        'day_of_week': timeinfo['day_of_week'],
+        'is_weekend': 1 if timeinfo['is_weekend'] else 0,
+        'traffic_density': 0.5,
+        'historical_avg_wait_time': 10.0
+    } for i in range(len(stations))]
+    if not feature_recs:
+        return []
+    preds = wait_time_predictor.predict_wait_time(feature_recs)
+    return [float(p['predicted_wait']) for p in preds]
 
-@app.route('/location-optimizer')
-def location_optimizer():
+def _get_cluster_index():
+    data = _read_stations_file()
+    stations = data.get('stations', [])
+    timeinfo = get_time_info()
+    key = (data.get('version'), timeinfo['hour'], timeinfo['day_of_week'])
+    if _cluster_cache['key'] == key and _cluster_cache['index'] is not None:
+        metrics.cache_result('cluster_index', True)
+        return _cluster_cache['index']
+
+    metrics.cache_result('cluster_index', False)
+    with metrics.span('cluster_index_build'):
+        index = StationClusterIndex(
+            [s['position']['lat'] for s in stations],
+            [s['position']['lng'] for s in stations],
+            waits=_baseline_station_waits(stations, timeinfo),
+            names=[s.get('name', 'CNG Station') for s in stations]
+        )
+    _cluster_cache['key'] = key
+    _cluster_cache['index'] = index
+    return index
+
+@app.route('/api/station-clusters')
+def station_clusters():
+    """Pre-aggregated clusters for a map viewport.
+
+    Query: bbox=min_lng,min_lat,max_lng,max_lat and zoom (Leaflet zoom level).
+    Individual stations are only returned at high zoom.
+    """
+    try:
+        bbox = _parse_bbox(request.args['bbox'])
+        zoom = int(request.args.get('zoom', 10))
+    except (KeyError, ValueError) as e:
+        return jsonify({'error': f'Invalid query: {e}', 'clusters': [], 'stations': []}), 400
+
+    data = _read_stations_file()
+    if data.get('error'):
+        return jsonify({'error': data['error'], 'clusters': [], 'stations': []}), 404
+
+    index = _get_cluster_index()
+    with metrics.span('cluster_query'):
+        result = index.query(bbox, zoom)
+    result['version'] = data.get('version')
+    return jsonify(result)
+
+# Suitability heatmap tiles precomputed by scripts/score_region.py
+suitability_store = SuitabilityTileStore(os.environ.get(
+    'QUICKFILL_SUITABILITY_STORE', os.path.join(os.path.dirname(__file__), 'suitability_tiles')
+))
+
+@app.route('/api/suitability/metadata')
+def suitability_metadata():
+    metadata = suitability_store.metadata()
+    if metadata is None:
+        return jsonify({'error': 'No suitability tiles; run scripts/score_region.py'}), 404
+    return jsonify(metadata)
+
+@app.route('/api/suitability/<int:z>/<int:x>/<int:y>')
+def suitability_tile(z, x, y):
+    """One precomputed score grid (rows north to south); ?layer= picks the score"""
+    layer = request.args.get('layer', 'total_score')
+    if layer not in SCORE_LAYERS:
+        return jsonify({'error': f'Unknown layer: {layer}', 'layers': list(SCORE_LAYERS)}), 400
+    tile = suitability_store.read(z, x, y)
+    if tile is None:
+        return jsonify({'error': 'Tile not scored'}), 404
+    grid = tile[layer]
+    response = jsonify({
+        'z': z, 'x': x, 'y': y, 'layer': layer,
+        'resolution': int(grid.shape[0]),
+        'bounds': tile_bounds(z, x, y),
+        'values': np.round(grid, 3).tolist()
+    })
+    response.headers['Cache-Control'] = 'public, max-age=3600'
+    return response
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Prometheus scrape endpoint (per process; disabled with QUICKFILL_METRICS=0)"""
+    if not metrics.enabled:
+        return jsonify({'error': 'Metrics are disabled'}), 404
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/location-optimizer', endpoint='location_optimizer')
+def location_optimizer_page():
     if not session.get('logged_in'):
         return redirect(url_for('login'))
     return render_template('location_optimizer.html', username=session.get('username'))
 
+def create_app():
+    """WSGI app factory for production servers (see wsgi.py and gunicorn.conf.py).
+
+    Loads the station snapshot up front so that, when the server preloads the
+    app in its master process, forked workers share it copy-on-write instead
+    of each parsing the file on their first request.
+    """
+    app.secret_key = os.environ.get('SECRET_KEY', app.secret_key)
+
+    data = _read_stations_file()
+    if data.get('error'):
+        print(f"Station snapshot not loaded: {data['error']}")
+    else:
+        print(f"Station snapshot loaded: {len(data['stations'])} stations")
+    print(f"Restricted areas indexed: {len(restricted_area_index)}")
+    print(f"Wait time model: {'trained' if wait_time_predictor.is_trained else 'heuristic'}")
+    return app
+
 if __name__ == '__main__':
-    app.run(debug=True)
\ No newline at end of file
+    app.run(debug=os.environ.get('FLASK_DEBUG', '1') == '1')
\ No newline at end of file
@@ -0,0 +1,22 @@
+import numpy as np
+import pytest
+
+from generators import make_station_frame
+from models.location_optimizer import LocationOptimizer
+
+
+@pytest.fixture
+def optimizer(tmp_path, n_optimizer_stations):
+    path = tmp_path / 'stations.csv'
+    make_station_frame(n_optimizer_stations, seed=5).to_csv(path, index=False)
+    return LocationOptimizer(str(path))
+
+
+def bench_optimize_station_locations(benchmark, optimizer):
+    def run():
+        # _classify_area_type draws from the global RNG; reseed for identical rounds
+        np.random.seed(6)
+        return optimizer.optimize_station_locations(28.6139, 77.2090, radius_km=10.0, num_stations=3)
+
+    selected = benchmark(run)
+    assert selected
@@ -0,0 +1,32 @@
+import pytest
+
+from generators import make_prediction_records, make_training_frame
+from models.wait_time_predictor import WaitTimePredictor
+
+
+@pytest.fixture
+def training_csv(tmp_path, n_training_rows):
+    path = tmp_path / 'training.csv'
+    make_training_frame(n_training_rows, seed=7).to_csv(path, index=False)
+    return str(path)
+
+
+@pytest.fixture(scope='module')
+def trained_predictor(tmp_path_factory):
+    path = tmp_path_factory.mktemp('predictor') / 'training.csv'
+    make_training_frame(10_000, seed=8).to_csv(path, index=False)
+    predictor = WaitTimePredictor()
+    predictor.train_from_csv(str(path))
+    return predictor
+
+
+def bench_train_from_csv(benchmark, training_csv):
+    predictor = WaitTimePredictor()
+    benchmark.pedantic(predictor.train_from_csv, args=(training_csv,), rounds=3, iterations=1)
+    assert predictor.is_trained
+
+
+def bench_predict_wait_time(benchmark, trained_predictor, n_predict_rows):
+    records = make_prediction_records(n_predict_rows, seed=9)
+    predictions = benchmark(trained_predictor.predict_wait_time, records)
+    assert len(predictions) == n_predict_rows
@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+
+from generators import make_grid_road_graph, make_route, make_route_stations
+from models.station_calculating_model import ChargingStationCalculator
+
+EV_SPECS = {'batteryCapacity': 12.0, 'chargingSpeed': 10.0, 'consumption': 0.08, 'range': 250.0}
+
+
+def bench_calculate_charging_stops(benchmark, n_route_vertices):
+    calculator = ChargingStationCalculator()
+    route = make_route(n_route_vertices, length_km=400.0, seed=3)
+    stations = make_route_stations(1_000, seed=4)
+
+    stops = benchmark(calculator.calculate_charging_stops, route, EV_SPECS, 100.0, stations)
+    assert stops
+
+
+@pytest.fixture(scope='module', params=[200, 800], ids=['graph=40k', 'graph=640k'])
+def road_graph(request):
+    from models.road_network import RoadGraph
+    # No per-source cache: user positions rarely repeat, so every query is a fresh search
+    return RoadGraph.from_edges(**make_grid_road_graph(request.param), cache_size=0)
+
+
+@pytest.mark.parametrize('max_km', [5.0, 15.0])
+def bench_road_distances(benchmark, road_graph, max_km):
+    """One-to-many network distances from a new source to 25 nearby stations"""
+    rng = np.random.default_rng(5)
+    lat0, lng0 = float(np.mean(road_graph.node_lat)), float(np.mean(road_graph.node_lng))
+
+    def query():
+        lat, lng = lat0 + rng.uniform(-0.02, 0.02), lng0 + rng.uniform(-0.02, 0.02)
+        return road_graph.distances_km(lat, lng, lat + rng.uniform(-0.03, 0.03, 25),
+                                       lng + rng.uniform(-0.03, 0.03, 25), max_km=max_km)
+
+    assert np.isfinite(benchmark(query)).any()
@@ -0,0 +1,66 @@
+import pytest
+
+from generators import make_station_frame, make_station_records
+
+
+@pytest.fixture
+def stations_csv(tmp_path, n_stations):
+    path = tmp_path / 'stations.csv'
+    make_station_frame(n_stations, seed=1).to_csv(path, index=False)
+    return str(path)
+
+
+def bench_parse_stations_file(benchmark, app_module, stations_csv):
+    """Cold parse of a stations CSV (what every snapshot reload pays)"""
+    data = benchmark(app_module._parse_stations_file, stations_csv)
+    assert not data.get('error')
+
+
+def _snapshot_store(app_module, resolve_path=lambda: None):
+    from models.station_snapshot import SnapshotStore
+    return SnapshotStore(resolve_path, app_module._build_stations_data, poll_interval=0)
+
+
+def bench_build_snapshot(benchmark, app_module, stations_csv):
+    """Background rebuild of a snapshot: parse, arrays, spatial index, optimizer features"""
+    store = _snapshot_store(app_module, lambda: stations_csv)
+    snapshot = benchmark(store.build, store._file_key())
+    assert len(snapshot)
+
+
+def bench_read_stations_file_cached(benchmark, app_module, stations_csv, monkeypatch):
+    """_read_stations_file between snapshot reloads"""
+    monkeypatch.setattr(app_module, 'station_snapshots', _snapshot_store(app_module, lambda: stations_csv))
+    app_module._read_stations_file()
+    data = benchmark(app_module._read_stations_file)
+    assert data['stations']
+
+
+def _bench_snapshot(app_module, n_stations, monkeypatch):
+    from models.station_snapshot import StationSnapshot
+    store = _snapshot_store(app_module)
+    store.current = StationSnapshot({'stations': make_station_records(n_stations, seed=2), 'version': 'bench'},
+                                    path='bench')
+    monkeypatch.setattr(app_module, 'station_snapshots', store)
+
+
+def bench_get_nearby_stations(benchmark, app_module, n_stations, monkeypatch):
+    """Full /api/stations/<lat>/<lng> request: radius query, features, prediction, jsonify"""
+    _bench_snapshot(app_module, n_stations, monkeypatch)
+    client = app_module.app.test_client()
+
+    response = benchmark(client.get, '/api/stations/28.6139/77.2090?radius=5')
+    assert response.status_code == 200
+
+
+def bench_get_nearby_stations_cell_cache_hit(benchmark, app_module, n_stations, monkeypatch):
+    """/api/stations-with-wait answered from the geo-cell cache: exact re-filter, sort, jsonify"""
+    _bench_snapshot(app_module, n_stations, monkeypatch)
+    app_module.nearby_cache.clear()
+    client = app_module.app.test_client()
+    assert client.get('/api/stations-with-wait/28.6139/77.2090?radius=5').headers['X-Nearby-Cache'] == 'MISS'
+
+    # A few metres away: same cell, so the cached cell result is re-filtered
+    response = benchmark(client.get, '/api/stations-with-wait/28.61392/77.20903?radius=5')
+    assert response.status_code == 200
+    assert response.headers['X-Nearby-Cache'] == 'HIT'
@@ -0,0 +1,52 @@
+"""Benchmark configuration.
+
+Run from the repository root::
+
+    pip install -r benchmarks/requirements.txt
+    pytest benchmarks                       # quick sizes
+    pytest benchmarks --bench-scale=full    # 1k .. 1M stations, 100 .. 100k route vertices
+
+Each run is autosaved as JSON under .benchmarks/; compare two runs with
+``pytest-benchmark compare 0001 0002``.
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SIZES = {
+    'quick': {
+        'n_stations': [1_000, 10_000],
+        'n_route_vertices': [100, 1_000],
+        'n_training_rows': [1_000],
+        'n_predict_rows': [100, 1_000],
+        'n_optimizer_stations': [250, 1_000],
+    },
+    'full': {
+        'n_stations': [1_000, 10_000, 100_000, 1_000_000],
+        'n_route_vertices': [100, 1_000, 10_000, 100_000],
+        'n_training_rows': [1_000, 10_000, 100_000],
+        'n_predict_rows': [100, 1_000, 10_000],
+        'n_optimizer_stations': [250, 1_000, 10_000],
+    },
+}
+
+
+def pytest_addoption(parser):
+    parser.addoption('--bench-scale', choices=sorted(SIZES), default='quick',
+                     help='input sizes to benchmark (default: quick)')
+
+
+def pytest_generate_tests(metafunc):
+    sizes = SIZES[metafunc.config.getoption('--bench-scale')]
+    for name, values in sizes.items():
+        if name in metafunc.fixturenames:
+            metafunc.parametrize(name, values, ids=[f'{name}={v}' for v in values])
+
+
+@pytest.fixture(scope='session')
+def app_module():
+    import app
+    return app
@@ -0,0 +1,130 @@
+"""Seeded synthetic data generators for the benchmark suite.
+
+Every generator takes an explicit ``seed`` so two runs (or two branches)
+benchmark exactly the same inputs.
+"""
+import math
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+# Delhi NCR bounding box used for all synthetic points
+NCR_BBOX = {'min_lat': 28.40, 'max_lat': 28.90, 'min_lng': 76.85, 'max_lng': 77.55}
+
+RUSH_PATTERNS = ['Morning peak', 'Evening peak', 'Steady', 'Both peaks']
+
+
+def make_station_frame(n: int, seed: int = 0) -> pd.DataFrame:
+    """Stations table with the same columns as CNG_pumps_with_Erlang-C_waiting_times_250.csv"""
+    rng = np.random.default_rng(seed)
+    morning = rng.gamma(4.0, 2.5, n).round(1)
+    evening = rng.gamma(4.0, 2.2, n).round(1)
+    overall = ((morning + evening) / 2 * rng.uniform(0.7, 1.0, n)).round(2)
+    service = rng.uniform(3.0, 9.0, n).round(1)
+    servers = rng.integers(1, 5, n).astype(float)
+    wq = rng.exponential(8.0, (n, 3)).round(2)
+    return pd.DataFrame({
+        'name': [f'Station {i}' for i in range(n)],
+        '@lat': rng.uniform(NCR_BBOX['min_lat'], NCR_BBOX['max_lat'], n),
+        '@lon': rng.uniform(NCR_BBOX['min_lng'], NCR_BBOX['max_lng'], n),
+        'demo_arrivals_per_hr_morning': morning,
+        'demo_arrivals_per_hr_evening': evening,
+        'demo_overall_arrivals_per_hr': overall,
+        'demo_interarrival_mean_min': (60.0 / np.maximum(overall, 0.1)).round(1),
+        'demo_avg_service_time_min': service,
+        'demo_servers_disp': servers,
+        'demo_rush_pattern': rng.choice(RUSH_PATTERNS, n),
+        'demo_weekend_multiplier': rng.choice([0.8, 1.0, 1.2], n),
+        'demo_holiday_multiplier': rng.choice([1.0, 1.3, 1.6], n),
+        'demo_est_wait_prob': rng.uniform(0, 1, n).round(2),
+        'Wq_morning_min': wq[:, 0],
+        'Wq_evening_min': wq[:, 1],
+        'Wq_overall_min': wq[:, 2],
+        'Expected_total_station_time_min': (wq[:, 2] + service).round(2),
+    })
+
+
+def make_station_records(n: int, seed: int = 0) -> List[Dict]:
+    """Stations in the shape returned by app._read_stations_file()['stations']"""
+    df = make_station_frame(n, seed)
+    return [
+        {'name': name, 'position': {'lat': float(lat), 'lng': float(lng)}}
+        for name, lat, lng in zip(df['name'], df['@lat'], df['@lon'])
+    ]
+
+
+def make_route_stations(n: int, seed: int = 0) -> List[Dict]:
+    """Stations in the shape ChargingStationCalculator expects as available_stations"""
+    df = make_station_frame(n, seed)
+    return [
+        {'name': name, 'lat': float(lat), 'lng': float(lng), 'type': 'CNG Pump',
+         'power': 'N/A', 'active_chargers': 1, 'total_chargers': 1}
+        for name, lat, lng in zip(df['name'], df['@lat'], df['@lon'])
+    ]
+
+
+def make_route(n_vertices: int, length_km: float = 400.0, seed: int = 0) -> Dict:
+    """A wiggly polyline with n_vertices points and roughly length_km total distance"""
+    rng = np.random.default_rng(seed)
+    start_lat, start_lng = 28.60, 77.20
+    heading = rng.uniform(0, 2 * math.pi)
+    turns = np.cumsum(rng.normal(0, 0.05, n_vertices - 1)) + heading
+    step_km = length_km / max(n_vertices - 1, 1)
+    dlat = np.cos(turns) * step_km / 111.0
+    dlng = np.sin(turns) * step_km / (111.0 * math.cos(math.radians(start_lat)))
+    lats = np.concatenate([[start_lat], start_lat + np.cumsum(dlat)])
+    lngs = np.concatenate([[start_lng], start_lng + np.cumsum(dlng)])
+    return {
+        'distance': length_km,
+        'coordinates': np.column_stack([lats, lngs]).tolist(),
+    }
+
+
+def make_grid_road_graph(side: int, spacing_deg: float = 0.0006) -> Dict:
+    """Two-way street grid of side x side nodes (~65 m blocks) as RoadGraph.from_edges arrays"""
+    i, j = np.meshgrid(np.arange(side), np.arange(side), indexing='ij')
+    node = np.arange(side * side).reshape(side, side)
+    a = np.concatenate([node[:, :-1].ravel(), node[:-1, :].ravel()])
+    b = np.concatenate([node[:, 1:].ravel(), node[1:, :].ravel()])
+    return {
+        'node_lat': (NCR_BBOX['min_lat'] + i * spacing_deg).ravel(),
+        'node_lng': (NCR_BBOX['min_lng'] + j * spacing_deg).ravel(),
+        'src': np.concatenate([a, b]),
+        'dst': np.concatenate([b, a]),
+    }
+
+
+def make_training_frame(n: int, seed: int = 0) -> pd.DataFrame:
+    """Training table accepted by WaitTimePredictor.train_from_csv"""
+    rng = np.random.default_rng(seed)
+    total = rng.integers(1, 6, n)
+    active = np.minimum(total, rng.integers(0, 6, n))
+    queue = rng.poisson(2.0, n)
+    hour = rng.integers(0, 24, n)
+    dow = rng.integers(0, 7, n)
+    traffic = rng.uniform(0, 1, n).round(3)
+    hist = rng.gamma(2.0, 5.0, n).round(2)
+    rush = np.isin(hour, [8, 9, 10, 18, 19, 20]).astype(float)
+    wait = (queue * 6.0 / np.maximum(active, 1) + 0.5 * hist + 8.0 * rush * traffic
+            + rng.normal(0, 2.0, n)).clip(0).round(2)
+    return pd.DataFrame({
+        'active_chargers': active,
+        'total_chargers': total,
+        'current_queue_length': queue,
+        'hour_of_day': hour,
+        'day_of_week': dow,
+        'is_weekend': (dow >= 5).astype(int),
+        'traffic_density': traffic,
+        'historical_avg_wait_time': hist,
+        'wait_time': wait,
+    })
+
+
+def make_prediction_records(n: int, seed: int = 0) -> List[Dict]:
+    """Feature records in the shape app.get_nearby_stations passes to predict_wait_time"""
+    df = make_training_frame(n, seed).drop(columns=['wait_time'])
+    records = df.to_dict('records')
+    for i, rec in enumerate(records):
+        rec['id'] = f'station-{i}'
+    return records
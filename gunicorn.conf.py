@@ -0,0 +1,54 @@
+"""gunicorn settings for QuickFill, configurable through QUICKFILL_* environment variables.
+
+With preload enabled (the default) the master imports ``wsgi:app`` once, which
+trains the wait time model, builds the restricted-area index and loads the
+station snapshot, and then forks workers that share those pages copy-on-write.
+
+State that changes at runtime stays per worker. That includes the online
+wait-time learner: each worker buffers and refits on the /api/wait-reports
+it receives, so its model drifts apart from the others.
+"""
+import gc
+import multiprocessing
+import os
+
+
+def _env_int(name, default):
+    try:
+        return int(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+def _env_bool(name, default):
+    return os.environ.get(name, '1' if default else '0').strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+bind = os.environ.get('QUICKFILL_BIND', '0.0.0.0:8000')
+workers = _env_int('QUICKFILL_WORKERS', multiprocessing.cpu_count() * 2 + 1)
+threads = _env_int('QUICKFILL_THREADS', 2)
+worker_class = 'gthread' if threads > 1 else 'sync'
+preload_app = _env_bool('QUICKFILL_PRELOAD', True)
+timeout = _env_int('QUICKFILL_TIMEOUT', 60)
+graceful_timeout = _env_int('QUICKFILL_GRACEFUL_TIMEOUT', 30)
+keepalive = _env_int('QUICKFILL_KEEPALIVE', 5)
+# Recycle workers periodically; jitter keeps them from restarting together
+max_requests = _env_int('QUICKFILL_MAX_REQUESTS', 0)
+max_requests_jitter = _env_int('QUICKFILL_MAX_REQUESTS_JITTER', 50)
+accesslog = os.environ.get('QUICKFILL_ACCESS_LOG', '-')
+errorlog = os.environ.get('QUICKFILL_ERROR_LOG', '-')
+
+
+def when_ready(server):
+    # Everything loaded so far (preloaded app, models, indexes) is moved to a
+    # permanent generation so the garbage collector in the workers never
+    # touches those objects and their pages stay shared after fork.
+    if preload_app:
+        gc.freeze()
+
+
+def post_fork(server, worker):
+    # Workers inherit the master's numpy RNG state; reseed so they don't all
+    # draw the same "random" queue lengths.
+    import numpy as np
+    np.random.seed()
@@ -0,0 +1,84 @@
+import math
+import os
+import re
+from typing import Optional, Tuple
+
+import numpy as np
+
+SRTM_VOID = -32768
+_TILE_NAME = re.compile(r'^([NS])(\d{2})([EW])(\d{3})\.hgt$', re.IGNORECASE)
+
+
+class ElevationModel:
+    """Elevation lookups from a directory of SRTM ``.hgt`` tiles.
+
+    Each 1°x1° tile (e.g. ``N31E077.hgt``: big-endian int16, rows north to
+    south, 1201 or 3601 samples per side) is memory-mapped on first use. Only
+    the pages a lookup touches are read from disk, and mapped tiles are
+    shared by all threads and forked workers. ``sample`` interpolates any
+    number of points bilinearly in one vectorized pass per tile.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._paths = {}   # (lat_floor, lng_floor) -> path
+        for name in os.listdir(directory):
+            match = _TILE_NAME.match(name)
+            if match:
+                lat = int(match.group(2)) * (1 if match.group(1).upper() == 'N' else -1)
+                lng = int(match.group(4)) * (1 if match.group(3).upper() == 'E' else -1)
+                self._paths[(lat, lng)] = os.path.join(directory, name)
+        self._tiles = {}   # (lat_floor, lng_floor) -> memmap
+
+    def _tile(self, key: Tuple[int, int]) -> Optional[np.ndarray]:
+        tile = self._tiles.get(key)
+        if tile is None and key in self._paths:
+            path = self._paths[key]
+            side = int(round(math.sqrt(os.path.getsize(path) / 2)))
+            tile = np.memmap(path, dtype='>i2', mode='r', shape=(side, side))
+            self._tiles[key] = tile
+        return tile
+
+    def sample(self, lats, lngs) -> np.ndarray:
+        """Elevation in meters at each point; NaN outside the available tiles or in voids"""
+        lats = np.atleast_1d(np.asarray(lats, dtype=float))
+        lngs = np.atleast_1d(np.asarray(lngs, dtype=float))
+        result = np.full(len(lats), np.nan)
+        lat_floor = np.floor(lats).astype(np.int64)
+        lng_floor = np.floor(lngs).astype(np.int64)
+        tile_ids = lat_floor * 1000 + lng_floor
+        for tile_id in np.unique(tile_ids):
+            idx = np.flatnonzero(tile_ids == tile_id)
+            tile = self._tile((int(lat_floor[idx[0]]), int(lng_floor[idx[0]])))
+            if tile is None:
+                continue
+            last = tile.shape[0] - 1
+            # Fractional row/col: row 0 is the tile's northern edge
+            row = (1.0 - (lats[idx] - lat_floor[idx])) * last
+            col = (lngs[idx] - lng_floor[idx]) * last
+            r0 = np.clip(np.floor(row).astype(np.int64), 0, last - 1)
+            c0 = np.clip(np.floor(col).astype(np.int64), 0, last - 1)
+            fr, fc = row - r0, col - c0
+            corners = np.stack([tile[r0, c0], tile[r0, c0 + 1], tile[r0 + 1, c0], tile[r0 + 1, c0 + 1]]).astype(float)
+            corners[corners == SRTM_VOID] = np.nan
+            result[idx] = ((corners[0] * (1 - fc) + corners[1] * fc) * (1 - fr) +
+                           (corners[2] * (1 - fc) + corners[3] * fc) * fr)
+        return result
+
+    def __len__(self):
+        return len(self._paths)
+
+
+def load_elevation_model(directory: Optional[str]) -> Optional[ElevationModel]:
+    """Open the configured DEM directory, or None (consumption then ignores terrain)"""
+    if not directory or not os.path.isdir(directory):
+        return None
+    try:
+        model = ElevationModel(directory)
+        if not len(model):
+            return None
+        print(f"Elevation model with {len(model)} SRTM tiles from {directory}")
+        return model
+    except Exception as e:
+        print(f"Error loading elevation tiles from {directory}: {e}")
+        return None
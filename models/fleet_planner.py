@@ -0,0 +1,170 @@
+import math
+from collections import defaultdict
+from typing import Any, Dict, List
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+from models.metrics import metrics
+
+
+def erlang_c_wait(arrivals_per_hr: float, service_time_min: float, servers: int) -> float:
+    """Expected queueing delay Wq (minutes) of an M/M/c queue; inf when overloaded"""
+    servers = max(int(servers), 1)
+    if arrivals_per_hr <= 0 or service_time_min <= 0:
+        return 0.0
+    offered = arrivals_per_hr * service_time_min / 60.0   # a = lambda / mu, in Erlangs
+    if offered >= servers:
+        return float('inf')
+    # Erlang B by the stable recursion, then convert to Erlang C
+    erlang_b = 1.0
+    for k in range(1, servers + 1):
+        erlang_b = offered * erlang_b / (k + offered * erlang_b)
+    rho = offered / servers
+    erlang_c = erlang_b / (1 - rho + rho * erlang_b)
+    return erlang_c * service_time_min / (servers - offered)
+
+
+class FleetPlanner:
+    """Plans refuelling for many vehicles jointly.
+
+    Every vehicle's refuel points come from
+    ``ChargingStationCalculator.find_refuel_points``. Each point may use one
+    of the ``candidates`` nearest stations. A vehicle assigned to a station
+    in a time bucket adds ``1 / bucket_hours`` to that station's arrival rate
+    for the bucket, and the expected wait follows from Erlang C with the
+    station's server count.
+
+    Assignments are improved by iterative best response: each stop moves to
+    the station that minimises its detour plus wait, given everyone else.
+    This is a congestion game, so the process converges to an equilibrium in
+    a few sweeps.
+    """
+
+    def __init__(self, calculator, stations: List[Dict[str, Any]], candidates: int = 5,
+                 bucket_minutes: int = 30, avg_speed_kmh: float = 40.0, max_iterations: int = 20,
+                 overload_penalty_min: float = 240.0):
+        self.calculator = calculator
+        self.stations = [s for s in stations if s.get('lat') is not None and s.get('lng') is not None]
+        self.candidates = candidates
+        self.bucket_minutes = bucket_minutes
+        self.avg_speed_kmh = avg_speed_kmh
+        self.max_iterations = max_iterations
+        self.overload_penalty_min = overload_penalty_min
+
+        lats = np.array([s['lat'] for s in self.stations], dtype=float)
+        lngs = np.array([s['lng'] for s in self.stations], dtype=float)
+        self._ref_lat = float(np.mean(lats)) if len(lats) else 0.0
+        self._tree = cKDTree(self._project(lats, lngs)) if len(lats) else None
+
+    def _project(self, lats, lngs) -> np.ndarray:
+        k = 111.32  # km per degree
+        return np.column_stack([np.asarray(lngs) * k * math.cos(math.radians(self._ref_lat)),
+                                np.asarray(lats) * k])
+
+    def _base_rate(self, station: Dict[str, Any], hour: int) -> float:
+        """Background (non-fleet) arrivals per hour at a station for an hour of day"""
+        if 6 <= hour < 12:
+            return float(station.get('morning_arrivals') or station.get('overall_arrivals') or 0.0)
+        if 17 <= hour < 22:
+            return float(station.get('evening_arrivals') or station.get('overall_arrivals') or 0.0)
+        return float(station.get('overall_arrivals') or 0.0)
+
+    def _wait(self, station_idx: int, bucket: int, fleet_count: int, departure_hour: int) -> float:
+        station = self.stations[station_idx]
+        hour = (departure_hour + bucket * self.bucket_minutes // 60) % 24
+        rate = self._base_rate(station, hour) + fleet_count * 60.0 / self.bucket_minutes
+        service = float(station.get('service_time') or 5.0)
+        wait = erlang_c_wait(rate, service, station.get('servers', 1))
+        return self.overload_penalty_min if math.isinf(wait) else min(wait, self.overload_penalty_min)
+
+    @metrics.timed('fleet_plan')
+    def plan(self, vehicles: List[Dict[str, Any]], departure_hour: int = 8) -> Dict[str, Any]:
+        """Plan all vehicles.
+
+        ``vehicles``: ``[{'id', 'route': {'distance', 'coordinates'}, 'ev_specs', 'current_charge'}]``.
+        """
+        if self._tree is None:
+            raise ValueError("No stations available for fleet planning")
+
+        # 1. Refuel points of every vehicle (independent of station choice)
+        stops = []   # (vehicle_idx, point)
+        for v_idx, vehicle in enumerate(vehicles):
+            for point in self.calculator.find_refuel_points(
+                vehicle['route'], vehicle['ev_specs'], vehicle['current_charge']
+            ):
+                stops.append((v_idx, point))
+
+        if not stops:
+            return {'vehicles': [{'id': v.get('id'), 'stops': []} for v in vehicles],
+                    'iterations': 0, 'converged': True, 'total_expected_wait_min': 0.0}
+
+        # 2. Candidate stations and detours for all stops in one KD-tree query
+        k = min(self.candidates, len(self.stations))
+        point_xy = self._project([p['lat'] for _, p in stops], [p['lng'] for _, p in stops])
+        dist_km, cand_idx = self._tree.query(point_xy, k=k)
+        dist_km = np.asarray(dist_km).reshape(len(stops), k)
+        cand_idx = np.asarray(cand_idx).reshape(len(stops), k)
+        detour_min = 2 * dist_km / self.avg_speed_kmh * 60.0   # there and back to the route
+        buckets = [int(p['distance_from_start'] / self.avg_speed_kmh * 60.0 // self.bucket_minutes)
+                   for _, p in stops]
+
+        # 3. Start at the closest station, then iterate best responses
+        choice = [0] * len(stops)
+        load = defaultdict(int)   # (station_idx, bucket) -> fleet vehicles
+        for s_idx in range(len(stops)):
+            load[(int(cand_idx[s_idx, 0]), buckets[s_idx])] += 1
+
+        iterations, converged = 0, False
+        while iterations < self.max_iterations:
+            iterations += 1
+            moved = 0
+            for s_idx in range(len(stops)):
+                bucket = buckets[s_idx]
+                current = int(cand_idx[s_idx, choice[s_idx]])
+                load[(current, bucket)] -= 1
+                best_j, best_cost = choice[s_idx], float('inf')
+                for j in range(k):
+                    station_idx = int(cand_idx[s_idx, j])
+                    cost = detour_min[s_idx, j] + self._wait(
+                        station_idx, bucket, load[(station_idx, bucket)] + 1, departure_hour)
+                    if cost < best_cost - 1e-9:
+                        best_j, best_cost = j, cost
+                if best_j != choice[s_idx]:
+                    moved += 1
+                    choice[s_idx] = best_j
+                load[(int(cand_idx[s_idx, best_j]), bucket)] += 1
+            if moved == 0:
+                converged = True
+                break
+
+        # 4. Report final assignments with waits under the final loads
+        plans = [{'id': v.get('id', i), 'stops': []} for i, v in enumerate(vehicles)]
+        total_wait = 0.0
+        for s_idx, (v_idx, point) in enumerate(stops):
+            j = choice[s_idx]
+            station_idx = int(cand_idx[s_idx, j])
+            station = self.stations[station_idx]
+            fleet_count = load[(station_idx, buckets[s_idx])]
+            wait = self._wait(station_idx, buckets[s_idx], fleet_count, departure_hour)
+            total_wait += wait
+            plans[v_idx]['stops'].append({
+                'name': station.get('name', 'CNG Station'),
+                'lat': station['lat'],
+                'lng': station['lng'],
+                'arrivalFuel': round(point['arrival_charge'], 1),
+                'departureFuel': round(point['departure_charge'], 1),
+                'fillTime': point['charge_time'],
+                'distanceFromStart': round(point['distance_from_start'], 1),
+                'detourKm': round(float(2 * dist_km[s_idx, j]), 2),
+                'expectedWait': round(wait, 1),
+                'fleetVehiclesInSlot': fleet_count,
+                'servers': int(station.get('servers', 1))
+            })
+
+        return {
+            'vehicles': plans,
+            'iterations': iterations,
+            'converged': converged,
+            'total_expected_wait_min': round(total_wait, 1)
+        }
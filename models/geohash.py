@@ -0,0 +1,65 @@
+from typing import Dict, List, Tuple
+
+_BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+
+def encode(lat: float, lng: float, precision: int) -> str:
+    """Geohash of a point"""
+    lat_lo, lat_hi, lng_lo, lng_hi = -90.0, 90.0, -180.0, 180.0
+    chars, bits, value, even = [], 0, 0, True
+    while len(chars) < precision:
+        if even:
+            mid = (lng_lo + lng_hi) / 2
+            value = value * 2 + (lng >= mid)
+            lng_lo, lng_hi = (mid, lng_hi) if lng >= mid else (lng_lo, mid)
+        else:
+            mid = (lat_lo + lat_hi) / 2
+            value = value * 2 + (lat >= mid)
+            lat_lo, lat_hi = (mid, lat_hi) if lat >= mid else (lat_lo, mid)
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(_BASE32[value])
+            bits, value = 0, 0
+    return ''.join(chars)
+
+
+def cell_size(precision: int) -> Tuple[float, float]:
+    """(height, width) of a cell in degrees"""
+    total_bits = 5 * precision
+    lng_bits = (total_bits + 1) // 2
+    lat_bits = total_bits // 2
+    return 180.0 / (1 << lat_bits), 360.0 / (1 << lng_bits)
+
+
+def cell_bounds(geohash: str) -> Dict[str, float]:
+    """Bbox of a geohash cell"""
+    lat_lo, lat_hi, lng_lo, lng_hi = -90.0, 90.0, -180.0, 180.0
+    even = True
+    for ch in geohash:
+        value = _BASE32.index(ch)
+        for shift in range(4, -1, -1):
+            bit = (value >> shift) & 1
+            if even:
+                mid = (lng_lo + lng_hi) / 2
+                lng_lo, lng_hi = (mid, lng_hi) if bit else (lng_lo, mid)
+            else:
+                mid = (lat_lo + lat_hi) / 2
+                lat_lo, lat_hi = (mid, lat_hi) if bit else (lat_lo, mid)
+            even = not even
+    return {'min_lat': lat_lo, 'max_lat': lat_hi, 'min_lng': lng_lo, 'max_lng': lng_hi}
+
+
+def cells_in_bbox(bbox: Dict[str, float], precision: int) -> List[str]:
+    """Every geohash cell of ``precision`` that intersects a bbox"""
+    height, width = cell_size(precision)
+    # Snap to the cell grid so each cell is visited once, sampling cell centres
+    lat = (int((bbox['min_lat'] + 90.0) // height) + 0.5) * height - 90.0
+    cells = []
+    while lat - height / 2 <= bbox['max_lat'] and lat < 90.0:
+        lng = (int((bbox['min_lng'] + 180.0) // width) + 0.5) * width - 180.0
+        while lng - width / 2 <= bbox['max_lng'] and lng < 180.0:
+            cells.append(encode(lat, lng, precision))
+            lng += width
+        lat += height
+    return cells
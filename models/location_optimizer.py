@@ -5,10 +5,22 @@ from scipy.optimize import minimize
 from sklearn.cluster import KMeans
 from sklearn.preprocessing import StandardScaler
 import math
-from typing import List, Dict, Tuple, Optional
+from typing import Callable, List, Dict, Tuple, Optional
 import os
+import threading
+from models.metrics import metrics
 
 class LocationOptimizer:
+    # Economic viability multipliers per area type
+    AREA_MULTIPLIERS = {
+        'Market': 1.2,
+        'Office': 1.0,
+        'Factory': 0.9,
+        'Hospital': 1.1,
+        'School': 0.8,
+        'Residential': 0.7
+    }
+
     def __init__(self, data_file_path: str = None):
         """Initialize the location optimizer with CNG station data"""
         self.area_types = ["Market", "Office", "Residential", "School", "Factory", "Hospital"]
@@ -202,16 +214,7 @@ class LocationOptimizer:
         avg_demand = np.mean([s['overall_arrivals'] for s in nearby_stations])
         
         # Area type multipliers
-        area_multipliers = {
-            'Market': 1.2,
-            'Office': 1.0,
-            'Factory': 0.9,
-            'Hospital': 1.1,
-            'School': 0.8,
-            'Residential': 0.7
-        }
-        
-        area_multiplier = area_multipliers.get(area_type, 1.0)
+        area_multiplier = self.AREA_MULTIPLIERS.get(area_type, 1.0)
         
         # Economic viability score
         viability_score = (avg_utilization * 0.6 + avg_demand / 20.0 * 0.4) * area_multiplier
@@ -288,22 +291,27 @@ class LocationOptimizer:
         else:
             return 'Office'  # Default
     
+    @metrics.timed('optimize_station_locations')
     def optimize_station_locations(self, center_lat: float, center_lng: float, 
                                  radius_km: float = 10.0, num_stations: int = 3,
-                                 time_info: Dict = None) -> List[Dict]:
-        """Main optimization method to find best locations for new CNG stations"""
+                                 time_info: Dict = None,
+                                 progress: Optional[Callable[[int, int], None]] = None) -> List[Dict]:
+        """Main optimization method to find best locations for new CNG stations.
+        ``progress(done, total)`` is called after each scored candidate.
+        """
         if time_info is None:
             time_info = {'is_weekend': False, 'time_of_day': 'afternoon'}
         
         # Generate candidate locations
-        candidates = self.generate_candidate_locations(center_lat, center_lng, radius_km)
+        with metrics.span('candidate_generation'):
+            candidates = self.generate_candidate_locations(center_lat, center_lng, radius_km)
         
         if not candidates:
             return []
         
         # Score each candidate
         scored_candidates = []
-        for candidate in candidates:
+        for done, candidate in enumerate(candidates, 1):
             lat, lng = candidate['lat'], candidate['lng']
             area_type = candidate['area_type']
             
@@ -332,13 +340,19 @@ class LocationOptimizer:
                 'competition_score': competition_score,
                 'distance_from_center': candidate['distance_from_center']
             })
+            if progress is not None:
+                progress(done, len(candidates))
         
+        return self._select_spaced(scored_candidates, num_stations)
+
+    def _select_spaced(self, scored_candidates: List[Dict], num_stations: int,
+                       min_distance_km: float = 2.0) -> List[Dict]:
+        """Best-scoring candidates, keeping a minimum distance between the picks"""
         # Sort by total score
         scored_candidates.sort(key=lambda x: x['total_score'], reverse=True)
         
         # Apply minimum distance constraint between selected stations
         selected_stations = []
-        min_distance_km = 2.0  # Minimum 2km between stations
         
         for candidate in scored_candidates:
             # Check if this candidate is far enough from already selected stations
@@ -359,6 +373,15 @@ class LocationOptimizer:
         
         return selected_stations
     
+    def start_scenario(self, center_lat: float, center_lng: float, radius_km: float = 10.0,
+                       time_info: Dict = None) -> 'LocationScenario':
+        """Score an area once and keep the per-candidate sums for what-if edits"""
+        if time_info is None:
+            time_info = {'is_weekend': False, 'time_of_day': 'afternoon'}
+        with metrics.span('candidate_generation'):
+            candidates = self.generate_candidate_locations(center_lat, center_lng, radius_km)
+        return LocationScenario(self, candidates, self.existing_stations, time_info)
+
     def _haversine_distance(self, lat1: float, lng1: float, lat2: float, lng2: float) -> float:
         """Calculate distance between two points using Haversine formula"""
         R = 6371.0  # Earth's radius in kilometers
@@ -395,4 +418,207 @@ class LocationOptimizer:
             center_lng = np.mean([c['lng'] for c in candidates])
             return self.optimize_station_locations(center_lat, center_lng, time_info=time_info)
         
-        return [] 
\ No newline at end of file
+        return [] 
+
+
+class LocationScenario:
+    """What-if state for one optimization area.
+
+    For every candidate it keeps the sums the scores are built from: weighted
+    demand/utilization/wait within 5 km, utilization and demand within 10 km,
+    the station count within 3 km and the nearest station. Adding or removing
+    a station only updates the candidates within 10 km of it (plus those
+    whose nearest station changed), so an edit costs O(candidates) instead of
+    a full re-score against every station.
+    """
+
+    DEMAND_RADIUS_KM = 5.0
+    ECONOMIC_RADIUS_KM = 10.0
+    COMPETITION_RADIUS_KM = 3.0
+
+    def __init__(self, optimizer: LocationOptimizer, candidates: List[Dict], stations: List[Dict],
+                 time_info: Dict):
+        self.optimizer = optimizer
+        self.candidates = candidates
+        self.time_info = time_info
+        self.cand_lat = np.array([c['lat'] for c in candidates], dtype=float)
+        self.cand_lng = np.array([c['lng'] for c in candidates], dtype=float)
+        self.stations = {}   # station_id -> station
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self._defaults = self._station_defaults(stations)
+
+        n = len(candidates)
+        self.demand_w = np.zeros(n)
+        self.util_w = np.zeros(n)
+        self.wait_w = np.zeros(n)
+        self.inf_waits = np.zeros(n, dtype=np.int64)   # nearby stations with an unbounded wait
+        self.count_demand = np.zeros(n, dtype=np.int64)
+        self.econ_util = np.zeros(n)
+        self.econ_demand = np.zeros(n)
+        self.count_econ = np.zeros(n, dtype=np.int64)
+        self.count_competition = np.zeros(n, dtype=np.int64)
+        self.nearest_km = np.full(n, np.inf)
+        self.nearest_id = np.full(n, -1, dtype=np.int64)
+        self.scores = {k: np.zeros(n) for k in ('total_score', 'demand_score', 'accessibility_score',
+                                               'economic_score', 'competition_score')}
+
+        for station in stations:
+            station_id = self._register(station)
+            self._apply(station_id, +1)
+        self._rescore(np.arange(n))
+
+    def __getstate__(self):
+        # Scenarios are pickled by ScenarioStore; the lock is per process
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _station_defaults(stations: List[Dict]) -> Dict:
+        """Typical values for fields a hypothetical station does not specify"""
+        keys = ('morning_arrivals', 'evening_arrivals', 'overall_arrivals', 'utilization')
+        defaults = {k: float(np.median([s[k] for s in stations])) if stations else 0.0 for k in keys}
+        defaults.update({'wait_time_morning': 0.0, 'wait_time_evening': 0.0, 'wait_time_overall': 0.0})
+        return defaults
+
+    def _register(self, station: Dict) -> int:
+        station_id = self._next_id
+        self._next_id += 1
+        self.stations[station_id] = station
+        return station_id
+
+    def _distances(self, lat: float, lng: float) -> np.ndarray:
+        lat1, lng1 = math.radians(lat), math.radians(lng)
+        lat2, lng2 = np.radians(self.cand_lat), np.radians(self.cand_lng)
+        a = np.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+        return 2 * 6371.0 * np.arcsin(np.sqrt(a))
+
+    def _demand_and_wait(self, station: Dict) -> Tuple[float, float]:
+        if self.time_info['time_of_day'] == 'morning':
+            return station['morning_arrivals'], station['wait_time_morning']
+        if self.time_info['time_of_day'] == 'evening':
+            return station['evening_arrivals'], station['wait_time_evening']
+        return station['overall_arrivals'], station['wait_time_overall']
+
+    def _apply(self, station_id: int, sign: int) -> np.ndarray:
+        """Add (sign=+1) or subtract (-1) a station's contribution; returns affected candidates"""
+        station = self.stations[station_id]
+        dist = self._distances(station['lat'], station['lng'])
+        affected = np.flatnonzero(dist <= self.ECONOMIC_RADIUS_KM)
+
+        near = affected[dist[affected] <= self.DEMAND_RADIUS_KM]
+        weight = 1.0 / (dist[near] + 0.1)
+        demand, wait = self._demand_and_wait(station)
+        self.demand_w[near] += sign * weight * demand
+        self.util_w[near] += sign * weight * station['utilization']
+        if math.isinf(wait):
+            self.inf_waits[near] += sign
+        else:
+            self.wait_w[near] += sign * weight * wait
+        self.count_demand[near] += sign
+
+        self.econ_util[affected] += sign * station['utilization']
+        self.econ_demand[affected] += sign * station['overall_arrivals']
+        self.count_econ[affected] += sign
+        self.count_competition[affected[dist[affected] <= self.COMPETITION_RADIUS_KM]] += sign
+
+        # Clear rounding residue once no station contributes any more
+        if sign < 0:
+            empty = near[self.count_demand[near] == 0]
+            self.demand_w[empty] = self.util_w[empty] = self.wait_w[empty] = 0.0
+            empty = affected[self.count_econ[affected] == 0]
+            self.econ_util[empty] = self.econ_demand[empty] = 0.0
+
+        if sign > 0:
+            closer = np.flatnonzero(dist < self.nearest_km)
+            self.nearest_km[closer] = dist[closer]
+            self.nearest_id[closer] = station_id
+        else:
+            closer = np.flatnonzero(self.nearest_id == station_id)
+            self.nearest_km[closer] = np.inf
+            self.nearest_id[closer] = -1
+            for other_id, other in self.stations.items():
+                if other_id == station_id:
+                    continue
+                d = self._distances(other['lat'], other['lng'])[closer]
+                better = d < self.nearest_km[closer]
+                self.nearest_km[closer[better]] = d[better]
+                self.nearest_id[closer[better]] = other_id
+        return np.union1d(affected, closer)
+
+    def _rescore(self, idx: np.ndarray):
+        """Recompute the scores of candidates ``idx`` from the running sums"""
+        if not len(idx):
+            return
+        has_stations = len(self.stations) > 0
+
+        count = self.count_demand[idx]
+        safe = np.maximum(count, 1)
+        demand_part = np.minimum(self.demand_w[idx] / safe / 20.0, 1.0)
+        wait_part = np.where(self.inf_waits[idx] > 0, 1.0, np.minimum(self.wait_w[idx] / safe / 30.0, 1.0))
+        demand = np.minimum(0.4 * demand_part + 0.3 * self.util_w[idx] / safe + 0.3 * wait_part, 1.0)
+        demand = np.where(count > 0, demand, 0.3) if has_stations else np.full(len(idx), 0.5)
+
+        nearest = self.nearest_km[idx]
+        access = np.where(nearest < 2.0, 0.2,
+                          np.where(nearest <= 5.0, 1.0, np.maximum(0.1, 1.0 - (nearest - 5.0) / 10.0)))
+        access = access if has_stations else np.full(len(idx), 0.5)
+
+        count = self.count_econ[idx]
+        safe = np.maximum(count, 1)
+        multipliers = np.array([self.optimizer.AREA_MULTIPLIERS.get(self.candidates[i]['area_type'], 1.0)
+                                for i in idx.tolist()])
+        economic = np.minimum((self.econ_util[idx] / safe * 0.6 + self.econ_demand[idx] / safe / 20.0 * 0.4)
+                              * multipliers, 1.0)
+        economic = np.where(count > 0, economic, 0.3) if has_stations else np.full(len(idx), 0.5)
+
+        count = self.count_competition[idx]
+        competition = np.select([count == 0, count == 1, count == 2],
+                                [1.0, 0.8, 0.5], np.maximum(0.1, 1.0 - (count - 2) * 0.2))
+
+        self.scores['demand_score'][idx] = demand
+        self.scores['accessibility_score'][idx] = access
+        self.scores['economic_score'][idx] = economic
+        self.scores['competition_score'][idx] = competition
+        self.scores['total_score'][idx] = 0.3 * demand + 0.25 * access + 0.25 * economic + 0.2 * competition
+
+    def add_station(self, station: Dict) -> Tuple[int, int]:
+        """Add a (hypothetical) station; returns (station_id, candidates re-scored)"""
+        station = dict(self._defaults, **station)
+        with self._lock:
+            station_id = self._register(station)
+            affected = self._apply(station_id, +1)
+            self._rescore(affected)
+        return station_id, len(affected)
+
+    def remove_station(self, station_id: int) -> int:
+        """Remove a station by id; returns the number of candidates re-scored"""
+        with self._lock:
+            if station_id not in self.stations:
+                raise KeyError(f"Unknown station id: {station_id}")
+            affected = self._apply(station_id, -1)
+            del self.stations[station_id]
+            self._rescore(affected)
+        return len(affected)
+
+    def stations_near(self, lat: float, lng: float, radius_km: float) -> List[Dict]:
+        """Ids and positions of scenario stations around a point, for removal in the UI"""
+        with self._lock:
+            return [{'id': station_id, 'name': s.get('name', 'CNG Station'), 'lat': s['lat'], 'lng': s['lng']}
+                    for station_id, s in self.stations.items()
+                    if self.optimizer._haversine_distance(lat, lng, s['lat'], s['lng']) <= radius_km]
+
+    def results(self, num_stations: int = 3) -> List[Dict]:
+        """Current best locations, in the format of optimize_station_locations"""
+        with self._lock:
+            scored = [dict(
+                lat=c['lat'], lng=c['lng'], area_type=c['area_type'],
+                distance_from_center=c['distance_from_center'],
+                **{k: float(v[i]) for k, v in self.scores.items()}
+            ) for i, c in enumerate(self.candidates)]
+        return self.optimizer._select_spaced(scored, num_stations)
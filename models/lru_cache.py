@@ -0,0 +1,70 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+from models.metrics import metrics
+
+
+class LRUCache:
+    """Thread-safe LRU cache bounded by entry count and total size in bytes.
+
+    Entries expire ``ttl`` seconds after they were stored. Callers pass the
+    version of the data the value was computed from (e.g. the station
+    snapshot version). When a different version is seen, the whole cache is
+    dropped at once, so no entry built from old data is ever served.
+    """
+
+    def __init__(self, name: str, max_bytes: int = 32 * 1024 * 1024, max_entries: int = 10000,
+                 ttl: float = 3600.0):
+        self.name = name
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.version = None
+        self.bytes = 0
+        self._entries = OrderedDict()   # key -> (value, size, expires_at)
+        self._lock = threading.Lock()
+
+    def _check_version(self, version):
+        if version != self.version:
+            self._entries.clear()
+            self.bytes = 0
+            self.version = version
+
+    def get(self, key: Hashable, version: Any = None) -> Optional[Any]:
+        with self._lock:
+            self._check_version(version)
+            entry = self._entries.get(key)
+            if entry is not None and entry[2] < time.monotonic():
+                del self._entries[key]
+                self.bytes -= entry[1]
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+        metrics.cache_result(self.name, entry is not None)
+        return entry[0] if entry is not None else None
+
+    def put(self, key: Hashable, value: Any, size: int, version: Any = None):
+        """Store ``value``; ``size`` is its approximate footprint in bytes"""
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            self._check_version(version)
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.bytes -= old[1]
+            self._entries[key] = (value, size, time.monotonic() + self.ttl)
+            self.bytes += size
+            while self.bytes > self.max_bytes or len(self._entries) > self.max_entries:
+                _, (_, evicted_size, _) = self._entries.popitem(last=False)
+                self.bytes -= evicted_size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
@@ -0,0 +1,176 @@
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager, nullcontext
+from functools import wraps
+from typing import Dict, Tuple
+
+# Latency buckets in seconds (upper bounds), Prometheus style
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+                   0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_NOOP = nullcontext()
+
+
+def _label_key(labels: Dict) -> Tuple:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(key: Tuple, extra: Dict = None) -> str:
+    pairs = list(key) + sorted((extra or {}).items())
+    if not pairs:
+        return ''
+    body = ','.join('{}="{}"'.format(k, str(v).replace('\\', '\\\\').replace('"', '\\"')) for k, v in pairs)
+    return '{' + body + '}'
+
+
+class _Histogram:
+    __slots__ = ('counts', 'total', 'count')
+
+    def __init__(self, n_buckets: int):
+        self.counts = [0] * (n_buckets + 1)  # last slot is +Inf
+        self.total = 0.0
+        self.count = 0
+
+
+class MetricsRegistry:
+    """In-process histograms, counters and gauges rendered in Prometheus text format.
+
+    Kept dependency-free so instrumentation costs one perf_counter pair and a
+    locked list increment per span. When disabled every span is a shared
+    no-op context manager.
+    """
+
+    def __init__(self, enabled: bool = True, buckets: Tuple = DEFAULT_BUCKETS):
+        self.enabled = enabled
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._histograms = {}   # name -> {label_key: _Histogram}
+        self._counters = {}     # name -> {label_key: float}
+        self._gauges = {}       # name -> {label_key: float}
+        self._help = {}
+
+    # ------------------------------------------------------------------
+    # Recording
+    # ------------------------------------------------------------------
+    def describe(self, name: str, help_text: str):
+        self._help[name] = help_text
+
+    def observe(self, name: str, value: float, **labels):
+        """Add one observation (seconds) to a histogram"""
+        if not self.enabled:
+            return
+        key = _label_key(labels)
+        idx = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            hist = series.get(key)
+            if hist is None:
+                hist = series[key] = _Histogram(len(self.buckets))
+            hist.counts[idx] += 1
+            hist.total += value
+            hist.count += 1
+
+    def inc(self, name: str, amount: float = 1.0, **labels):
+        if not self.enabled:
+            return
+        key = _label_key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + amount
+
+    def set_gauge(self, name: str, value: float, **labels):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._gauges.setdefault(name, {})[_label_key(labels)] = float(value)
+
+    def span(self, stage: str):
+        """Context manager timing one stage into quickfill_stage_seconds{stage=...}"""
+        if not self.enabled:
+            return _NOOP
+        return self._span(stage)
+
+    @contextmanager
+    def _span(self, stage: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe('quickfill_stage_seconds', time.perf_counter() - start, stage=stage)
+
+    def timed(self, stage: str):
+        """Decorator form of span()"""
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                with self._span(stage):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def cache_result(self, cache: str, hit: bool):
+        """Count a cache lookup; the hit ratio gauge is derived at render time"""
+        self.inc('quickfill_cache_requests_total', cache=cache, result='hit' if hit else 'miss')
+
+    # ------------------------------------------------------------------
+    # Exposition
+    # ------------------------------------------------------------------
+    def _cache_hit_ratios(self) -> Dict:
+        totals = {}
+        for key, value in self._counters.get('quickfill_cache_requests_total', {}).items():
+            labels = dict(key)
+            hits, total = totals.get(labels['cache'], (0.0, 0.0))
+            totals[labels['cache']] = (hits + (value if labels['result'] == 'hit' else 0.0), total + value)
+        return {(('cache', cache),): hits / total for cache, (hits, total) in totals.items() if total}
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)"""
+        lines = []
+        with self._lock:
+            for name, series in sorted(self._histograms.items()):
+                lines.append(f'# HELP {name} {self._help.get(name, name)}')
+                lines.append(f'# TYPE {name} histogram')
+                for key, hist in sorted(series.items()):
+                    cumulative = 0
+                    for bound, count in zip(self.buckets, hist.counts):
+                        cumulative += count
+                        lines.append(f'{name}_bucket{_format_labels(key, {"le": repr(bound)})} {cumulative}')
+                    lines.append(f'{name}_bucket{_format_labels(key, {"le": "+Inf"})} {hist.count}')
+                    lines.append(f'{name}_sum{_format_labels(key)} {hist.total}')
+                    lines.append(f'{name}_count{_format_labels(key)} {hist.count}')
+
+            for name, series in sorted(self._counters.items()):
+                lines.append(f'# HELP {name} {self._help.get(name, name)}')
+                lines.append(f'# TYPE {name} counter')
+                for key, value in sorted(series.items()):
+                    lines.append(f'{name}{_format_labels(key)} {value}')
+
+            gauges = dict(self._gauges)
+            ratios = self._cache_hit_ratios()
+            if ratios:
+                gauges['quickfill_cache_hit_ratio'] = ratios
+            for name, series in sorted(gauges.items()):
+                lines.append(f'# HELP {name} {self._help.get(name, name)}')
+                lines.append(f'# TYPE {name} gauge')
+                for key, value in sorted(series.items()):
+                    lines.append(f'{name}{_format_labels(key)} {value}')
+        return '\n'.join(lines) + '\n'
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+            self._gauges.clear()
+
+
+# Process-wide registry; QUICKFILL_METRICS=0 turns every span into a no-op
+metrics = MetricsRegistry(enabled=os.environ.get('QUICKFILL_METRICS', '1') != '0')
+metrics.describe('quickfill_request_seconds', 'Time spent handling each request, by Flask endpoint')
+metrics.describe('quickfill_stage_seconds', 'Time spent in each request/model stage')
+metrics.describe('quickfill_cache_requests_total', 'Cache lookups by cache and result')
+metrics.describe('quickfill_cache_hit_ratio', 'Fraction of cache lookups that hit since start')
+metrics.describe('quickfill_model_load_seconds', 'Time taken to load or train each model/index')
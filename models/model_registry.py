@@ -0,0 +1,74 @@
+import json
+import os
+import time
+from typing import Dict, List, Optional, Tuple
+
+import joblib
+
+
+class ModelRegistry:
+    """Local, file-based model registry.
+
+    Layout::
+
+        <root>/<name>/<version>/model.joblib     pickled {'scaler': .., 'model': ..}
+        <root>/<name>/<version>/metadata.json    metrics, params, training info
+        <root>/<name>/LATEST                     version of the current winner
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def _name_dir(self, name: str) -> str:
+        return os.path.join(self.root, name)
+
+    def versions(self, name: str) -> List[str]:
+        path = self._name_dir(name)
+        if not os.path.isdir(path):
+            return []
+        return sorted(d for d in os.listdir(path) if os.path.isdir(os.path.join(path, d)))
+
+    def latest_version(self, name: str) -> Optional[str]:
+        try:
+            with open(os.path.join(self._name_dir(name), 'LATEST'), 'r', encoding='utf-8') as f:
+                return f.read().strip() or None
+        except OSError:
+            return None
+
+    def register(self, name: str, bundle: Dict, metadata: Dict, make_latest: bool = True) -> str:
+        """Store a model bundle with its metadata and return the new version"""
+        existing = self.versions(name)
+        version = f"v{len(existing) + 1:04d}"
+        version_dir = os.path.join(self._name_dir(name), version)
+        os.makedirs(version_dir, exist_ok=False)
+
+        model_path = os.path.join(version_dir, 'model.joblib')
+        joblib.dump(bundle, model_path)
+        metadata = dict(metadata)
+        metadata.update({
+            'name': name,
+            'version': version,
+            'registered_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'size_bytes': os.path.getsize(model_path),
+        })
+        with open(os.path.join(version_dir, 'metadata.json'), 'w', encoding='utf-8') as f:
+            json.dump(metadata, f, indent=2, default=str)
+
+        if make_latest:
+            latest_path = os.path.join(self._name_dir(name), 'LATEST')
+            tmp_path = latest_path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(version)
+            os.replace(tmp_path, latest_path)
+        return version
+
+    def load(self, name: str, version: str = None) -> Tuple[Dict, Dict]:
+        """Return (bundle, metadata) for a version, defaulting to LATEST"""
+        version = version or self.latest_version(name)
+        if version is None:
+            raise FileNotFoundError(f"No registered versions of '{name}' in {self.root}")
+        version_dir = os.path.join(self._name_dir(name), version)
+        bundle = joblib.load(os.path.join(version_dir, 'model.joblib'))
+        with open(os.path.join(version_dir, 'metadata.json'), 'r', encoding='utf-8') as f:
+            metadata = json.load(f)
+        return bundle, metadata
@@ -0,0 +1,222 @@
+import hashlib
+import json
+import multiprocessing
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from models.location_optimizer import LocationOptimizer
+
+FINISHED = ('done', 'failed')
+
+# Per worker process: the optimizer of the last job's station files, keyed by
+# their (path, mtime) pairs, plus recently parsed files so neighbouring jobs
+# that share shards do not parse them again
+_worker_state = {'key': None, 'optimizer': None}
+_worker_files = OrderedDict()   # path -> (mtime, stations)
+WORKER_FILE_CACHE = 32
+
+
+def _write_json_atomic(path: str, data: Dict):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, default=str)
+    os.replace(tmp_path, path)
+
+
+def _file_stations(path: str, mtime: float) -> List[Dict]:
+    cached = _worker_files.get(path)
+    if cached is None or cached[0] != mtime:
+        cached = (mtime, LocationOptimizer(path).existing_stations)
+        _worker_files[path] = cached
+        while len(_worker_files) > WORKER_FILE_CACHE:
+            _worker_files.popitem(last=False)
+    _worker_files.move_to_end(path)
+    return cached[1]
+
+
+def _worker_optimizer(station_files: List[Tuple[str, float]]) -> LocationOptimizer:
+    key = tuple(station_files)
+    if _worker_state['optimizer'] is None or _worker_state['key'] != key:
+        optimizer = LocationOptimizer()
+        optimizer.existing_stations = [s for path, mtime in station_files for s in _file_stations(path, mtime)]
+        _worker_state['optimizer'] = optimizer
+        _worker_state['key'] = key
+    return _worker_state['optimizer']
+
+
+def _run_job(status_path: str, station_files: List[Tuple[str, float]], status: Dict):
+    """Runs in a pool process; reports progress by rewriting the job's status file"""
+    params = status['params']
+    try:
+        optimizer = _worker_optimizer(station_files)
+        # Candidate area types are drawn at random; seed from the job id so a
+        # job's result does not depend on which worker ran it
+        np.random.seed(int(status['job_id'][:8], 16))
+        status.update(status='running', progress=0.0, started_at=time.time(), updated_at=time.time())
+        _write_json_atomic(status_path, status)
+
+        last_write = [time.monotonic()]
+
+        def report(done, total):
+            if done < total and time.monotonic() - last_write[0] < 0.5:
+                return
+            last_write[0] = time.monotonic()
+            status.update(progress=round(done / total, 3), updated_at=time.time())
+            _write_json_atomic(status_path, status)
+
+        result = optimizer.optimize_station_locations(
+            params['lat'], params['lng'], radius_km=params['radius'], num_stations=params['num_stations'],
+            time_info={'is_weekend': params['is_weekend'], 'time_of_day': params['time_of_day']},
+            progress=report
+        )
+        status.update(status='done', progress=1.0, result=result)
+    except Exception as e:
+        status.update(status='failed', error=str(e))
+    status['updated_at'] = status['finished_at'] = time.time()
+    _write_json_atomic(status_path, status)
+
+
+class OptimizationJobs:
+    """Runs location optimizations as background jobs on a process pool.
+
+    ``station_files(params)`` names the station CSVs a job reads: the app
+    passes the shard files around the job's area, or the current snapshot's
+    file. A job's id is a hash of its normalised parameters and those files'
+    mtimes. Its status (queued/running/done/failed, progress, result) is a JSON
+    file in ``job_dir``. That makes identical submissions share one job and
+    cache its result for ``ttl`` seconds. It also lets any web worker
+    process answer a poll, not just the one that accepted the job.
+    """
+
+    def __init__(self, job_dir: str, station_files: Optional[Callable[[Dict], List[str]]] = None,
+                 max_workers: int = 2, ttl: float = 3600.0, stale_after: float = 600.0):
+        self.job_dir = job_dir
+        self.station_files = station_files
+        self.max_workers = max_workers
+        self.ttl = ttl
+        self.stale_after = stale_after   # running jobs silent this long are presumed lost
+        self._pool = None
+        self._lock = threading.Lock()
+        self._last_purge = 0.0
+        os.makedirs(job_dir, exist_ok=True)
+
+    @staticmethod
+    def normalise(params: Dict) -> Dict:
+        """Canonical parameters; raises ValueError/KeyError/TypeError on bad input"""
+        radius = float(params.get('radius', 10.0))
+        num_stations = int(params.get('num_stations', 3))
+        if not 0 < radius <= 100:
+            raise ValueError('radius must be in (0, 100] km')
+        if not 0 < num_stations <= 50:
+            raise ValueError('num_stations must be in 1..50')
+        return {
+            'lat': round(float(params['lat']), 5),
+            'lng': round(float(params['lng']), 5),
+            'radius': radius,
+            'num_stations': num_stations,
+            'time_of_day': str(params.get('time_of_day', 'afternoon')),
+            'is_weekend': bool(params.get('is_weekend', False)),
+        }
+
+    def files_for(self, params: Dict) -> List[Tuple[str, float]]:
+        """(path, mtime) of the existing station files for a job"""
+        files = []
+        for path in (self.station_files(params) if self.station_files else []):
+            try:
+                files.append((path, os.path.getmtime(path)))
+            except OSError:
+                pass
+        return files
+
+    def job_id(self, params: Dict, files: List[Tuple[str, float]]) -> str:
+        payload = json.dumps({'params': params, 'stations': files}, sort_keys=True)
+        return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:16]
+
+    def _path(self, job_id: str) -> str:
+        return os.path.join(self.job_dir, f"{job_id}.json")
+
+    def _executor(self) -> ProcessPoolExecutor:
+        # Created on first use, i.e. inside the serving process rather than a
+        # preloading master; 'spawn' avoids forking a threaded web server
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers,
+                                             mp_context=multiprocessing.get_context('spawn'))
+        return self._pool
+
+    def status(self, job_id: str) -> Optional[Dict]:
+        if not all(c in '0123456789abcdef' for c in job_id):
+            return None
+        try:
+            with open(self._path(job_id), 'r', encoding='utf-8') as f:
+                status = json.load(f)
+        except (OSError, ValueError):
+            return None
+        # Queued jobs may wait behind long ones, so only the TTL bounds them
+        silent = time.time() - status['updated_at']
+        if ((status['status'] == 'running' and silent > self.stale_after) or
+                (status['status'] == 'queued' and silent > self.ttl)):
+            status.update(status='failed', error='Job was lost (worker restarted); submit it again')
+        return status
+
+    def submit(self, params: Dict) -> Dict:
+        """Start a job for ``params`` or return the matching live/cached one"""
+        params = self.normalise(params)
+        files = self.files_for(params)
+        job_id = self.job_id(params, files)
+        with self._lock:
+            current = self.status(job_id)
+            if current is not None:
+                fresh = current['status'] == 'done' and time.time() - current['updated_at'] < self.ttl
+                if fresh or current['status'] not in FINISHED:
+                    current['cached'] = current['status'] == 'done'
+                    return current
+
+            now = time.time()
+            if now - self._last_purge > self.ttl:
+                self._last_purge = now
+                self.purge()
+            status = {'job_id': job_id, 'status': 'queued', 'progress': 0.0, 'params': params,
+                      'submitted_at': now, 'updated_at': now}
+            _write_json_atomic(self._path(job_id), status)
+            future = self._executor().submit(_run_job, self._path(job_id), files, dict(status))
+            future.add_done_callback(lambda f, s=dict(status): self._on_done(f, s))
+        return status
+
+    def _on_done(self, future, status: Dict):
+        """Record failures that never reached the worker function (e.g. a dead pool)"""
+        error = future.exception()
+        if error is None:
+            return
+        print(f"Optimization job {status['job_id']} failed: {error}")
+        status.update(status='failed', error=str(error), updated_at=time.time())
+        _write_json_atomic(self._path(status['job_id']), status)
+
+    def wait(self, job_id: str, timeout: float, poll_interval: float = 0.2) -> Optional[Dict]:
+        """Poll until the job finishes or ``timeout`` seconds pass"""
+        deadline = time.monotonic() + timeout
+        status = self.status(job_id)
+        while status is not None and status['status'] not in FINISHED and time.monotonic() < deadline:
+            time.sleep(poll_interval)
+            status = self.status(job_id)
+        return status
+
+    def purge(self) -> int:
+        """Delete finished jobs older than the TTL; returns how many were removed"""
+        removed = 0
+        for name in os.listdir(self.job_dir):
+            if not name.endswith('.json'):
+                continue
+            status = self.status(name[:-5])
+            if status and status['status'] in FINISHED and time.time() - status['updated_at'] > self.ttl:
+                try:
+                    os.remove(self._path(name[:-5]))
+                    removed += 1
+                except OSError:
+                    pass
+        return removed
@@ -0,0 +1,213 @@
+import json
+import math
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from models.metrics import metrics
+
+
+DEFAULT_OVERPASS_URL = "http://overpass-api.de/api/interpreter"
+
+
+class OverpassClient:
+    """Tile-cached Overpass API client for fuel stations.
+
+    Queries are snapped to fixed lat/lng tiles so that overlapping requests
+    share work. Each tile response is cached on disk with a TTL, missing
+    tiles are fetched concurrently over a pooled ``requests.Session`` and
+    concurrent requests for the same tile are collapsed into one download.
+    """
+
+    TILE_QUERY = """
+    [out:json][timeout:{timeout}];
+    (
+        node["amenity"="fuel"]({south},{west},{north},{east});
+        way["amenity"="fuel"]({south},{west},{north},{east});
+    );
+    out body;
+    >;
+    out skel qt;
+    """
+
+    def __init__(self, base_url: str = None, cache_dir: str = None,
+                 tile_size_deg: float = 0.05, ttl_seconds: int = 24 * 3600,
+                 max_workers: int = 4, timeout: float = 30.0):
+        self.base_url = base_url or os.environ.get('OVERPASS_URL', DEFAULT_OVERPASS_URL)
+        self.cache_dir = cache_dir or os.environ.get(
+            'OVERPASS_CACHE_DIR',
+            os.path.join(os.path.dirname(os.path.dirname(__file__)), '.cache', 'overpass')
+        )
+        self.tile_size_deg = tile_size_deg
+        self.ttl_seconds = ttl_seconds
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.stats = {'tile_hits': 0, 'tile_misses': 0, 'tile_errors': 0}
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=max_workers,
+            pool_maxsize=max_workers,
+            max_retries=Retry(total=2, backoff_factor=1.0,
+                              status_forcelist=(429, 502, 503, 504),
+                              allowed_methods=frozenset(['GET', 'POST']))
+        )
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        self._stats_lock = threading.Lock()
+        self._tile_locks = {}   # tile -> [lock, users]; dropped when the last user leaves
+        self._locks_guard = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Tiling
+    # ------------------------------------------------------------------
+    def tiles_for_radius(self, lat: float, lng: float, radius_m: float) -> List[Tuple[int, int]]:
+        """Return (row, col) indices of all tiles covering a circle around a point"""
+        dlat = radius_m / 111_320.0
+        dlng = radius_m / (111_320.0 * max(math.cos(math.radians(lat)), 1e-6))
+        return self.tiles_for_bbox(lat - dlat, lng - dlng, lat + dlat, lng + dlng)
+
+    def tiles_for_bbox(self, south: float, west: float, north: float, east: float) -> List[Tuple[int, int]]:
+        """Return (row, col) indices of all tiles intersecting a bounding box"""
+        size = self.tile_size_deg
+        rows = range(math.floor(south / size), math.floor(north / size) + 1)
+        cols = range(math.floor(west / size), math.floor(east / size) + 1)
+        return [(r, c) for r in rows for c in cols]
+
+    def tile_bbox(self, tile: Tuple[int, int]) -> Tuple[float, float, float, float]:
+        """(south, west, north, east) of a tile"""
+        row, col = tile
+        size = self.tile_size_deg
+        return (round(row * size, 6), round(col * size, 6),
+                round((row + 1) * size, 6), round((col + 1) * size, 6))
+
+    # ------------------------------------------------------------------
+    # Disk cache
+    # ------------------------------------------------------------------
+    def _cache_path(self, tile: Tuple[int, int]) -> str:
+        return os.path.join(self.cache_dir, f"fuel_{self.tile_size_deg:g}_{tile[0]}_{tile[1]}.json")
+
+    def _read_cache(self, tile: Tuple[int, int], allow_stale: bool = False) -> Optional[List[Dict]]:
+        path = self._cache_path(tile)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not allow_stale and time.time() - cached.get('fetched_at', 0) > self.ttl_seconds:
+            return None
+        return cached.get('elements', [])
+
+    def _write_cache(self, tile: Tuple[int, int], elements: List[Dict]):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._cache_path(tile)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'fetched_at': time.time(), 'elements': elements}, f)
+        os.replace(tmp_path, path)
+
+    @contextmanager
+    def _tile_lock(self, tile: Tuple[int, int]):
+        with self._locks_guard:
+            entry = self._tile_locks.setdefault(tile, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._locks_guard:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    del self._tile_locks[tile]
+
+    def _count(self, stat: str):
+        # Called from pool threads; ``+=`` on a dict entry is not atomic
+        with self._stats_lock:
+            self.stats[stat] += 1
+
+    # ------------------------------------------------------------------
+    # Fetching
+    # ------------------------------------------------------------------
+    def _download_tile(self, tile: Tuple[int, int]) -> List[Dict]:
+        south, west, north, east = self.tile_bbox(tile)
+        query = self.TILE_QUERY.format(timeout=int(self.timeout), south=south,
+                                       west=west, north=north, east=east)
+        response = self.session.post(self.base_url, data=query, timeout=(5, self.timeout))
+        response.raise_for_status()
+        return response.json().get('elements', [])
+
+    def get_tile(self, tile: Tuple[int, int]) -> List[Dict]:
+        """Return the elements of one tile, from cache when fresh"""
+        elements = self._read_cache(tile)
+        if elements is not None:
+            self._count('tile_hits')
+            metrics.cache_result('overpass_tile', True)
+            return elements
+
+        with self._tile_lock(tile):
+            # Another thread may have filled the cache while we waited
+            elements = self._read_cache(tile)
+            if elements is not None:
+                self._count('tile_hits')
+                metrics.cache_result('overpass_tile', True)
+                return elements
+
+            self._count('tile_misses')
+            metrics.cache_result('overpass_tile', False)
+            try:
+                with metrics.span('overpass_download'):
+                    elements = self._download_tile(tile)
+            except Exception as e:
+                self._count('tile_errors')
+                stale = self._read_cache(tile, allow_stale=True)
+                if stale is not None:
+                    print(f"Overpass tile {tile} failed ({e}); serving stale cache")
+                    return stale
+                raise
+            self._write_cache(tile, elements)
+            return elements
+
+    def get_tiles(self, tiles: List[Tuple[int, int]]) -> List[Dict]:
+        """Fetch several tiles (concurrently for cache misses) and merge unique elements"""
+        if len(tiles) <= 1 or self.max_workers <= 1:
+            results = [self.get_tile(t) for t in tiles]
+        else:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(tiles))) as pool:
+                results = list(pool.map(self.get_tile, tiles))
+
+        merged = {}
+        for elements in results:
+            for element in elements:
+                merged.setdefault((element.get('type'), element.get('id')), element)
+        return list(merged.values())
+
+    def fetch_fuel_elements(self, lat: float, lng: float, radius: float = 3000) -> List[Dict]:
+        """Overpass elements within ``radius`` meters, equivalent to an ``around`` query"""
+        elements = self.get_tiles(self.tiles_for_radius(lat, lng, radius))
+
+        radius_km = radius / 1000.0
+        result = []
+        for element in elements:
+            elat, elng = element.get('lat'), element.get('lon')
+            if elat is None or elng is None:
+                # Ways carry no coordinates of their own; keep them like the original query
+                result.append(element)
+            elif self._haversine_km(lat, lng, elat, elng) <= radius_km:
+                result.append(element)
+        return result
+
+    @staticmethod
+    def _haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+        R = 6371.0
+        dlat = math.radians(lat2 - lat1)
+        dlon = math.radians(lon2 - lon1)
+        a = math.sin(dlat/2)**2 + math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) * math.sin(dlon/2)**2
+        return 2 * R * math.asin(math.sqrt(a))
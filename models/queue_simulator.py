@@ -0,0 +1,225 @@
+import heapq
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+import numpy as np
+
+# Hour windows used to shape a station's day from its CSV columns
+MORNING_PEAK = range(7, 11)
+EVENING_PEAK = range(17, 21)
+NIGHT = range(0, 6)
+NIGHT_FACTOR = 0.25          # night arrivals relative to other off-peak hours
+
+# Waits are pooled across replications in a fixed histogram so results merge cheaply
+WAIT_BIN_MIN = 0.5
+WAIT_MAX_MIN = 240.0
+
+
+def hourly_rates(station: Dict) -> np.ndarray:
+    """24 hourly arrival rates (vehicles/hour) for a station.
+
+    Peak hours use the morning/evening arrival columns according to the
+    station's ``rush_pattern``; the remaining hours share whatever is left of
+    the daily total ``24 * overall_arrivals``, with nights at NIGHT_FACTOR.
+    """
+    overall = max(float(station.get('overall_arrivals') or 0.0), 0.0)
+    daily_total = 24.0 * overall
+    pattern = str(station.get('rush_pattern') or 'Steady').lower()
+
+    peak = {}
+    if 'morning' in pattern:
+        peak.update({h: float(station.get('morning_arrivals') or overall) for h in MORNING_PEAK})
+    if 'evening' in pattern:
+        peak.update({h: float(station.get('evening_arrivals') or overall) for h in EVENING_PEAK})
+
+    weights = np.array([0.0 if h in peak else (NIGHT_FACTOR if h in NIGHT else 1.0) for h in range(24)])
+    remaining = max(daily_total - sum(peak.values()), 0.0)
+    rates = weights * (remaining / weights.sum()) if weights.sum() > 0 else np.zeros(24)
+    for h, rate in peak.items():
+        rates[h] = max(rate, 0.0)
+    return rates
+
+
+def _arrival_times(rng: np.random.Generator, rates: np.ndarray) -> np.ndarray:
+    """Non-homogeneous Poisson arrivals over one day (minutes), by thinning"""
+    rate_max = float(rates.max())
+    if rate_max <= 0:
+        return np.empty(0)
+    n = rng.poisson(rate_max * 24.0)
+    times = np.sort(rng.uniform(0.0, 24 * 60.0, n))
+    keep = rng.random(n) < rates[(times // 60).astype(np.int64)] / rate_max
+    return times[keep]
+
+
+def _fcfs_waits(arrivals: np.ndarray, services: np.ndarray, servers: int) -> np.ndarray:
+    """Queueing delay of each customer at a FCFS station with ``servers`` identical pumps"""
+    free_at = [0.0] * max(int(servers), 1)
+    waits = np.empty(len(arrivals))
+    for i, (t, s) in enumerate(zip(arrivals.tolist(), services.tolist())):
+        start = max(t, heapq.heappop(free_at))
+        waits[i] = start - t
+        heapq.heappush(free_at, start + s)
+    return waits
+
+
+def simulate_station_day(rng: np.random.Generator, rates: np.ndarray, service_time_min: float,
+                         servers: int):
+    """Simulate one station for one day; returns (arrival minutes, waits in minutes)"""
+    arrivals = _arrival_times(rng, rates)
+    services = rng.exponential(max(service_time_min, 0.1), len(arrivals))
+    return arrivals, _fcfs_waits(arrivals, services, servers)
+
+
+def _run_replication(args):
+    """One replication of every station; module-level so it pickles to pool workers"""
+    rates, service_times, servers, seed_seq = args
+    rng = np.random.default_rng(seed_seq)
+    n_bins = int(WAIT_MAX_MIN / WAIT_BIN_MIN) + 1
+    n_stations = len(service_times)
+    hist = np.zeros((n_stations, n_bins), dtype=np.int64)
+    hour_sum = np.zeros((n_stations, 24))
+    hour_count = np.zeros((n_stations, 24), dtype=np.int64)
+    mean_wait = np.full(n_stations, np.nan)
+
+    for s in range(n_stations):
+        arrivals, waits = simulate_station_day(rng, rates[s], service_times[s], servers[s])
+        if not len(waits):
+            continue
+        bins = np.minimum((waits / WAIT_BIN_MIN).astype(np.int64), n_bins - 1)
+        hist[s] = np.bincount(bins, minlength=n_bins)
+        hours = (arrivals // 60).astype(np.int64)
+        hour_sum[s] = np.bincount(hours, weights=waits, minlength=24)
+        hour_count[s] = np.bincount(hours, minlength=24)
+        mean_wait[s] = waits.mean()
+    return hist, hour_sum, hour_count, mean_wait
+
+
+class QueueSimulator:
+    """Discrete-event simulation of station queues over a day.
+
+    Each station is an M(t)/M/c FCFS queue: arrivals follow the hourly
+    profile from ``hourly_rates`` and service times are exponential with the
+    station's mean. Replications run in a process pool. Each one gets its own
+    child of one ``SeedSequence``, so a run is reproducible for a given seed
+    and worker count does not change the numbers.
+    """
+
+    def __init__(self, stations: List[Dict], workers: Optional[int] = None):
+        self.stations = list(stations)
+        self.workers = workers or os.cpu_count() or 1
+        self.rates = np.array([hourly_rates(s) for s in self.stations]).reshape(len(self.stations), 24)
+        self.service_times = np.array([float(s.get('service_time') or 5.0) for s in self.stations])
+        self.servers = np.array([max(int(s.get('servers') or 1), 1) for s in self.stations])
+
+    def run(self, replications: int = 100, seed: int = 0) -> Dict:
+        """Simulate ``replications`` independent days and aggregate per station"""
+        seeds = np.random.SeedSequence(seed).spawn(replications)
+        jobs = [(self.rates, self.service_times, self.servers, s) for s in seeds]
+        if self.workers > 1 and replications > 1:
+            with ProcessPoolExecutor(max_workers=min(self.workers, replications)) as pool:
+                chunksize = max(1, replications // (4 * self.workers))
+                results = list(pool.map(_run_replication, jobs, chunksize=chunksize))
+        else:
+            results = [_run_replication(job) for job in jobs]
+
+        hist = sum(r[0] for r in results)
+        hour_sum = sum(r[1] for r in results)
+        hour_count = sum(r[2] for r in results)
+        rep_means = np.array([r[3] for r in results])          # (replications, stations)
+        return self._summarise(hist, hour_sum, hour_count, rep_means)
+
+    def _summarise(self, hist, hour_sum, hour_count, rep_means) -> Dict:
+        edges = np.arange(hist.shape[1]) * WAIT_BIN_MIN
+        stations = []
+        with np.errstate(invalid='ignore', divide='ignore'):
+            hourly_mean = np.where(hour_count > 0, hour_sum / hour_count, np.nan)
+        for s, station in enumerate(self.stations):
+            total = int(hist[s].sum())
+            valid = rep_means[:, s][np.isfinite(rep_means[:, s])]
+            summary = {
+                'name': station.get('name', 'CNG Station'),
+                'lat': station.get('lat'),
+                'lng': station.get('lng'),
+                'servers': int(self.servers[s]),
+                'customers_per_day': round(total / len(rep_means), 1),
+                'mean_wait': self._round(valid.mean()) if len(valid) else None,
+                # 95% confidence half-width of the mean across replications
+                'mean_wait_ci95': self._round(1.96 * valid.std(ddof=1) / math.sqrt(len(valid)))
+                if len(valid) > 1 else None,
+                # Share of customers who queue for at least one histogram bin
+                'p_wait': round(1.0 - hist[s, 0] / total, 3) if total else None,
+                'hourly_mean_wait': [self._round(v) for v in hourly_mean[s]],
+            }
+            cdf = np.cumsum(hist[s]) / total if total else None
+            for q in (50, 90, 95):
+                summary[f'p{q}_wait'] = (float(edges[np.searchsorted(cdf, q / 100.0)] + WAIT_BIN_MIN / 2)
+                                         if total else None)
+            stations.append(summary)
+
+        weights = np.array([s['customers_per_day'] for s in stations], dtype=float)
+        means = np.array([s['mean_wait'] if s['mean_wait'] is not None else 0.0 for s in stations])
+        return {
+            'replications': len(rep_means),
+            'stations': stations,
+            'network_mean_wait': self._round(np.average(means, weights=weights)) if weights.sum() else None,
+        }
+
+    @staticmethod
+    def _round(value) -> Optional[float]:
+        return round(float(value), 2) if value is not None and np.isfinite(value) else None
+
+
+def with_candidate_sites(stations: List[Dict], sites: List[Dict], capture_radius_km: float = 3.0,
+                         capture_share: float = 0.3, servers: int = 2) -> List[Dict]:
+    """Stations after opening ``sites``: each site takes ``capture_share`` of the
+    arrivals of existing stations within ``capture_radius_km`` (split evenly
+    when several sites compete for the same station)."""
+    stations = [dict(s) for s in stations]
+    if not sites or not stations:
+        return stations
+    lats = np.radians([s['lat'] for s in stations])
+    lngs = np.radians([s['lng'] for s in stations])
+    service = float(np.median([s.get('service_time') or 5.0 for s in stations]))
+
+    captured_by = []
+    for site in sites:
+        lat, lng = math.radians(site['lat']), math.radians(site['lng'])
+        a = np.sin((lats - lat) / 2) ** 2 + np.cos(lat) * np.cos(lats) * np.sin((lngs - lng) / 2) ** 2
+        captured_by.append(np.flatnonzero(2 * 6371.0 * np.arcsin(np.sqrt(a)) <= capture_radius_km))
+    competitors = np.bincount(np.concatenate(captured_by).astype(np.int64), minlength=len(stations))
+
+    # Sites pick up demand from a mix of patterns, so treat them as steady
+    new_sites = [{'name': site.get('name', f'Candidate {i + 1}'), 'lat': site['lat'], 'lng': site['lng'],
+                  'servers': site.get('servers', servers), 'service_time': service,
+                  'rush_pattern': 'Steady', 'overall_arrivals': 0.0,
+                  'morning_arrivals': 0.0, 'evening_arrivals': 0.0, 'candidate': True}
+                 for i, site in enumerate(sites)]
+    shares = np.where(competitors > 0, capture_share / np.maximum(competitors, 1), 0.0)
+    for site, idx in zip(new_sites, captured_by):
+        for s in idx.tolist():
+            for key in ('overall_arrivals', 'morning_arrivals', 'evening_arrivals'):
+                site[key] += float(stations[s].get(key) or 0.0) * shares[s]
+    for s in np.flatnonzero(competitors).tolist():
+        for key in ('overall_arrivals', 'morning_arrivals', 'evening_arrivals'):
+            stations[s][key] = float(stations[s].get(key) or 0.0) * (1 - capture_share)
+    return stations + new_sites
+
+
+def score_placements(stations: List[Dict], sites: List[Dict], replications: int = 50, seed: int = 0,
+                     workers: Optional[int] = None, **capture) -> Dict:
+    """Network mean wait before and after opening ``sites``.
+
+    Both runs use the same seed (common random numbers), so the difference
+    is mostly the effect of the placement rather than simulation noise.
+    """
+    baseline = QueueSimulator(stations, workers=workers).run(replications, seed)
+    scenario = QueueSimulator(with_candidate_sites(stations, sites, **capture), workers=workers).run(replications, seed)
+    before, after = baseline['network_mean_wait'], scenario['network_mean_wait']
+    return {
+        'baseline_mean_wait': before,
+        'scenario_mean_wait': after,
+        'wait_reduction': round(before - after, 2) if before is not None and after is not None else None,
+        'sites': scenario['stations'][len(stations):],
+    }
@@ -0,0 +1,103 @@
+import cProfile
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Optional
+
+
+class _StackSampler:
+    """Samples one thread's Python stack at a fixed interval (stdlib only).
+
+    Produces folded stacks (``outer;inner;leaf count``) that flamegraph.pl,
+    speedscope and inferno read directly.
+    """
+
+    def __init__(self, thread_id: int, interval: float = 0.001):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='request-sampler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                frame = frame.f_back
+            self.samples[';'.join(reversed(stack))] += 1
+
+    def write(self, path: str):
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+class RequestProfiler:
+    """Profiles a single request with cProfile or a stack sampler.
+
+    ``start`` is called before the view runs and returns a handle; ``finish``
+    writes ``<request_id>.prof`` (pstats) or ``<request_id>.collapsed``
+    (folded stacks) to the output directory and returns the file path.
+    """
+
+    MODES = ('cprofile', 'sample')
+
+    def __init__(self, output_dir: str, sample_interval: float = 0.001):
+        self.output_dir = output_dir
+        self.sample_interval = sample_interval
+
+    def start(self, mode: str = 'cprofile') -> Optional[dict]:
+        if mode not in self.MODES:
+            mode = 'cprofile'
+        handle = {'mode': mode, 'started': time.perf_counter()}
+        if mode == 'sample':
+            sampler = _StackSampler(threading.get_ident(), self.sample_interval)
+            sampler.start()
+            handle['sampler'] = sampler
+        else:
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+            except ValueError:
+                # Another profiler is already active in this thread
+                return None
+            handle['profiler'] = profiler
+        return handle
+
+    @staticmethod
+    def safe_name(value: str, limit: int = 60) -> str:
+        """``value`` reduced to ``[A-Za-z0-9_-]`` so it cannot leave the output directory"""
+        return ''.join(ch if ch.isascii() and (ch.isalnum() or ch in '-_') else '_' for ch in value)[:limit]
+
+    def finish(self, handle: dict, request_id: str, label: str = '') -> str:
+        os.makedirs(self.output_dir, exist_ok=True)
+        request_id = self.safe_name(request_id) or 'request'
+        safe_label = self.safe_name(label)
+        base = os.path.join(self.output_dir, f"{request_id}_{safe_label}" if safe_label else request_id)
+
+        if handle['mode'] == 'sample':
+            handle['sampler'].stop()
+            path = base + '.collapsed'
+            handle['sampler'].write(path)
+        else:
+            handle['profiler'].disable()
+            path = base + '.prof'
+            handle['profiler'].dump_stats(path)
+
+        elapsed = time.perf_counter() - handle['started']
+        print(f"Profiled request {request_id} ({label}, {elapsed:.3f}s) -> {path}")
+        return path
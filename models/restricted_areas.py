@@ -0,0 +1,120 @@
+import json
+import os
+from typing import Dict, List, Optional
+
+import numpy as np
+import shapely
+from shapely.geometry import Polygon, shape
+from shapely.strtree import STRtree
+
+
+class RestrictedAreaIndex:
+    """Spatial index over restricted areas (water bodies, sanctuaries, ...).
+
+    Every area is compiled once into a buffered, prepared shapely geometry and
+    stored in an STRtree, so a point or a whole batch of points can be
+    classified without looping over polygon edges in Python.
+    """
+
+    # Buffer zone around restricted areas (approximately 100 meters in degrees)
+    DEFAULT_BUFFER = 0.001
+
+    def __init__(self, areas: Optional[List[Dict]] = None, buffer: float = DEFAULT_BUFFER):
+        self.buffer = buffer
+        self.names = []
+        self.geometries = []
+        self.tree = None
+        for area in areas or []:
+            self.add_area(area['name'], self._polygon_from_points(area['polygon']), rebuild=False)
+        self._rebuild()
+
+    @classmethod
+    def from_geojson(cls, file_path: str, buffer: float = DEFAULT_BUFFER) -> 'RestrictedAreaIndex':
+        """Build an index from a GeoJSON FeatureCollection of (multi)polygons"""
+        index = cls(buffer=buffer)
+        index.load_geojson(file_path)
+        return index
+
+    def load_geojson(self, file_path: str) -> int:
+        """Add every polygon feature of a GeoJSON file; returns the number added"""
+        with open(file_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+
+        features = data.get('features', []) if data.get('type') == 'FeatureCollection' else [data]
+        added = 0
+        for feature in features:
+            geometry = feature.get('geometry')
+            if not geometry or geometry.get('type') not in ('Polygon', 'MultiPolygon'):
+                continue
+            name = (feature.get('properties') or {}).get('name', 'Restricted Area')
+            self.add_area(name, shape(geometry), rebuild=False)
+            added += 1
+
+        self._rebuild()
+        return added
+
+    def add_area(self, name: str, geometry, rebuild: bool = True):
+        """Add a raw (unbuffered) lng/lat geometry to the index"""
+        buffered = geometry.buffer(self.buffer) if self.buffer > 0 else geometry
+        shapely.prepare(buffered)
+        self.names.append(name)
+        self.geometries.append(buffered)
+        if rebuild:
+            self._rebuild()
+
+    def _rebuild(self):
+        """Rebuild the STRtree after areas were added"""
+        self.tree = STRtree(self.geometries) if self.geometries else None
+
+    @staticmethod
+    def _polygon_from_points(points: List[Dict]) -> Polygon:
+        """Convert the app's [{'lat': .., 'lng': ..}, ...] rings to a shapely polygon"""
+        polygon = Polygon([(p['lng'], p['lat']) for p in points])
+        if not polygon.is_valid:
+            polygon = shapely.make_valid(polygon)
+        return polygon
+
+    def validate_points(self, lats, lngs) -> np.ndarray:
+        """Return a boolean array, True where the point is outside every restricted area"""
+        lats = np.asarray(lats, dtype=float).ravel()
+        lngs = np.asarray(lngs, dtype=float).ravel()
+        if lats.shape != lngs.shape:
+            raise ValueError('lats and lngs must have the same length')
+
+        valid = np.isfinite(lats) & np.isfinite(lngs)
+        if self.tree is None or not valid.any():
+            return valid
+
+        points = shapely.points(lngs[valid], lats[valid])
+        point_idx, _ = self.tree.query(points, predicate='intersects')
+        checked = np.ones(len(points), dtype=bool)
+        checked[point_idx] = False
+        valid[valid] = checked
+        return valid
+
+    def is_valid(self, lat: float, lng: float) -> bool:
+        """Single-point convenience wrapper around validate_points"""
+        return bool(self.validate_points([lat], [lng])[0])
+
+    def area_names_at(self, lat: float, lng: float) -> List[str]:
+        """Names of the restricted areas (including buffer) containing a point"""
+        if self.tree is None:
+            return []
+        hits = self.tree.query(shapely.points(lng, lat), predicate='intersects')
+        return [self.names[i] for i in sorted(hits)]
+
+    def __len__(self):
+        return len(self.geometries)
+
+
+def load_restricted_areas(areas: List[Dict], geojson_path: Optional[str] = None,
+                          buffer: float = RestrictedAreaIndex.DEFAULT_BUFFER) -> RestrictedAreaIndex:
+    """Build the restricted-area index from in-code areas plus an optional GeoJSON file"""
+    index = RestrictedAreaIndex(areas, buffer=buffer)
+    if geojson_path and os.path.exists(geojson_path):
+        try:
+            added = index.load_geojson(geojson_path)
+            print(f"Loaded {added} restricted areas from {os.path.basename(geojson_path)}")
+        except Exception as e:
+            print(f"Error loading restricted areas from {geojson_path}: {e}")
+    return index
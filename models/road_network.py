@@ -0,0 +1,205 @@
+import math
+import os
+import threading
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import dijkstra
+from scipy.spatial import cKDTree
+
+EARTH_RADIUS_M = 6371000.0
+
+# Highway classes that cars can use, mirroring what a car router would keep
+DRIVABLE_HIGHWAYS = {
+    'motorway', 'motorway_link', 'trunk', 'trunk_link', 'primary', 'primary_link',
+    'secondary', 'secondary_link', 'tertiary', 'tertiary_link', 'unclassified',
+    'residential', 'living_street', 'service', 'road',
+}
+
+
+def _haversine_m(lat1, lng1, lat2, lng2):
+    lat1, lng1, lat2, lng2 = map(np.radians, (lat1, lng1, lat2, lng2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(a))
+
+
+class RoadGraph:
+    """Directed road network in compressed sparse row (CSR) form.
+
+    Node ``i`` has outgoing edges ``indices[indptr[i]:indptr[i + 1]]`` with
+    lengths in meters in ``weights``. One-to-many network distances run
+    SciPy's C Dijkstra from the snapped source node, bounded by a distance
+    limit, and recent sources are kept in a small LRU cache.
+
+    The limit bounds the search, but every query still pays an O(n) setup
+    (about 5 ms at 640k nodes), and the cache rarely hits because sources
+    are user positions. Measured on one core with a synthetic street grid
+    (benchmarks/bench_route.py::bench_road_distances):
+
+        nodes   max_km=5   max_km=15   no limit
+        40k     ~290/s     ~85/s       ~85/s
+        640k    ~100/s     ~20/s       ~4/s
+
+    City-sized graphs therefore give tens of queries per second, not
+    thousands. Searching a straight-line subgraph instead measured slower,
+    because extracting it costs more than the setup it saves.
+    """
+
+    def __init__(self, node_lat, node_lng, indptr, indices, weights, cache_size: int = 32):
+        self.node_lat = np.asarray(node_lat, dtype=np.float64)
+        self.node_lng = np.asarray(node_lng, dtype=np.float64)
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int32)
+        self.weights = np.asarray(weights, dtype=np.float32)
+        n = len(self.node_lat)
+        # csgraph works on float64 weights and int32 indices; build the matrix in
+        # those dtypes once so no query has to convert (and copy) the graph
+        indptr32 = self.indptr.astype(np.int32) if self.indptr[-1] < 2 ** 31 else self.indptr
+        self.matrix = csr_matrix((self.weights.astype(np.float64), self.indices, indptr32), shape=(n, n))
+
+        # Snap with a KD-tree over a local equirectangular projection (meters)
+        self._ref_lat = float(np.mean(self.node_lat)) if n else 0.0
+        self._kdtree = cKDTree(self._project(self.node_lat, self.node_lng)) if n else None
+
+        self.cache_size = cache_size
+        self._cache = OrderedDict()   # (source_node, limit_m) -> distances array (one float per node)
+        self._cache_lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Construction / persistence
+    # ------------------------------------------------------------------
+    @classmethod
+    def from_edges(cls, node_lat, node_lng, src, dst, length_m=None, **kwargs) -> 'RoadGraph':
+        """Build from parallel edge arrays; lengths default to haversine distance"""
+        node_lat = np.asarray(node_lat, dtype=np.float64)
+        node_lng = np.asarray(node_lng, dtype=np.float64)
+        src = np.asarray(src, dtype=np.int64)
+        dst = np.asarray(dst, dtype=np.int64)
+        if length_m is None:
+            length_m = _haversine_m(node_lat[src], node_lng[src], node_lat[dst], node_lng[dst])
+        length_m = np.maximum(np.asarray(length_m, dtype=np.float64), 0.01)  # csgraph ignores zero weights
+
+        # Keep the shortest of parallel edges, then sort by source for CSR
+        order = np.lexsort((length_m, dst, src))
+        src, dst, length_m = src[order], dst[order], length_m[order]
+        keep = np.ones(len(src), dtype=bool)
+        keep[1:] = (src[1:] != src[:-1]) | (dst[1:] != dst[:-1])
+        src, dst, length_m = src[keep], dst[keep], length_m[keep]
+
+        indptr = np.zeros(len(node_lat) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(src, minlength=len(node_lat)), out=indptr[1:])
+        return cls(node_lat, node_lng, indptr, dst, length_m, **kwargs)
+
+    @classmethod
+    def from_osm_pbf(cls, pbf_path: str, **kwargs) -> 'RoadGraph':
+        """Parse drivable ways from an OSM extract (.osm.pbf / .osm); needs pyosmium"""
+        try:
+            import osmium
+        except ImportError as e:
+            raise ImportError('Reading OSM extracts requires pyosmium (pip install osmium); '
+                              'or convert once with scripts/build_road_graph.py elsewhere') from e
+
+        node_ids = {}
+        lats, lngs, src, dst = [], [], [], []
+
+        def node_index(location, osm_id):
+            idx = node_ids.get(osm_id)
+            if idx is None:
+                idx = node_ids[osm_id] = len(lats)
+                lats.append(location.lat)
+                lngs.append(location.lon)
+            return idx
+
+        class WayHandler(osmium.SimpleHandler):
+            def way(self, w):
+                if w.tags.get('highway') not in DRIVABLE_HIGHWAYS:
+                    return
+                oneway = w.tags.get('oneway', 'no')
+                if w.tags.get('highway') in ('motorway', 'motorway_link') and oneway == 'no':
+                    oneway = 'yes'
+                refs = [node_index(n.location, n.ref) for n in w.nodes if n.location.valid()]
+                for a, b in zip(refs[:-1], refs[1:]):
+                    if oneway == '-1':
+                        src.append(b); dst.append(a)
+                        continue
+                    src.append(a); dst.append(b)
+                    if oneway not in ('yes', 'true', '1'):
+                        src.append(b); dst.append(a)
+
+        WayHandler().apply_file(pbf_path, locations=True)
+        return cls.from_edges(lats, lngs, src, dst, **kwargs)
+
+    def save(self, path: str):
+        """Save the CSR arrays as .npz so load() skips OSM parsing"""
+        np.savez(path, node_lat=self.node_lat, node_lng=self.node_lng,
+                 indptr=self.indptr, indices=self.indices, weights=self.weights)
+
+    @classmethod
+    def load(cls, path: str, **kwargs) -> 'RoadGraph':
+        """Load a pre-converted graph (.npz from save(), or a PBF/OSM extract)"""
+        if path.endswith(('.pbf', '.osm')):
+            return cls.from_osm_pbf(path, **kwargs)
+        with np.load(path) as data:
+            return cls(data['node_lat'], data['node_lng'], data['indptr'],
+                       data['indices'], data['weights'], **kwargs)
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+    def _project(self, lats, lngs) -> np.ndarray:
+        k = math.pi / 180.0 * EARTH_RADIUS_M
+        x = np.asarray(lngs, dtype=np.float64) * k * math.cos(math.radians(self._ref_lat))
+        y = np.asarray(lats, dtype=np.float64) * k
+        return np.column_stack([x, y])
+
+    def snap(self, lats, lngs) -> Tuple[np.ndarray, np.ndarray]:
+        """Nearest graph node for each point and the straight-line snap distance in meters"""
+        snap_m, nodes = self._kdtree.query(self._project(np.atleast_1d(lats), np.atleast_1d(lngs)))
+        return nodes.astype(np.int64), snap_m
+
+    def _distances_from_node(self, node: int, limit_m: float) -> np.ndarray:
+        key = (int(node), limit_m)
+        with self._cache_lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                return cached
+        dist = dijkstra(self.matrix, directed=True, indices=int(node), limit=limit_m)
+        with self._cache_lock:
+            self._cache[key] = dist
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return dist
+
+    def distances_km(self, lat: float, lng: float, target_lats, target_lngs,
+                     max_km: Optional[float] = None) -> np.ndarray:
+        """Network distance in km from one point to many; inf where unreachable or beyond max_km"""
+        target_lats = np.atleast_1d(np.asarray(target_lats, dtype=float))
+        if len(target_lats) == 0 or self._kdtree is None:
+            return np.full(len(target_lats), np.inf)
+        src_node, src_snap = self.snap(lat, lng)
+        dst_nodes, dst_snap = self.snap(target_lats, target_lngs)
+        limit_m = np.inf if max_km is None else float(max_km) * 1000.0
+        dist = self._distances_from_node(src_node[0], limit_m)
+        total_m = dist[dst_nodes] + src_snap[0] + dst_snap
+        if max_km is not None:
+            total_m[total_m > limit_m] = np.inf
+        return total_m / 1000.0
+
+    def __len__(self):
+        return len(self.node_lat)
+
+
+def load_road_graph(path: Optional[str]) -> Optional[RoadGraph]:
+    """Load the configured road graph, or None (callers then fall back to haversine)"""
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        graph = RoadGraph.load(path)
+        print(f"Loaded road graph with {len(graph)} nodes from {os.path.basename(path)}")
+        return graph
+    except Exception as e:
+        print(f"Error loading road graph from {path}: {e}")
+        return None
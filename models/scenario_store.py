@@ -0,0 +1,135 @@
+import fcntl
+import os
+import pickle
+import threading
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Callable, Optional, Tuple
+
+
+class ScenarioStore:
+    """What-if scenarios pickled under ``scenario_dir``, one file per id.
+
+    Like the optimization job status files, this lets any web worker process
+    serve a scenario, not just the one that created it. Edits take an
+    exclusive ``flock`` on the scenario's file, so two workers editing the
+    same scenario apply their changes one after the other. Each process
+    keeps the scenarios it last saw, keyed by file mtime, so a poll from the
+    same worker does not unpickle again. Beyond ``max_scenarios`` the least
+    recently saved scenarios are deleted.
+    """
+
+    def __init__(self, scenario_dir: str, max_scenarios: int = 64):
+        self.scenario_dir = scenario_dir
+        self.max_scenarios = max_scenarios
+        self._cache = OrderedDict()   # id -> (mtime_ns, scenario)
+        self._lock = threading.Lock()
+        os.makedirs(scenario_dir, exist_ok=True)
+
+    def _path(self, scenario_id: str) -> str:
+        return os.path.join(self.scenario_dir, f"{scenario_id}.pkl")
+
+    @staticmethod
+    def valid_id(scenario_id: str) -> bool:
+        return len(scenario_id) == 32 and all(c in '0123456789abcdef' for c in scenario_id)
+
+    def _save(self, scenario_id: str, scenario):
+        path = self._path(scenario_id)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(scenario, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+        self._remember(scenario_id, os.stat(path).st_mtime_ns, scenario)
+
+    def _remember(self, scenario_id: str, mtime_ns: int, scenario):
+        with self._lock:
+            self._cache[scenario_id] = (mtime_ns, scenario)
+            self._cache.move_to_end(scenario_id)
+            while len(self._cache) > self.max_scenarios:
+                self._cache.popitem(last=False)
+
+    def _load(self, scenario_id: str):
+        path = self._path(scenario_id)
+        try:
+            mtime_ns = os.stat(path).st_mtime_ns
+        except OSError:
+            with self._lock:
+                self._cache.pop(scenario_id, None)
+            return None
+        with self._lock:
+            cached = self._cache.get(scenario_id)
+        if cached is not None and cached[0] == mtime_ns:
+            return cached[1]
+        scenario = self._read(path)
+        if scenario is not None:
+            self._remember(scenario_id, mtime_ns, scenario)
+        return scenario
+
+    @staticmethod
+    def _read(path: str):
+        try:
+            with open(path, 'rb') as f:
+                return pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+
+    @contextmanager
+    def _file_lock(self, scenario_id: str):
+        with open(self._path(scenario_id) + '.lock', 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def create(self, scenario) -> str:
+        scenario_id = uuid.uuid4().hex
+        self._save(scenario_id, scenario)
+        self.purge()
+        return scenario_id
+
+    def get(self, scenario_id: str):
+        """The scenario, or None if the id is unknown or was evicted"""
+        if not self.valid_id(scenario_id):
+            return None
+        return self._load(scenario_id)
+
+    def update(self, scenario_id: str, edit: Callable) -> Optional[Tuple[object, object]]:
+        """Apply ``edit(scenario)`` under the scenario's file lock and save the result.
+
+        Returns (scenario, edit's return value), or None for an unknown id.
+        Exceptions from ``edit`` propagate and leave the stored scenario as it was.
+        """
+        if not self.valid_id(scenario_id) or not os.path.exists(self._path(scenario_id)):
+            return None
+        with self._file_lock(scenario_id):
+            # A fresh copy from disk: readers keep the cached one, and a failed
+            # edit cannot leave a half-applied scenario behind
+            scenario = self._read(self._path(scenario_id))
+            if scenario is None:
+                return None
+            result = edit(scenario)
+            self._save(scenario_id, scenario)
+        return scenario, result
+
+    def purge(self) -> int:
+        """Delete the least recently saved scenarios beyond ``max_scenarios``"""
+        entries = []
+        for name in os.listdir(self.scenario_dir):
+            if name.endswith('.pkl'):
+                try:
+                    entries.append((os.stat(os.path.join(self.scenario_dir, name)).st_mtime_ns, name[:-4]))
+                except OSError:
+                    pass
+        removed = 0
+        for _, scenario_id in sorted(entries)[:max(len(entries) - self.max_scenarios, 0)]:
+            for path in (self._path(scenario_id), self._path(scenario_id) + '.lock'):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            with self._lock:
+                self._cache.pop(scenario_id, None)
+            removed += 1
+        return removed
@@ -2,6 +2,7 @@ import numpy as np
 from typing import List, Dict, Any, Tuple, Optional
 from dataclasses import dataclass
 from math import ceil
+from models.metrics import metrics
 
 @dataclass
 class ChargingStop:
@@ -15,7 +16,19 @@ class ChargingStop:
     type: str
 
 class ChargingStationCalculator:
-    def __init__(self):
+    # How many straight-line nearest stations are re-ranked by road distance
+    ROAD_CANDIDATES = 8
+    MAX_ROAD_DETOUR_KM = 50.0
+
+    # Downhill never costs less than this share of flat consumption (no regeneration)
+    MIN_CONSUMPTION_FACTOR = 0.5
+
+    def __init__(self, road_graph=None, elevation=None):
+        # Optional models.road_network.RoadGraph; straight-line distance is used without it
+        self.road_graph = road_graph
+        # Optional models.elevation.ElevationModel; flat terrain is assumed without it
+        self.elevation = elevation
+
         # Constants for calculations
         self.SAFETY_BUFFER = 10  # Minimum charge percentage to maintain
         self.MAX_CHARGE = 90    # Maximum practical charge percentage
@@ -43,6 +56,7 @@ class ChargingStationCalculator:
         # For CNG semantics we treat 'battery_capacity' as tank capacity (kg)
         self.battery_capacity = None
 
+    @metrics.timed('calculate_charging_stops')
     def calculate_charging_stops(
         self,
         route_data: Dict[str, Any],
@@ -51,76 +65,152 @@ class ChargingStationCalculator:
         available_stations: List[Dict[str, Any]]
     ) -> List[ChargingStop]:
         """Calculate optimal charging stops for the route"""
+        stops = []
+        for point in self.find_refuel_points(route_data, ev_specs, current_charge):
+            # Find nearest charging station
+            nearest_station = self._find_nearest_station(
+                available_stations,
+                point['lat'], point['lng']
+            )
+            
+            if not nearest_station:
+                raise ValueError("No suitable charging station found")
+            
+            stops.append(ChargingStop(
+                name=nearest_station['name'],
+                lat=nearest_station['lat'],
+                lng=nearest_station['lng'],
+                arrival_charge=round(point['arrival_charge'], 1),
+                departure_charge=round(point['departure_charge'], 1),
+                charge_time=point['charge_time'],
+                distance_from_start=round(point['distance_from_start'], 1),
+                type=nearest_station.get('type', 'Unknown')
+            ))
+        
+        return stops
+
+    def find_refuel_points(
+        self,
+        route_data: Dict[str, Any],
+        ev_specs: Dict[str, Any],
+        current_charge: float
+    ) -> List[Dict[str, Any]]:
+        """Simulate the tank level along the route and return where refuelling is needed.
+
+        Each point is the route vertex at which the level first drops below
+        20%, with the arrival/departure levels and the fill time. The choice
+        of station does not affect the simulation, so callers (single route
+        or fleet planning) pick stations for these points afterwards.
+        """
         # Map CNG to internal fields
         self.battery_capacity = ev_specs['batteryCapacity']  # kg (tank)
+        tank_capacity = ev_specs['batteryCapacity']
         total_distance = route_data['distance']
         route_coordinates = route_data['coordinates']
-        consumption_rate = ev_specs['consumption']  # kg/km
-        
-        # Initialize variables
-        current_position = 0
-        current_battery = current_charge
-        stops = []
         
         # Calculate energy needed per kilometer
-        energy_per_km = consumption_rate
+        energy_per_km = ev_specs['consumption']  # kg/km
         
-        # Process each segment
+        if len(route_coordinates) < 2:
+            return []
+
+        # All segment lengths in one vectorized haversine call
+        coords = np.asarray(route_coordinates, dtype=float)
+        segment_distances = self._haversine_distance(
+            coords[:-1, 0], coords[:-1, 1], coords[1:, 0], coords[1:, 1]
+        )
+        factors = self._consumption_factors(coords, segment_distances, energy_per_km, route_data)
+        battery_drains = (segment_distances * factors * energy_per_km / tank_capacity * 100).tolist()
+        # Terrain/speed factor of the rest of the route after each segment, for sizing fills
+        weighted = segment_distances * factors
+        rest_km = np.cumsum(segment_distances[::-1])[::-1] - segment_distances
+        rest_weighted = np.cumsum(weighted[::-1])[::-1] - weighted
+        remaining_factors = np.divide(rest_weighted, rest_km, out=np.ones_like(rest_km),
+                                      where=rest_km > 1e-9).tolist()
+        segment_distances = segment_distances.tolist()
+
+        current_battery = current_charge
         accumulated_distance = 0
+        points = []
         
-        for i, coord in enumerate(route_coordinates[:-1]):
-            segment_distance = self._haversine_distance(
-                coord[0], coord[1],
-                route_coordinates[i+1][0], route_coordinates[i+1][1]
-            )
-            
+        for i, segment_distance in enumerate(segment_distances):
             accumulated_distance += segment_distance
-            energy_needed = segment_distance * energy_per_km
-            battery_drain = (energy_needed / self.battery_capacity) * 100
-            current_battery -= battery_drain
+            current_battery -= battery_drains[i]
             
             # Check if battery is getting too low (below 20%)
             if current_battery < 20 and accumulated_distance < total_distance:
-                # Find nearest charging station
-                nearest_station = self._find_nearest_station(
-                    available_stations,
-                    coord[0], coord[1]
-                )
-                
-                if not nearest_station:
-                    raise ValueError("No suitable charging station found")
-                
                 # Calculate optimal charge level
                 remaining_distance = total_distance - accumulated_distance
-                needed_charge = (remaining_distance * energy_per_km / self.battery_capacity * 100) + 30
+                needed_charge = (remaining_distance * energy_per_km * remaining_factors[i] / tank_capacity * 100) + 30
                 optimal_charge = min(90, max(needed_charge, 80))
                 
-                # Calculate filling time for CNG (kg/min)
-                charging_time = self._calculate_charging_time(
-                    current_battery,
-                    optimal_charge,
-                    ev_specs
-                )
-                
-                stops.append(ChargingStop(
-                    name=nearest_station['name'],
-                    lat=nearest_station['lat'],
-                    lng=nearest_station['lng'],
-                    arrival_charge=round(current_battery, 1),
-                    departure_charge=round(optimal_charge, 1),
-                    charge_time=charging_time,
-                    distance_from_start=round(accumulated_distance, 1),
-                    type=nearest_station.get('type', 'Unknown')
-                ))
+                points.append({
+                    'lat': float(coords[i, 0]),
+                    'lng': float(coords[i, 1]),
+                    'vertex_index': i,
+                    'arrival_charge': current_battery,
+                    'departure_charge': optimal_charge,
+                    # Calculate filling time for CNG (kg/min)
+                    'charge_time': self._calculate_charging_time(current_battery, optimal_charge, ev_specs),
+                    'distance_from_start': accumulated_distance
+                })
                 
                 current_battery = optimal_charge
         
-        return stops
+        return points
+
+    def _consumption_factors(self, coords: np.ndarray, segment_km: np.ndarray, energy_per_km: float,
+                             route_data: Dict[str, Any]) -> np.ndarray:
+        """Per-segment multiplier on flat-road consumption from terrain and speed.
+
+        Slopes come from one bilinear DEM lookup of all route vertices and add
+        ELEVATION_CONSUMPTION per degree. Speeds come from ``route_data['speeds']``
+        (km/h per segment) or the average of ``distance`` over ``duration``
+        (minutes), and pick a SPEED_IMPACT class. Without either, all factors are 1.
+        """
+        factors = np.ones(len(segment_km))
+
+        if self.elevation is not None:
+            heights = self.elevation.sample(coords[:, 0], coords[:, 1])
+            rise_m = np.nan_to_num(np.diff(heights), nan=0.0)
+            slope_deg = np.degrees(np.arctan2(rise_m, np.maximum(segment_km * 1000.0, 1.0)))
+            factors += self.ELEVATION_CONSUMPTION * slope_deg / max(energy_per_km, 1e-6)
+
+        speeds = route_data.get('speeds')
+        if speeds is not None and len(speeds) == len(segment_km):
+            speeds = np.asarray(speeds, dtype=float)
+        elif route_data.get('duration'):
+            speeds = np.full(len(segment_km), float(route_data['distance']) / (float(route_data['duration']) / 60.0))
+        else:
+            speeds = None
+        if speeds is not None:
+            factors *= np.select([speeds <= 50, speeds <= 80],
+                                 [self.SPEED_IMPACT['urban'], self.SPEED_IMPACT['suburban']],
+                                 self.SPEED_IMPACT['highway'])
+
+        return np.maximum(factors, self.MIN_CONSUMPTION_FACTOR)
 
     def _find_nearest_station(self, stations: List[Dict[str, Any]], lat: float, lng: float) -> Optional[Dict[str, Any]]:
         """Find the nearest charging station to a given point"""
         if not stations:
             return None
+
+        if self.road_graph is not None:
+            # Shortlist by straight-line distance, then pick the smallest road detour
+            straight = self._haversine_distance(
+                lat, lng,
+                np.array([s['lat'] for s in stations]),
+                np.array([s['lng'] for s in stations])
+            )
+            shortlist = np.argsort(straight)[:self.ROAD_CANDIDATES]
+            road_km = self.road_graph.distances_km(
+                lat, lng,
+                [stations[i]['lat'] for i in shortlist],
+                [stations[i]['lng'] for i in shortlist],
+                max_km=self.MAX_ROAD_DETOUR_KM
+            )
+            if np.isfinite(road_km).any():
+                return stations[int(shortlist[int(np.argmin(road_km))])]
         
         nearest = min(
             stations,
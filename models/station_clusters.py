@@ -0,0 +1,120 @@
+import math
+from typing import Dict, List, Optional
+
+import numpy as np
+
+
+class StationClusterIndex:
+    """Hierarchical grid of pre-aggregated station clusters for map rendering.
+
+    For every zoom level the stations are bucketed into Web Mercator grid
+    cells of ``cell_px`` screen pixels and each cell stores its count,
+    centroid and minimum predicted wait. A viewport query only touches the
+    cells inside the viewport, so the response size depends on the screen,
+    not on the number of stations.
+    """
+
+    def __init__(self, lats, lngs, waits=None, names: Optional[List[str]] = None,
+                 max_zoom: int = 18, cell_px: int = 64, individual_zoom: int = 15):
+        self.lats = np.asarray(lats, dtype=float)
+        self.lngs = np.asarray(lngs, dtype=float)
+        self.waits = (np.asarray(waits, dtype=float) if waits is not None
+                      else np.full(len(self.lats), np.nan))
+        self.names = list(names) if names is not None else ['CNG Station'] * len(self.lats)
+        self.max_zoom = max_zoom
+        self.cell_px = cell_px
+        self.individual_zoom = individual_zoom
+
+        # Normalised Web Mercator coordinates in [0, 1)
+        self._mx, self._my = self._mercator(self.lats, self.lngs)
+        # Above individual_zoom stations are returned one by one, so cluster
+        # levels are only needed up to there
+        self.levels = {z: self._build_level(z) for z in range(min(individual_zoom, max_zoom) + 1)}
+        # Stations sorted by x for viewport queries at high zoom
+        self._order = np.argsort(self._mx, kind='stable')
+        self._sorted_mx = self._mx[self._order]
+
+    @staticmethod
+    def _mercator(lats, lngs):
+        lats = np.clip(np.asarray(lats, dtype=float), -85.05112878, 85.05112878)
+        x = (np.asarray(lngs, dtype=float) + 180.0) / 360.0
+        s = np.sin(np.radians(lats))
+        y = 0.5 - np.log((1 + s) / (1 - s)) / (4 * math.pi)
+        return np.clip(x, 0.0, 1.0 - 1e-12), np.clip(y, 0.0, 1.0 - 1e-12)
+
+    def _cells_per_axis(self, zoom: int) -> int:
+        return max(1, (256 << zoom) // self.cell_px)
+
+    def _build_level(self, zoom: int) -> Dict[str, np.ndarray]:
+        n_cells = self._cells_per_axis(zoom)
+        cx = (self._mx * n_cells).astype(np.int64)
+        cy = (self._my * n_cells).astype(np.int64)
+        keys = cx * n_cells + cy
+        unique_keys, inverse = np.unique(keys, return_inverse=True)
+
+        count = np.bincount(inverse, minlength=len(unique_keys))
+        sum_lat = np.bincount(inverse, weights=self.lats, minlength=len(unique_keys))
+        sum_lng = np.bincount(inverse, weights=self.lngs, minlength=len(unique_keys))
+        min_wait = np.full(len(unique_keys), np.inf)
+        finite = np.isfinite(self.waits)
+        np.minimum.at(min_wait, inverse[finite], self.waits[finite])
+
+        # unique_keys is sorted, so cells are ordered by x then y
+        return {
+            'x': unique_keys // n_cells,
+            'y': unique_keys % n_cells,
+            'count': count,
+            'lat': sum_lat / np.maximum(count, 1),
+            'lng': sum_lng / np.maximum(count, 1),
+            'min_wait': min_wait,
+        }
+
+    def query(self, bbox: Dict[str, float], zoom: int, max_stations: int = 2000) -> Dict:
+        """Clusters (or, at high zoom, individual stations) inside a viewport"""
+        zoom = int(min(max(zoom, 0), self.max_zoom))
+        x0, y1 = self._mercator(bbox['min_lat'], bbox['min_lng'])
+        x1, y0 = self._mercator(bbox['max_lat'], bbox['max_lng'])
+        x0, x1, y0, y1 = float(x0), float(x1), float(y0), float(y1)
+
+        if zoom >= self.individual_zoom:
+            lo = np.searchsorted(self._sorted_mx, x0, side='left')
+            hi = np.searchsorted(self._sorted_mx, x1, side='right')
+            idx = self._order[lo:hi]
+            idx = idx[(self._my[idx] >= y0) & (self._my[idx] <= y1)]
+            if len(idx) <= max_stations:
+                return {'zoom': zoom, 'clusters': [], 'stations': [
+                    {
+                        'name': self.names[i],
+                        'position': {'lat': float(self.lats[i]), 'lng': float(self.lngs[i])},
+                        'predicted_wait': self._wait_or_none(self.waits[i]),
+                    }
+                    for i in idx.tolist()
+                ]}
+
+        cluster_zoom = min(zoom, max(self.levels))
+        level = self.levels[cluster_zoom]
+        n_cells = self._cells_per_axis(cluster_zoom)
+        cx0, cx1 = int(x0 * n_cells), int(x1 * n_cells)
+        cy0, cy1 = int(y0 * n_cells), int(y1 * n_cells)
+        lo = np.searchsorted(level['x'], cx0, side='left')
+        hi = np.searchsorted(level['x'], cx1, side='right')
+        sel = np.arange(lo, hi)
+        sel = sel[(level['y'][sel] >= cy0) & (level['y'][sel] <= cy1)]
+
+        clusters = [
+            {
+                'lat': round(float(level['lat'][i]), 6),
+                'lng': round(float(level['lng'][i]), 6),
+                'count': int(level['count'][i]),
+                'min_predicted_wait': self._wait_or_none(level['min_wait'][i]),
+            }
+            for i in sel.tolist()
+        ]
+        return {'zoom': zoom, 'clusters': clusters, 'stations': []}
+
+    @staticmethod
+    def _wait_or_none(value) -> Optional[float]:
+        return round(float(value), 2) if np.isfinite(value) else None
+
+    def __len__(self):
+        return len(self.lats)
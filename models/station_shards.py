@@ -0,0 +1,155 @@
+import json
+import math
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+from models import geohash
+from models.location_optimizer import LocationOptimizer
+from models.metrics import metrics
+from models.station_snapshot import StationSnapshot
+
+# Rough resident size of one station: parsed dict, optimizer record, index entry
+STATION_BYTES_ESTIMATE = 2048
+
+
+class ShardedStationStore:
+    """Station data split into geohash-prefix shards, loaded on demand.
+
+    ``<shard_dir>/index.json`` (written by scripts/build_station_shards.py)
+    lists the shards: ``{"precision": 3, "shards": {"ttn": {"file": "ttn.csv",
+    "count": 812}, ...}}``. A shard is parsed into a StationSnapshot the first
+    time a query touches it. Shards are evicted least recently used once
+    their estimated size passes ``memory_budget_mb``. A radius query visits
+    every shard whose cell intersects the query's bbox, so results near a
+    shard border include the neighbouring shard's stations.
+    """
+
+    def __init__(self, shard_dir: str, parse: Callable[[str], Dict], memory_budget_mb: float = 256.0):
+        self.shard_dir = shard_dir
+        self.parse = parse
+        self.memory_budget = memory_budget_mb * 1024 * 1024
+        index_path = os.path.join(shard_dir, 'index.json')
+        with open(index_path, 'r', encoding='utf-8') as f:
+            index = json.load(f)
+        self.precision = int(index['precision'])
+        self.shards = index['shards']
+        self.version = format(int(os.path.getmtime(index_path) * 1000), 'x')
+        self.bytes = 0
+        self._loaded = OrderedDict()   # prefix -> StationSnapshot
+        self._lock = threading.Lock()
+        self._load_locks = {prefix: threading.Lock() for prefix in self.shards}
+
+    def _shard(self, prefix: str) -> Optional[StationSnapshot]:
+        if prefix not in self.shards:
+            return None
+        with self._lock:
+            snapshot = self._loaded.get(prefix)
+            if snapshot is not None:
+                self._loaded.move_to_end(prefix)
+        metrics.cache_result('station_shard', snapshot is not None)
+        if snapshot is not None:
+            return snapshot
+
+        # One loader per shard; other shards stay queryable meanwhile
+        with self._load_locks[prefix]:
+            with self._lock:
+                snapshot = self._loaded.get(prefix)
+            if snapshot is None:
+                path = os.path.join(self.shard_dir, self.shards[prefix]['file'])
+                data = self.parse(path)
+                data['version'] = self.version
+                snapshot = StationSnapshot(data, path=path)
+                with self._lock:
+                    self._loaded[prefix] = snapshot
+                    self.bytes += len(snapshot) * STATION_BYTES_ESTIMATE
+                    # Evict the least recently used shards, never the one just loaded
+                    while self.bytes > self.memory_budget and len(self._loaded) > 1:
+                        _, evicted = self._loaded.popitem(last=False)
+                        self.bytes -= len(evicted) * STATION_BYTES_ESTIMATE
+                metrics.set_gauge('quickfill_station_shards_loaded', len(self._loaded))
+        return snapshot
+
+    def shards_for_bbox(self, bbox: Dict[str, float]) -> List[str]:
+        height, width = geohash.cell_size(self.precision)
+        cells = ((bbox['max_lat'] - bbox['min_lat']) / height + 2) * ((bbox['max_lng'] - bbox['min_lng']) / width + 2)
+        if cells <= len(self.shards):
+            return [p for p in geohash.cells_in_bbox(bbox, self.precision) if p in self.shards]
+        # Large bboxes: cheaper to test each shard than to enumerate every cell
+        return [p for p in self.shards if self._intersects(geohash.cell_bounds(p), bbox)]
+
+    @staticmethod
+    def _intersects(a: Dict[str, float], b: Dict[str, float]) -> bool:
+        return (a['min_lat'] <= b['max_lat'] and b['min_lat'] <= a['max_lat'] and
+                a['min_lng'] <= b['max_lng'] and b['min_lng'] <= a['max_lng'])
+
+    def files_for_bbox(self, bbox: Dict[str, float]) -> List[str]:
+        """Paths of the shard files intersecting ``bbox``, without loading them"""
+        return [os.path.join(self.shard_dir, self.shards[prefix]['file']) for prefix in self.shards_for_bbox(bbox)]
+
+    def snapshots_for_bbox(self, bbox: Dict[str, float]) -> List[StationSnapshot]:
+        """Loaded snapshots of every shard intersecting ``bbox``"""
+        return [self._shard(prefix) for prefix in self.shards_for_bbox(bbox)]
+
+    @staticmethod
+    def radius_bbox(lat: float, lng: float, radius_km: float) -> Dict[str, float]:
+        dlat = radius_km / 111.0
+        dlng = radius_km / (111.0 * max(math.cos(math.radians(lat)), 0.01))
+        return {'min_lat': max(lat - dlat, -90.0), 'max_lat': min(lat + dlat, 90.0),
+                'min_lng': max(lng - dlng, -180.0), 'max_lng': min(lng + dlng, 180.0)}
+
+    def within(self, lat: float, lng: float, radius_km: float) -> List[Tuple[Dict, float]]:
+        """(station, km) pairs within ``radius_km``, fanning out across shard borders"""
+        result = []
+        for snapshot in self.snapshots_for_bbox(self.radius_bbox(lat, lng, radius_km)):
+            idx, dist = snapshot.within(lat, lng, radius_km)
+            result.extend(zip([snapshot.stations[i] for i in idx.tolist()], dist.tolist()))
+        return result
+
+    def nearest(self, lat: float, lng: float, k: int) -> List[Tuple[Dict, float]]:
+        """The ``k`` nearest (station, km) pairs, widening the search shard ring by ring"""
+        height, _ = geohash.cell_size(self.precision)
+        radius_km = height * 111.0
+        while True:
+            found = sorted(self.within(lat, lng, radius_km), key=lambda p: p[1])
+            # Past half the earth's circumference every shard has been searched
+            if len(found) >= k or radius_km > 20040.0:
+                return found[:k]
+            radius_km *= 2
+
+    def stations_in_bbox(self, bbox: Dict[str, float]) -> List[Dict]:
+        """All stations of the shards intersecting ``bbox`` (a superset of the bbox)"""
+        return [s for snapshot in self.snapshots_for_bbox(bbox) for s in snapshot.stations]
+
+    def optimizer_for(self, bbox: Dict[str, float]) -> Optional[LocationOptimizer]:
+        """LocationOptimizer over the queueing data of the shards intersecting ``bbox``"""
+        existing = []
+        for snapshot in self.snapshots_for_bbox(bbox):
+            if snapshot.optimizer is not None:
+                existing.extend(snapshot.optimizer.existing_stations)
+        if not existing:
+            return None
+        optimizer = LocationOptimizer()
+        optimizer.existing_stations = existing
+        return optimizer
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {'shards': len(self.shards), 'loaded': list(self._loaded),
+                    'estimated_mb': round(self.bytes / 1024 / 1024, 1),
+                    'budget_mb': round(self.memory_budget / 1024 / 1024, 1)}
+
+
+def load_station_shards(shard_dir: Optional[str], parse: Callable[[str], Dict],
+                        memory_budget_mb: float = 256.0) -> Optional[ShardedStationStore]:
+    """Open a shard directory, or None to keep serving the single station file"""
+    if not shard_dir or not os.path.exists(os.path.join(shard_dir, 'index.json')):
+        return None
+    try:
+        store = ShardedStationStore(shard_dir, parse, memory_budget_mb)
+        print(f"Station shards: {len(store.shards)} at geohash precision {store.precision} in {shard_dir}")
+        return store
+    except Exception as e:
+        print(f"Error opening station shards in {shard_dir}: {e}")
+        return None
@@ -0,0 +1,157 @@
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+from models.location_optimizer import LocationOptimizer
+
+EARTH_RADIUS_KM = 6371.0
+
+
+def _unit_vectors(lats, lngs) -> np.ndarray:
+    lat, lng = np.radians(lats), np.radians(lngs)
+    return np.column_stack([np.cos(lat) * np.cos(lng), np.cos(lat) * np.sin(lng), np.sin(lat)])
+
+
+class StationSnapshot:
+    """One immutable version of the station data.
+
+    Holds the parsed file (``data``: the ``{'stations', 'version'}`` dict
+    the API serves), coordinate arrays, a KD-tree over unit vectors for
+    exact great-circle radius queries, and a LocationOptimizer with the
+    queueing features when the file has them. Nothing is modified after
+    construction, so readers can use a snapshot without locks.
+    """
+
+    def __init__(self, data: Dict, path: Optional[str] = None, file_key: Optional[Tuple] = None):
+        self.data = data
+        self.path = path
+        self.file_key = file_key
+        self.version = data.get('version')
+        self.error = data.get('error')
+        stations = data.get('stations', [])
+        self.lats = np.array([s['position']['lat'] for s in stations], dtype=float)
+        self.lngs = np.array([s['position']['lng'] for s in stations], dtype=float)
+        self._tree = cKDTree(_unit_vectors(self.lats, self.lngs)) if len(stations) else None
+        self.optimizer = None
+        if path and path.endswith('.csv') and len(stations):
+            optimizer = LocationOptimizer(path)
+            self.optimizer = optimizer if optimizer.existing_stations else None
+
+    @property
+    def stations(self) -> List[Dict]:
+        return self.data.get('stations', [])
+
+    def within(self, lat: float, lng: float, radius_km: float) -> Tuple[np.ndarray, np.ndarray]:
+        """Indices (file order) and great-circle km of stations within ``radius_km``"""
+        if self._tree is None:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        # Chord length equivalent to the arc radius makes the ball query exact
+        chord = 2 * np.sin(min(radius_km / EARTH_RADIUS_KM, np.pi) / 2)
+        idx = np.sort(np.asarray(self._tree.query_ball_point(_unit_vectors([lat], [lng])[0], chord),
+                                 dtype=np.int64))
+        dlat = np.radians(self.lats[idx] - lat)
+        dlng = np.radians(self.lngs[idx] - lng)
+        a = np.sin(dlat / 2) ** 2 + np.cos(np.radians(lat)) * np.cos(np.radians(self.lats[idx])) * np.sin(dlng / 2) ** 2
+        dist = 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+        keep = dist <= radius_km
+        return idx[keep], dist[keep]
+
+    def __len__(self):
+        return len(self.lats)
+
+
+class SnapshotStore:
+    """Publishes the current StationSnapshot and rebuilds it when the file changes.
+
+    ``current`` is a plain attribute read. A background thread polls the
+    file's (path, mtime, size), waits until it has been stable for one poll
+    (so a file still being copied is not read), builds the new snapshot off
+    the request path and publishes it with a single reference assignment.
+    Requests already holding the old snapshot finish with it.
+    """
+
+    def __init__(self, resolve_path: Callable[[], Optional[str]], parse: Callable[[str], Dict],
+                 poll_interval: float = 30.0):
+        self.resolve_path = resolve_path
+        self.parse = parse
+        self.poll_interval = poll_interval
+        self.current = None
+        self.reloads = 0
+        self._build_lock = threading.Lock()
+        self._watcher = None
+        self._watcher_pid = None
+        self._pending_key = None
+        self._failed_key = None
+
+    def _file_key(self) -> Optional[Tuple]:
+        path = self.resolve_path()
+        if not path:
+            return None
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return (path, stat.st_mtime, stat.st_size)
+
+    def build(self, key: Optional[Tuple]) -> StationSnapshot:
+        if key is None:
+            return StationSnapshot({'error': 'Stations file not found', 'stations': []})
+        data = self.parse(key[0])
+        if not data.get('error'):
+            data['version'] = format(int(key[1] * 1000), 'x')
+        return StationSnapshot(data, path=key[0], file_key=key)
+
+    def get(self) -> StationSnapshot:
+        """The current snapshot; the first call in a process loads it synchronously"""
+        snapshot = self.current
+        if snapshot is None:
+            with self._build_lock:
+                if self.current is None:
+                    self.current = self.build(self._file_key())
+                snapshot = self.current
+        return snapshot
+
+    def reload_if_changed(self) -> bool:
+        """Rebuild and publish if the file changed and has settled; True when swapped"""
+        key = self._file_key()
+        current = self.current
+        if current is not None and key in (current.file_key, self._failed_key):
+            self._pending_key = None
+            return False
+        if current is not None and key != self._pending_key:
+            # First sighting of a change: wait one more poll for the write to finish
+            self._pending_key = key
+            return False
+        with self._build_lock:
+            started = time.perf_counter()
+            snapshot = self.build(key)
+            if snapshot.error and current is not None and not current.error:
+                print(f"Station snapshot reload failed, keeping {current.version}: {snapshot.error}")
+                self._failed_key = key
+                return False
+            self.current = snapshot   # the atomic publish
+            self.reloads += 1
+        self._pending_key = None
+        print(f"Station snapshot {snapshot.version} published ({len(snapshot)} stations, "
+              f"built in {time.perf_counter() - started:.2f}s)")
+        return True
+
+    def start_watching(self):
+        """Start the polling thread once per process (threads do not survive a fork)"""
+        if self.poll_interval <= 0 or self._watcher_pid == os.getpid():
+            return
+        self._watcher_pid = os.getpid()
+        self._watcher = threading.Thread(target=self._watch, name='station-snapshot-watcher', daemon=True)
+        self._watcher.start()
+
+    def _watch(self):
+        while True:
+            time.sleep(self.poll_interval)
+            try:
+                self.reload_if_changed()
+            except Exception as e:
+                print(f"Station snapshot watcher error: {e}")
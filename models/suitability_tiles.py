@@ -0,0 +1,105 @@
+import json
+import math
+import os
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from models.location_optimizer import LocationOptimizer, LocationScenario
+
+SCORE_LAYERS = ('total_score', 'demand_score', 'accessibility_score', 'economic_score', 'competition_score')
+
+
+def lnglat_to_tile(lng: float, lat: float, zoom: int) -> Tuple[int, int]:
+    """Slippy-map (Web Mercator) tile containing a point"""
+    n = 1 << zoom
+    lat = max(min(lat, 85.05112878), -85.05112878)
+    x = int((lng + 180.0) / 360.0 * n)
+    y = int((1.0 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2.0 * n)
+    return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+
+def tile_bounds(zoom: int, x: int, y: int) -> Dict[str, float]:
+    """Geographic bbox of a tile"""
+    n = 1 << zoom
+
+    def lat_at(v):
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * v / n))))
+
+    return {'min_lng': x / n * 360.0 - 180.0, 'max_lng': (x + 1) / n * 360.0 - 180.0,
+            'min_lat': lat_at(y + 1), 'max_lat': lat_at(y)}
+
+
+def tiles_for_bbox(bbox: Dict[str, float], zoom: int) -> List[Tuple[int, int]]:
+    x0, y0 = lnglat_to_tile(bbox['min_lng'], bbox['max_lat'], zoom)
+    x1, y1 = lnglat_to_tile(bbox['max_lng'], bbox['min_lat'], zoom)
+    return [(x, y) for x in range(x0, x1 + 1) for y in range(y0, y1 + 1)]
+
+
+def tile_cell_centers(zoom: int, x: int, y: int, resolution: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Lat/lng of the ``resolution x resolution`` cell centres of a tile, rows north to south"""
+    n = float(1 << zoom)
+    offsets = (np.arange(resolution) + 0.5) / resolution
+    lngs = (x + offsets) / n * 360.0 - 180.0
+    lats = np.degrees(np.arctan(np.sinh(np.pi * (1 - 2 * (y + offsets) / n))))
+    grid_lat, grid_lng = np.meshgrid(lats, lngs, indexing='ij')
+    return grid_lat.ravel(), grid_lng.ravel()
+
+
+def score_tile(optimizer: LocationOptimizer, zoom: int, x: int, y: int, resolution: int,
+               time_info: Dict, area_type: str = 'Office') -> Dict[str, np.ndarray]:
+    """LocationOptimizer scores for every cell of a tile.
+
+    The cells become the candidates of a LocationScenario, so every score is
+    the one ``optimize_station_locations`` would give a candidate at that
+    point with ``area_type``, computed in one vectorized pass per station.
+    """
+    lats, lngs = tile_cell_centers(zoom, x, y, resolution)
+    candidates = [{'lat': la, 'lng': ln, 'area_type': area_type, 'distance_from_center': 0.0}
+                  for la, ln in zip(lats.tolist(), lngs.tolist())]
+    scenario = LocationScenario(optimizer, candidates, optimizer.existing_stations, time_info)
+    return {k: scenario.scores[k].astype(np.float32).reshape(resolution, resolution) for k in SCORE_LAYERS}
+
+
+class SuitabilityTileStore:
+    """On-disk store of scored tiles: ``<root>/<z>/<x>/<y>.npz`` plus ``metadata.json``
+    describing the run (resolution, time of day, station file version)."""
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def path(self, zoom: int, x: int, y: int) -> str:
+        return os.path.join(self.root, str(zoom), str(x), f"{y}.npz")
+
+    def has(self, zoom: int, x: int, y: int) -> bool:
+        return os.path.exists(self.path(zoom, x, y))
+
+    def write(self, zoom: int, x: int, y: int, layers: Dict[str, np.ndarray]):
+        """Write a tile atomically, so an interrupted run never leaves a partial one"""
+        path = self.path(zoom, x, y)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            np.savez_compressed(f, **layers)
+        os.replace(tmp_path, path)
+
+    def read(self, zoom: int, x: int, y: int) -> Optional[Dict[str, np.ndarray]]:
+        try:
+            with np.load(self.path(zoom, x, y)) as data:
+                return {k: data[k] for k in data.files}
+        except OSError:
+            return None
+
+    def metadata(self) -> Optional[Dict]:
+        try:
+            with open(os.path.join(self.root, 'metadata.json'), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def write_metadata(self, metadata: Dict):
+        os.makedirs(self.root, exist_ok=True)
+        path = os.path.join(self.root, 'metadata.json')
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(metadata, f, indent=2)
+        os.replace(path + '.tmp', path)
@@ -1,18 +1,42 @@
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.preprocessing import StandardScaler
+from sklearn.base import clone
 import numpy as np
 import pandas as pd
-from datetime import datetime
+import threading
+from collections import deque
+from datetime import datetime, timedelta
+from models.metrics import metrics
 
 class WaitTimePredictor:
-    def __init__(self):
-        self.model = RandomForestRegressor(
-            n_estimators=100,
-            max_depth=10,
-            random_state=42
-        )
+    def __init__(self, observation_buffer_size: int = 50000, model_factory=None):
+        # Callable returning an unfitted regressor; the model registry / training
+        # CLI can swap in tuned hyperparameters or a different estimator
+        self.model_factory = model_factory or self.default_model
+        self.model = self._new_model()
         self.scaler = StandardScaler()
         self.is_trained = False
+        # (scaler, model, version) published together so readers never pair a
+        # new scaler with an old model; replaced by a single reference swap
+        self._fitted = None
+        self.model_version = 0
+        self._leaf_table = None  # (version, concatenated leaf values, per-tree offsets)
+        self._base_training = None  # (X, y) from the last offline train() or registry bundle
+        self._loaded_without_training = False
+
+        # Online learning state
+        self.observations = deque(maxlen=observation_buffer_size)
+        self._observations_lock = threading.Lock()
+        self._station_avg_wait = {}
+        self._learner_thread = None
+        self._learner_stop = threading.Event()
+        self.online_stats = {'observations': 0, 'refits': 0, 'last_refit': None, 'last_refit_samples': 0,
+                             'skipped_refits': 0}
+
+        # forecast() results, valid until the top of the next hour
+        self._forecast_cache = {}
+        self._forecast_cache_lock = threading.Lock()
+        self.forecast_cache_size = 256
         self.feature_columns = [
             'active_chargers',
             'total_chargers',
@@ -41,15 +65,48 @@ class WaitTimePredictor:
             features.append(feature_vector)
         return np.array(features)
 
+    @staticmethod
+    def default_model():
+        return RandomForestRegressor(
+            n_estimators=100,
+            max_depth=10,
+            random_state=42
+        )
+
+    def _new_model(self):
+        return self.model_factory()
+
+    def _publish(self, scaler, model):
+        """Atomically swap in a fitted scaler/model pair"""
+        self.model_version += 1
+        self._fitted = (scaler, model, self.model_version)
+        self.scaler = scaler
+        self.model = model
+        self.is_trained = True
+
     def train(self, training_data, wait_times):
         """Train the model with historical data"""
         X = self._prepare_features(training_data)
-        X_scaled = self.scaler.fit_transform(X)
-        self.model.fit(X_scaled, wait_times)
-        self.is_trained = True
+        y = np.asarray(wait_times, dtype=float)
+        scaler = StandardScaler()
+        model = self._new_model()
+        model.fit(scaler.fit_transform(X), y)
+        self._base_training = (X, y)
+        self._loaded_without_training = False
+        self._publish(scaler, model)
 
     def train_from_csv(self, file_path: str):
         """Train model from a CSV file with flexible column names."""
+        records, waits, _ = self.load_training_data(file_path)
+        self.train(records, waits)
+        return True
+
+    def load_training_data(self, file_path: str):
+        """Read a training CSV/Excel file into (records, waits, timestamps).
+
+        ``timestamps`` is a pandas Series when the file has a timestamp column
+        (used for time-ordered cross-validation), otherwise None.
+        """
         try:
             df = pd.read_csv(file_path)
         except Exception:
@@ -93,25 +150,175 @@ class WaitTimePredictor:
             records.append(record)
             waits.append(float(row[target_col]))
 
-        self.train(records, waits)
-        return True
+        ts_col = get_col('timestamp', 'observed_at', 'datetime', 'time')
+        timestamps = pd.to_datetime(df[ts_col], errors='coerce') if ts_col is not None else None
+        return records, waits, timestamps
 
-    def predict_wait_time(self, station_data):
-        """Predict waiting times for stations"""
-        if not self.is_trained:
+    def load_fitted(self, scaler, model, training=None):
+        """Publish an externally fitted scaler/model pair (e.g. from the model registry).
+
+        ``training`` is the (X, y) the pair was fitted on; online refits blend
+        it with recent reports. Without it, online refits are skipped so they
+        cannot replace the offline model with one fitted on reports alone.
+        """
+        self.model_factory = lambda: clone(model)
+        if training is not None:
+            X, y = training
+            self._base_training = (np.asarray(X, dtype=float), np.asarray(y, dtype=float))
+        else:
+            self._base_training = None
+        self._loaded_without_training = training is None
+        self._publish(scaler, model)
+
+    def load_from_registry(self, registry, name: str = 'wait_time', version: str = None) -> dict:
+        """Load a registered model; returns its metadata"""
+        bundle, metadata = registry.load(name, version)
+        self.load_fitted(bundle['scaler'], bundle['model'], bundle.get('training'))
+        return metadata
+
+    def predict_wait_time(self, station_data, quantiles=None):
+        """Predict waiting times for stations.
+
+        With ``quantiles`` (e.g. ``(0.1, 0.9)``) each prediction also gets a
+        ``quantiles`` dict such as ``{'p10': .., 'p90': ..}`` taken from the
+        spread of the individual trees' predictions.
+        """
+        fitted = self._fitted
+        if fitted is None:
             # If model isn't trained, use a simple heuristic
             return self._heuristic_prediction(station_data)
+        if not station_data:
+            return []
+        scaler, model, version = fitted
         
-        X = self._prepare_features(station_data)
-        X_scaled = self.scaler.transform(X)
-        predictions = self.model.predict(X_scaled)
+        with metrics.span('feature_prepare'):
+            X = self._prepare_features(station_data)
+            X_scaled = scaler.transform(X)
+        with metrics.span('forest_inference'):
+            # Intervals need per-tree outputs, i.e. a bagged forest
+            quantiles = quantiles if hasattr(model, 'estimators_') else None
+            if quantiles:
+                per_tree = self._per_tree_predictions(model, version, X_scaled)
+                predictions = per_tree.mean(axis=1)
+                bounds = np.maximum(np.quantile(per_tree, quantiles, axis=1), 0)
+            else:
+                predictions = model.predict(X_scaled)
         
-        return [{
+        results = [{
             'station_id': station['id'],
             'predicted_wait': max(0, pred),  # Ensure non-negative wait times
             'confidence': self._calculate_confidence(station)
         } for station, pred in zip(station_data, predictions)]
 
+        if quantiles:
+            labels = [f"p{round(q * 100):g}" for q in quantiles]
+            for i, result in enumerate(results):
+                result['quantiles'] = {label: float(bounds[j, i]) for j, label in enumerate(labels)}
+        return results
+
+    def _per_tree_predictions(self, model, version, X_scaled):
+        """(n_samples, n_trees) matrix of individual tree predictions.
+
+        ``model.apply`` returns every tree's leaf index for every row in one
+        call; the leaf values of all trees are concatenated once per fitted
+        model, so the lookup is a single fancy-indexing gather.
+        """
+        table = self._leaf_table
+        if table is None or table[0] != version:
+            trees = [est.tree_ for est in model.estimators_]
+            values = np.concatenate([t.value[:, 0, 0] for t in trees])
+            offsets = np.cumsum([0] + [t.node_count for t in trees[:-1]])
+            table = self._leaf_table = (version, values, offsets)
+        leaves = model.apply(X_scaled)
+        return table[1][leaves + table[2]]
+
+    # Feature defaults used for forecasting when a station has no live data
+    FORECAST_DEFAULTS = {
+        'active_chargers': 1,
+        'total_chargers': 2,
+        'current_queue_length': 1,
+        'traffic_density': 0.5,
+        'historical_avg_wait_time': 10.0
+    }
+
+    def forecast(self, station_ids, start: datetime = None, hours: int = 24, station_features: dict = None):
+        """Predict waits for every station at every hour from ``start``.
+
+        Builds the full (stations x hours x features) tensor at once and runs
+        a single batched prediction. Returns ``(hour_starts, matrix)`` where
+        ``matrix[i, h]`` is the wait at station ``station_ids[i]`` in hour
+        ``h``. Results are cached until the top of the next hour.
+        """
+        start = (start or datetime.now()).replace(minute=0, second=0, microsecond=0)
+        station_ids = list(station_ids)
+        hour_starts = [start + timedelta(hours=h) for h in range(hours)]
+        if not station_ids or hours <= 0:
+            return hour_starts, np.zeros((len(station_ids), max(hours, 0)))
+
+        fitted = self._fitted
+        model_version = fitted[2] if fitted is not None else 0
+        frozen_features = tuple(sorted(
+            (sid, tuple(sorted(feats.items()))) for sid, feats in (station_features or {}).items()
+        ))
+        # Reported waits move the per-station averages the features use, so they are part of the key
+        with self._observations_lock:
+            avg_waits = tuple(self._station_avg_wait.get(sid) for sid in station_ids)
+        key = (tuple(station_ids), start, hours, model_version, frozen_features, avg_waits)
+        now = datetime.now()
+        with self._forecast_cache_lock:
+            cached = self._forecast_cache.get(key)
+        if cached is not None and now < cached[0]:
+            metrics.cache_result('wait_forecast', True)
+            return hour_starts, cached[1]
+        metrics.cache_result('wait_forecast', False)
+
+        # Per-station columns (n, 1) broadcast against per-hour columns (1, h)
+        station_features = station_features or {}
+        n = len(station_ids)
+        static = np.empty((n, 5))
+        for i, (sid, avg_wait) in enumerate(zip(station_ids, avg_waits)):
+            feats = station_features.get(sid, {})
+            static[i] = [
+                feats.get('active_chargers', self.FORECAST_DEFAULTS['active_chargers']),
+                feats.get('total_chargers', self.FORECAST_DEFAULTS['total_chargers']),
+                feats.get('current_queue_length', self.FORECAST_DEFAULTS['current_queue_length']),
+                feats.get('traffic_density', self.FORECAST_DEFAULTS['traffic_density']),
+                feats.get('historical_avg_wait_time',
+                          self.FORECAST_DEFAULTS['historical_avg_wait_time'] if avg_wait is None else avg_wait),
+            ]
+        hour_of_day = np.array([t.hour for t in hour_starts], dtype=float)
+        day_of_week = np.array([t.weekday() for t in hour_starts], dtype=float)
+        is_weekend = (day_of_week >= 5).astype(float)
+
+        X = np.empty((n, hours, len(self.feature_columns)))
+        X[:, :, 0] = static[:, [0]]
+        X[:, :, 1] = static[:, [1]]
+        X[:, :, 2] = static[:, [2]]
+        X[:, :, 3] = hour_of_day
+        X[:, :, 4] = day_of_week
+        X[:, :, 5] = is_weekend
+        X[:, :, 6] = static[:, [3]]
+        X[:, :, 7] = static[:, [4]]
+        X = X.reshape(n * hours, -1)
+
+        with metrics.span('forecast_inference'):
+            if fitted is None:
+                active, queue, hist = X[:, 0], X[:, 2], X[:, 7]
+                waits = np.where(active == 0, hist, ((queue * 20) / np.maximum(active, 1) + hist) / 2)
+            else:
+                scaler, model, _ = fitted
+                waits = model.predict(scaler.transform(X))
+        matrix = np.maximum(waits, 0).reshape(n, hours)
+
+        expires = now.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+        with self._forecast_cache_lock:
+            for k in [k for k, v in self._forecast_cache.items() if v[0] <= now]:
+                del self._forecast_cache[k]
+            if len(self._forecast_cache) >= self.forecast_cache_size:
+                self._forecast_cache.pop(next(iter(self._forecast_cache)))
+            self._forecast_cache[key] = (expires, matrix)
+        return hour_starts, matrix
+
     def _heuristic_prediction(self, station_data):
         """Simple heuristic for wait time prediction when model isn't trained"""
         predictions = []
@@ -150,4 +357,113 @@ class WaitTimePredictor:
         }
         
         confidence = sum(factor * weights[name] for name, factor in factors.items())
-        return min(1.0, max(0.0, confidence)) 
\ No newline at end of file
+        return min(1.0, max(0.0, confidence)) 
+
+    # ------------------------------------------------------------------
+    # Online learning from observed waits
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _local_naive(timestamp) -> datetime:
+        """Timestamp as naive local time, the clock refits compare against.
+
+        Accepts datetimes, ISO 8601 strings (offsets such as +05:30 are
+        converted) and epoch seconds; raises ValueError for anything else.
+        """
+        try:
+            if not isinstance(timestamp, datetime):
+                timestamp = (datetime.fromtimestamp(float(timestamp))
+                             if isinstance(timestamp, (int, float)) else datetime.fromisoformat(str(timestamp)))
+            if timestamp.tzinfo is not None:
+                timestamp = timestamp.astimezone().replace(tzinfo=None)
+        except (OverflowError, OSError) as e:
+            raise ValueError(f'Unusable timestamp {timestamp!r}: {e}') from e
+        return timestamp
+
+    def ingest_observation(self, station_id, timestamp, wait_minutes: float, features: dict = None):
+        """Record one observed wait; the oldest reports fall out of the bounded buffer.
+
+        Time features come from the timestamp, historical_avg_wait_time from a
+        per-station running average of reports, and anything else from
+        ``features`` or the same defaults the app uses for live predictions.
+        """
+        timestamp = self._local_naive(timestamp)
+        wait_minutes = max(0.0, float(wait_minutes))
+        features = features or {}
+
+        with self._observations_lock:
+            prev = self._station_avg_wait.get(station_id)
+            avg = wait_minutes if prev is None else 0.8 * prev + 0.2 * wait_minutes
+            self._station_avg_wait[station_id] = avg
+            record = {
+                'active_chargers': float(features.get('active_chargers', 1)),
+                'total_chargers': float(features.get('total_chargers', 2)),
+                'current_queue_length': float(features.get('current_queue_length', 0)),
+                'hour_of_day': timestamp.hour,
+                'day_of_week': timestamp.weekday(),
+                'is_weekend': 1 if timestamp.weekday() >= 5 else 0,
+                'traffic_density': float(features.get('traffic_density', 0.5)),
+                'historical_avg_wait_time': float(features.get('historical_avg_wait_time', prev if prev is not None else avg)),
+            }
+            self.observations.append((timestamp, record, wait_minutes))
+            self.online_stats['observations'] += 1
+
+    def refit_from_observations(self, window: timedelta = timedelta(hours=6), min_samples: int = 50,
+                                recent_weight: float = 5.0, now: datetime = None) -> bool:
+        """Refit on the sliding window of reports (plus the offline data, down-weighted) and swap it in.
+
+        Fitting happens on private objects; predict_wait_time keeps using the
+        current model until the new pair is published. Returns True on refit.
+        """
+        now = now or datetime.now()
+        if self._loaded_without_training:
+            # Refitting on reports alone would forget the loaded model
+            self.online_stats['skipped_refits'] += 1
+            return False
+        with self._observations_lock:
+            recent = [(rec, wait) for ts, rec, wait in self.observations if now - ts <= window]
+        if len(recent) < min_samples:
+            return False
+
+        X_recent = self._prepare_features([rec for rec, _ in recent])
+        y_recent = np.array([wait for _, wait in recent], dtype=float)
+        weights = np.full(len(y_recent), recent_weight)
+        if self._base_training is not None:
+            X_base, y_base = self._base_training
+            X = np.vstack([X_base, X_recent])
+            y = np.concatenate([y_base, y_recent])
+            weights = np.concatenate([np.ones(len(y_base)), weights])
+        else:
+            X, y = X_recent, y_recent
+
+        scaler = StandardScaler()
+        model = self._new_model()
+        with metrics.span('online_refit'):
+            model.fit(scaler.fit_transform(X), y, sample_weight=weights)
+        self._publish(scaler, model)
+        self.online_stats['refits'] += 1
+        self.online_stats['last_refit'] = now.isoformat()
+        self.online_stats['last_refit_samples'] = len(y_recent)
+        return True
+
+    def start_online_learning(self, interval_seconds: float = 900, window: timedelta = timedelta(hours=6),
+                              min_samples: int = 50):
+        """Start the background refit thread (idempotent, one per process)"""
+        if self._learner_thread is not None and self._learner_thread.is_alive():
+            return
+        self._learner_stop.clear()
+
+        def run():
+            while not self._learner_stop.wait(interval_seconds):
+                try:
+                    self.refit_from_observations(window=window, min_samples=min_samples)
+                except Exception as e:
+                    print(f"Online wait time refit failed: {e}")
+
+        self._learner_thread = threading.Thread(target=run, name='wait-time-learner', daemon=True)
+        self._learner_thread.start()
+
+    def stop_online_learning(self):
+        self._learner_stop.set()
+        if self._learner_thread is not None:
+            self._learner_thread.join()
+            self._learner_thread = None
@@ -0,0 +1,32 @@
+import sys
+import os
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.road_network import RoadGraph
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Convert an OSM extract (.osm.pbf) into the compact CSR road graph the app loads "
+                    "(set QUICKFILL_ROAD_GRAPH to the output file).")
+    parser.add_argument("input_pbf", help="e.g. delhi.osm.pbf from a Geofabrik/BBBike extract")
+    parser.add_argument("output_npz", help="output graph, e.g. road_graph.npz")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.input_pbf):
+        print(f"Input file not found: {args.input_pbf}")
+        return 1
+
+    started = time.perf_counter()
+    graph = RoadGraph.from_osm_pbf(args.input_pbf)
+    graph.save(args.output_npz)
+    print(f"Wrote {len(graph)} nodes / {len(graph.indices)} edges to {args.output_npz} "
+          f"in {time.perf_counter() - started:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
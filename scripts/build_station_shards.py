@@ -0,0 +1,70 @@
+"""Split a station CSV into geohash-prefix shards for ShardedStationStore.
+
+    python scripts/build_station_shards.py
+    python scripts/build_station_shards.py --stations india_cng_pumps.csv --out station_shards --precision 3
+
+Each station goes to <out>/<prefix>.csv, where <prefix> is the geohash of its
+position at --precision (3 = cells of about 156 x 156 km). <out>/index.json
+lists the shards with their station counts and bounds. Point the app at the
+directory with QUICKFILL_STATION_SHARDS; shards are then loaded only when a
+query touches them.
+"""
+import sys
+import os
+import csv
+import json
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import geohash
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_STATIONS = os.path.join(ROOT, "CNG_pumps_with_Erlang-C_waiting_times_250.csv")
+DEFAULT_OUT = os.path.join(ROOT, "station_shards")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Partition a station CSV into geohash shards.")
+    parser.add_argument("--stations", default=DEFAULT_STATIONS, help="station CSV with @lat/@lon columns")
+    parser.add_argument("--out", default=os.environ.get("QUICKFILL_STATION_SHARDS", DEFAULT_OUT))
+    parser.add_argument("--precision", type=int, default=3, help="geohash prefix length per shard")
+    args = parser.parse_args(argv)
+
+    with open(args.stations, "r", encoding="utf-8", newline="") as f:
+        reader = csv.DictReader(f)
+        fieldnames = reader.fieldnames
+        shards, skipped = {}, 0
+        for row in reader:
+            try:
+                lat, lng = float(row["@lat"]), float(row["@lon"])
+            except (KeyError, TypeError, ValueError):
+                skipped += 1
+                continue
+            shards.setdefault(geohash.encode(lat, lng, args.precision), []).append(row)
+
+    os.makedirs(args.out, exist_ok=True)
+    index = {"precision": args.precision, "source": os.path.basename(args.stations), "shards": {}}
+    for prefix, rows in sorted(shards.items()):
+        name = f"{prefix}.csv"
+        tmp = os.path.join(args.out, name + ".tmp")
+        with open(tmp, "w", encoding="utf-8", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=fieldnames)
+            writer.writeheader()
+            writer.writerows(rows)
+        os.replace(tmp, os.path.join(args.out, name))
+        index["shards"][prefix] = {"file": name, "count": len(rows), "bbox": geohash.cell_bounds(prefix)}
+
+    # The index goes last: the app only sees the new shards once it is complete
+    tmp = os.path.join(args.out, "index.json.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(index, f, indent=2)
+    os.replace(tmp, os.path.join(args.out, "index.json"))
+
+    total = sum(len(rows) for rows in shards.values())
+    print(f"Wrote {total} stations in {len(shards)} shards to {args.out} (skipped {skipped} without coordinates)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,9 +1,14 @@
 import sys
 import os
 import json
+import argparse
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
 import requests
 import pandas as pd
-from shapely.geometry import Point, shape
+import shapely
+from shapely.geometry import shape
 from shapely.ops import unary_union
 
 
@@ -11,57 +16,146 @@ NE_LAND_GEOJSON_URL = (
     "https://raw.githubusercontent.com/nvkelso/natural-earth-vector/master/geojson/ne_110m_land.geojson"
 )
 
+DEFAULT_CACHE_PATH = os.path.join(
+    os.path.expanduser("~"), ".cache", "quickfill", "ne_110m_land.geojson"
+)
+DEFAULT_CHUNK_SIZE = 200_000
+
+LAT_CANDIDATES = ["lat", "latitude", "@lat"]
+LON_CANDIDATES = ["lng", "lon", "long", "longitude", "@lon"]
+
+# Per-process land geometry, set once by _init_worker (or load_land_union in-process)
+_LAND = None
+
+
+def ensure_land_geojson(cache_path: str = DEFAULT_CACHE_PATH, offline: bool = False) -> str:
+    """Return a local path to the Natural Earth land GeoJSON, downloading it at most once."""
+    if os.path.exists(cache_path):
+        return cache_path
+    if offline:
+        raise FileNotFoundError(f"Land GeoJSON not cached at {cache_path} and --offline was given")
 
-def load_land_union() -> object:
-    """Download Natural Earth land polygons as GeoJSON and return a unary union geometry."""
     resp = requests.get(NE_LAND_GEOJSON_URL, timeout=60)
     resp.raise_for_status()
-    gj = resp.json()
+    os.makedirs(os.path.dirname(cache_path) or ".", exist_ok=True)
+    tmp_path = cache_path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(resp.content)
+    os.replace(tmp_path, cache_path)
+    return cache_path
+
+
+def load_land_union(geojson_path: str) -> object:
+    """Load land polygons from a local GeoJSON and return a prepared unary union geometry."""
+    with open(geojson_path, "r", encoding="utf-8") as f:
+        gj = json.load(f)
     geoms = []
     for feat in gj.get("features", []):
         geom = feat.get("geometry")
         if geom:
             geoms.append(shape(geom))
     if not geoms:
-        raise RuntimeError("No land polygons loaded from Natural Earth GeoJSON")
-    return unary_union(geoms)
-
+        raise RuntimeError(f"No land polygons loaded from {geojson_path}")
+    land = unary_union(geoms)
+    shapely.prepare(land)
+    return land
 
-def filter_csv_to_land(input_csv: str, output_csv: str) -> None:
-    df = pd.read_csv(input_csv)
 
-    # Find lat/lon columns robustly
-    lower_cols = {str(c).strip().lower(): c for c in df.columns}
-    lat_col = next((lower_cols[c] for c in ["lat", "latitude", "@lat"] if c in lower_cols), None)
-    lon_col = next((lower_cols[c] for c in ["lng", "lon", "long", "longitude", "@lon"] if c in lower_cols), None)
+def detect_lat_lon_columns(columns) -> tuple:
+    """Find lat/lon columns robustly"""
+    lower_cols = {str(c).strip().lower(): c for c in columns}
+    lat_col = next((lower_cols[c] for c in LAT_CANDIDATES if c in lower_cols), None)
+    lon_col = next((lower_cols[c] for c in LON_CANDIDATES if c in lower_cols), None)
     if not lat_col or not lon_col:
         raise ValueError("Latitude/Longitude columns not found in CSV")
+    return lat_col, lon_col
 
-    land_union = load_land_union()
 
-    def is_on_land(lat_val, lon_val) -> bool:
-        try:
-            lat_f = float(lat_val)
-            lon_f = float(lon_val)
-        except Exception:
-            return False
-        pt = Point(lon_f, lat_f)
-        return land_union.contains(pt) or land_union.touches(pt) or land_union.intersects(pt)
+def land_mask(land, lats, lons) -> np.ndarray:
+    """Vectorized on-land test; non-numeric coordinates are treated as off land."""
+    lats = pd.to_numeric(pd.Series(lats), errors="coerce").to_numpy(dtype=float)
+    lons = pd.to_numeric(pd.Series(lons), errors="coerce").to_numpy(dtype=float)
+    finite = np.isfinite(lats) & np.isfinite(lons)
+    mask = np.zeros(len(lats), dtype=bool)
+    if finite.any():
+        mask[finite] = shapely.contains_xy(land, lons[finite], lats[finite])
+    return mask
 
-    mask = [is_on_land(lat, lon) for lat, lon in zip(df[lat_col], df[lon_col])]
-    cleaned = df[mask].copy()
-    cleaned.to_csv(output_csv, index=False)
 
+def _init_worker(geojson_path: str) -> None:
+    global _LAND
+    _LAND = load_land_union(geojson_path)
 
-if __name__ == "__main__":
-    if len(sys.argv) < 3:
-        print("Usage: python scripts/filter_land_points.py <input_csv> <output_csv>")
-        sys.exit(1)
-    inp = sys.argv[1]
-    out = sys.argv[2]
-    if not os.path.exists(inp):
-        print(f"Input file not found: {inp}")
-        sys.exit(1)
-    filter_csv_to_land(inp, out)
+
+def _filter_chunk(chunk: pd.DataFrame, lat_col: str, lon_col: str) -> pd.DataFrame:
+    return chunk[land_mask(_LAND, chunk[lat_col], chunk[lon_col])]
 
 
+def filter_csv_to_land(input_csv: str, output_csv: str, chunksize: int = DEFAULT_CHUNK_SIZE,
+                       workers: int = 1, cache_path: str = DEFAULT_CACHE_PATH,
+                       offline: bool = False) -> int:
+    """Stream input_csv in chunks, keep rows on land and append them to output_csv.
+
+    With workers > 1 chunks are filtered in a process pool. At most
+    2 * workers chunks are in flight, so memory stays bounded regardless of
+    input size, and output rows keep their input order. Returns the number
+    of rows written.
+    """
+    lat_col, lon_col = detect_lat_lon_columns(pd.read_csv(input_csv, nrows=0).columns)
+    geojson_path = ensure_land_geojson(cache_path, offline=offline)
+    reader = pd.read_csv(input_csv, chunksize=chunksize, dtype=str, keep_default_na=False)
+
+    written = 0
+    header = True
+
+    def write(chunk: pd.DataFrame) -> None:
+        nonlocal written, header
+        chunk.to_csv(output_csv, mode="w" if header else "a", header=header, index=False)
+        header = False
+        written += len(chunk)
+
+    if workers <= 1:
+        _init_worker(geojson_path)
+        for chunk in reader:
+            write(_filter_chunk(chunk, lat_col, lon_col))
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(geojson_path,)) as pool:
+            pending = deque()
+            for chunk in reader:
+                pending.append(pool.submit(_filter_chunk, chunk, lat_col, lon_col))
+                if len(pending) >= 2 * workers:
+                    write(pending.popleft().result())
+            while pending:
+                write(pending.popleft().result())
+
+    if header:
+        # Empty input: still produce a CSV with the original header
+        pd.read_csv(input_csv, nrows=0).to_csv(output_csv, index=False)
+    return written
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Keep only CSV rows whose lat/lon falls on land.")
+    parser.add_argument("input_csv")
+    parser.add_argument("output_csv")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNK_SIZE,
+                        help="rows per chunk (default: %(default)s)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="worker processes; 0 uses all cores (default: %(default)s)")
+    parser.add_argument("--land-geojson", default=DEFAULT_CACHE_PATH,
+                        help="local land GeoJSON, downloaded here once if missing (default: %(default)s)")
+    parser.add_argument("--offline", action="store_true",
+                        help="never download; fail if the land GeoJSON is not cached")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if not os.path.exists(args.input_csv):
+        print(f"Input file not found: {args.input_csv}")
+        sys.exit(1)
+    workers = args.workers if args.workers > 0 else (os.cpu_count() or 1)
+    rows = filter_csv_to_land(args.input_csv, args.output_csv, chunksize=args.chunksize,
+                              workers=workers, cache_path=args.land_geojson, offline=args.offline)
+    print(f"Wrote {rows} rows on land to {args.output_csv}")
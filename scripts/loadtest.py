@@ -0,0 +1,257 @@
+"""Local load generator and request replayer for the QuickFill API.
+
+Sends an open-loop stream of requests at a fixed rate (so a slow server
+cannot slow the generator down and hide its own queueing), spread over a
+pool of logged-in sessions, and reports latency percentiles, throughput and
+error rate per endpoint.
+
+Examples::
+
+    # synthetic mix at 20 req/s for 30 s with 16 concurrent sessions
+    python scripts/loadtest.py --rate 20 --duration 30 --concurrency 16
+
+    # step the rate up to find where one worker saturates
+    python scripts/loadtest.py --rates 5,10,20,40,80 --duration 20
+
+    # save the synthetic mix, then replay exactly the same requests later
+    python scripts/loadtest.py --record mix.jsonl --requests 2000 --dry-run
+    python scripts/loadtest.py --replay mix.jsonl --rate 50
+"""
+import sys
+import json
+import math
+import time
+import random
+import argparse
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, wait
+import requests
+
+
+NCR = {'min_lat': 28.40, 'max_lat': 28.90, 'min_lng': 76.85, 'max_lng': 77.55}
+
+# Endpoint name -> relative weight in the synthetic mix
+DEFAULT_MIX = {
+    'stations-with-wait': 60,
+    'route-plan': 15,
+    'stations-from-file': 20,
+    'optimize-locations': 5,
+}
+
+
+def _random_point(rng: random.Random) -> tuple:
+    return (round(rng.uniform(NCR['min_lat'], NCR['max_lat']), 5),
+            round(rng.uniform(NCR['min_lng'], NCR['max_lng']), 5))
+
+
+def _synthetic_route(rng: random.Random) -> dict:
+    lat, lng = _random_point(rng)
+    n_vertices = rng.choice([50, 200, 1000])
+    length_km = rng.uniform(20, 300)
+    step = length_km / n_vertices / 111.0
+    heading = rng.uniform(0, 2 * math.pi)
+    coords = [[lat, lng]]
+    for _ in range(n_vertices - 1):
+        heading += rng.gauss(0, 0.1)
+        lat += math.cos(heading) * step
+        lng += math.sin(heading) * step
+        coords.append([round(lat, 6), round(lng, 6)])
+    return {'distance': round(length_km, 2), 'coordinates': coords}
+
+
+def synthesize_request(rng: random.Random, mix: dict = None) -> dict:
+    """Build one request description: {'endpoint', 'method', 'path', 'json'}"""
+    mix = mix or DEFAULT_MIX
+    endpoint = rng.choices(list(mix), weights=list(mix.values()))[0]
+    lat, lng = _random_point(rng)
+
+    if endpoint == 'stations-with-wait':
+        radius = rng.choice([2, 5, 10])
+        return {'endpoint': endpoint, 'method': 'GET',
+                'path': f'/api/stations-with-wait/{lat}/{lng}?radius={radius}'}
+    if endpoint == 'stations-from-file':
+        return {'endpoint': endpoint, 'method': 'GET', 'path': '/api/stations-from-file'}
+    if endpoint == 'optimize-locations':
+        radius = rng.choice([5, 10, 20])
+        num_stations = rng.choice([3, 5])
+        return {'endpoint': endpoint, 'method': 'GET',
+                'path': f'/api/optimize-locations/{lat}/{lng}?radius={radius}&num_stations={num_stations}'}
+
+    return {
+        'endpoint': endpoint, 'method': 'POST', 'path': '/api/route-plan',
+        'json': {
+            'route': _synthetic_route(rng),
+            'cngModel': {'name': 'CNG Vehicle', 'tankCapacity': 12, 'range': 250,
+                         'fillingSpeed': 10, 'consumption': 0.08},
+            'currentFuel': rng.choice([30, 60, 100]),
+        },
+    }
+
+
+def load_replay(path: str) -> list:
+    """Read recorded requests (one JSON object per line, same shape as synthesize_request)"""
+    with open(path, 'r', encoding='utf-8') as f:
+        reqs = [json.loads(line) for line in f if line.strip()]
+    for r in reqs:
+        r.setdefault('method', 'GET')
+        r.setdefault('endpoint', r['path'].split('?')[0])
+    return reqs
+
+
+class SessionPool:
+    """One logged-in requests.Session per worker thread."""
+
+    def __init__(self, base_url: str, username: str, password: str, timeout: float):
+        self.base_url = base_url.rstrip('/')
+        self.username = username
+        self.password = password
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def get(self) -> requests.Session:
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            if self.username:
+                resp = session.post(f'{self.base_url}/login', timeout=self.timeout,
+                                    data={'username': self.username, 'password': self.password},
+                                    allow_redirects=False)
+                if resp.status_code not in (200, 302):
+                    raise RuntimeError(f'Login failed with HTTP {resp.status_code}')
+            self._local.session = session
+        return session
+
+
+def _percentile(sorted_values: list, pct: float) -> float:
+    if not sorted_values:
+        return float('nan')
+    k = (len(sorted_values) - 1) * pct / 100.0
+    lo, hi = math.floor(k), math.ceil(k)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+def run_stage(pool: SessionPool, reqs: list, rate: float, concurrency: int) -> dict:
+    """Send reqs open-loop at `rate` req/s and return per-endpoint statistics.
+
+    Latency is measured from each request's scheduled send time, so time
+    spent waiting for a free connection counts against the server.
+    """
+    results = defaultdict(list)   # endpoint -> [(latency_s, ok)]
+    lock = threading.Lock()
+
+    def send(req: dict, scheduled: float):
+        ok = False
+        try:
+            session = pool.get()
+            resp = session.request(req['method'], pool.base_url + req['path'],
+                                   json=req.get('json'), timeout=pool.timeout)
+            ok = resp.status_code < 400
+        except Exception:
+            ok = False
+        latency = time.perf_counter() - scheduled
+        with lock:
+            results[req['endpoint']].append((latency, ok))
+
+    start = time.perf_counter()
+    futures = []
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for i, req in enumerate(reqs):
+            scheduled = start + i / rate
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            futures.append(executor.submit(send, req, scheduled))
+        wait(futures)
+    elapsed = time.perf_counter() - start
+
+    report = {'rate': rate, 'elapsed_s': round(elapsed, 3), 'endpoints': {}}
+    all_latencies, all_errors = [], 0
+    for endpoint, samples in sorted(results.items()):
+        latencies = sorted(s[0] for s in samples)
+        errors = sum(1 for s in samples if not s[1])
+        all_latencies.extend(latencies)
+        all_errors += errors
+        report['endpoints'][endpoint] = _summarize(latencies, errors, elapsed)
+    report['total'] = _summarize(sorted(all_latencies), all_errors, elapsed)
+    return report
+
+
+def _summarize(latencies: list, errors: int, elapsed: float) -> dict:
+    n = len(latencies)
+    return {
+        'requests': n,
+        'throughput_rps': round(n / elapsed, 2) if elapsed > 0 else 0.0,
+        'error_rate': round(errors / n, 4) if n else 0.0,
+        'p50_ms': round(_percentile(latencies, 50) * 1000, 1),
+        'p95_ms': round(_percentile(latencies, 95) * 1000, 1),
+        'p99_ms': round(_percentile(latencies, 99) * 1000, 1),
+    }
+
+
+def print_report(report: dict):
+    print(f"\n=== target {report['rate']} req/s, {report['elapsed_s']} s ===")
+    print(f"{'endpoint':<22}{'reqs':>7}{'rps':>9}{'err%':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    rows = list(report['endpoints'].items()) + [('TOTAL', report['total'])]
+    for endpoint, s in rows:
+        print(f"{endpoint:<22}{s['requests']:>7}{s['throughput_rps']:>9}{s['error_rate'] * 100:>8.2f}"
+              f"{s['p50_ms']:>10}{s['p95_ms']:>10}{s['p99_ms']:>10}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Replay or synthesize API traffic against a local QuickFill server.')
+    parser.add_argument('--base-url', default='http://127.0.0.1:5000')
+    parser.add_argument('--rate', type=float, default=10.0, help='requests per second (default: %(default)s)')
+    parser.add_argument('--rates', help='comma-separated rates to run as consecutive stages, e.g. 5,10,20,40')
+    parser.add_argument('--duration', type=float, default=30.0, help='seconds per stage (default: %(default)s)')
+    parser.add_argument('--requests', type=int, help='requests per stage; overrides --duration')
+    parser.add_argument('--concurrency', type=int, default=16, help='concurrent sessions (default: %(default)s)')
+    parser.add_argument('--timeout', type=float, default=30.0, help='per-request timeout in seconds')
+    parser.add_argument('--username', default='Codex', help='login user; empty string skips login')
+    parser.add_argument('--password', default='codex')
+    parser.add_argument('--replay', help='JSONL file of recorded requests to replay (cycled if too short)')
+    parser.add_argument('--record', help='write the synthesized requests to this JSONL file')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--dry-run', action='store_true', help='only synthesize/record, send nothing')
+    parser.add_argument('--json', dest='json_out', help='write the report(s) to this JSON file')
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    rates = [float(r) for r in args.rates.split(',')] if args.rates else [args.rate]
+    rng = random.Random(args.seed)
+    source = load_replay(args.replay) if args.replay else None
+
+    stages = []
+    for rate in rates:
+        n = args.requests or max(1, int(rate * args.duration))
+        if source:
+            stages.append((rate, [source[i % len(source)] for i in range(n)]))
+        else:
+            stages.append((rate, [synthesize_request(rng) for _ in range(n)]))
+
+    if args.record:
+        with open(args.record, 'w', encoding='utf-8') as f:
+            for _, reqs in stages:
+                for req in reqs:
+                    f.write(json.dumps(req) + '\n')
+        print(f"Recorded {sum(len(r) for _, r in stages)} requests to {args.record}")
+    if args.dry_run:
+        return 0
+
+    pool = SessionPool(args.base_url, args.username, args.password, args.timeout)
+    reports = []
+    for rate, reqs in stages:
+        report = run_stage(pool, reqs, rate, args.concurrency)
+        print_report(report)
+        reports.append(report)
+
+    if args.json_out:
+        with open(args.json_out, 'w', encoding='utf-8') as f:
+            json.dump(reports, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,94 @@
+import sys
+import os
+import re
+import json
+import argparse
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import parse_qs
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.filter_land_points import detect_lat_lon_columns
+
+
+BBOX_RE = re.compile(r'\(\s*(-?[\d.]+)\s*,\s*(-?[\d.]+)\s*,\s*(-?[\d.]+)\s*,\s*(-?[\d.]+)\s*\)')
+
+
+def load_elements(csv_path: str) -> list:
+    """Turn a stations CSV into Overpass-style fuel nodes."""
+    df = pd.read_csv(csv_path)
+    lat_col, lon_col = detect_lat_lon_columns(df.columns)
+    name_col = next((c for c in df.columns if str(c).strip().lower() in ("name", "@name")), None)
+    lats = pd.to_numeric(df[lat_col], errors="coerce")
+    lons = pd.to_numeric(df[lon_col], errors="coerce")
+    names = df[name_col] if name_col is not None else pd.Series([None] * len(df))
+
+    elements = []
+    for i, (lat, lon, name) in enumerate(zip(lats, lons, names), start=1):
+        if pd.isna(lat) or pd.isna(lon):
+            continue
+        tags = {"amenity": "fuel", "fuel:cng": "yes"}
+        if pd.notnull(name):
+            tags["name"] = str(name)
+        elements.append({"type": "node", "id": i, "lat": float(lat), "lon": float(lon), "tags": tags})
+    return elements
+
+
+def make_handler(elements: list):
+    class OverpassStubHandler(BaseHTTPRequestHandler):
+        """Answers bbox fuel queries the way overpass-api.de would."""
+
+        request_count = 0
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            body = self.rfile.read(length).decode("utf-8")
+            if body.startswith("data="):
+                body = parse_qs(body).get("data", [""])[0]
+            type(self).request_count += 1
+
+            match = BBOX_RE.search(body)
+            if not match:
+                self.send_error(400, "Only bbox queries are supported by the stub")
+                return
+            south, west, north, east = map(float, match.groups())
+            hits = [e for e in elements if south <= e["lat"] <= north and west <= e["lon"] <= east]
+
+            payload = json.dumps({"version": 0.6, "generator": "quickfill-overpass-stub", "elements": hits})
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload.encode("utf-8"))
+
+        do_GET = do_POST
+
+        def log_message(self, format, *args):
+            pass
+
+    return OverpassStubHandler
+
+
+def serve(csv_path: str, host: str = "127.0.0.1", port: int = 8089) -> ThreadingHTTPServer:
+    """Create (but do not start) a stub server; call serve_forever() on the result."""
+    return ThreadingHTTPServer((host, port), make_handler(load_elements(csv_path)))
+
+
+if __name__ == "__main__":
+    default_csv = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                               "CNG_pumps_with_Erlang-C_waiting_times_250.csv")
+    parser = argparse.ArgumentParser(
+        description="Local Overpass stand-in. Point the app at it with "
+                    "OVERPASS_URL=http://127.0.0.1:8089/api/interpreter")
+    parser.add_argument("--csv", default=default_csv)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    args = parser.parse_args()
+
+    server = serve(args.csv, args.host, args.port)
+    print(f"Overpass stub serving {args.csv} on http://{args.host}:{args.port}/api/interpreter")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,111 @@
+"""Score a whole region with the LocationOptimizer metrics into a z/x/y tile store.
+
+    python scripts/score_region.py
+    python scripts/score_region.py --bbox 76.8,28.2,77.8,28.95 --zoom 12 --resolution 64 --workers 8
+    python scripts/score_region.py --time-of-day evening --store suitability_tiles/evening
+
+The region is cut into Web Mercator tiles at --zoom. Each tile is scored on a
+--resolution x --resolution grid in a process pool and written to
+<store>/<z>/<x>/<y>.npz. Tiles already in the store are skipped, so an
+interrupted run picks up where it stopped. The app serves the tiles from
+/api/suitability/<z>/<x>/<y> (QUICKFILL_SUITABILITY_STORE).
+"""
+import sys
+import os
+import time
+import argparse
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.location_optimizer import LocationOptimizer
+from models.suitability_tiles import SCORE_LAYERS, SuitabilityTileStore, score_tile, tiles_for_bbox
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_STATIONS = os.path.join(ROOT, "CNG_pumps_with_Erlang-C_waiting_times_250.csv")
+DEFAULT_STORE = os.path.join(ROOT, "suitability_tiles")
+NCR_BBOX = "76.8,28.2,77.8,28.95"
+
+# Per-process optimizer and run settings, set once by _init_worker
+_WORKER = {}
+
+
+def _init_worker(stations_csv, store_root, settings):
+    _WORKER["optimizer"] = LocationOptimizer(stations_csv)
+    _WORKER["store"] = SuitabilityTileStore(store_root)
+    _WORKER["settings"] = settings
+
+
+def _score_and_write(tile):
+    x, y = tile
+    s = _WORKER["settings"]
+    layers = score_tile(_WORKER["optimizer"], s["zoom"], x, y, s["resolution"],
+                        s["time_info"], area_type=s["area_type"])
+    _WORKER["store"].write(s["zoom"], x, y, layers)
+    return tile
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Precompute suitability heatmap tiles for a region.")
+    parser.add_argument("--stations", default=DEFAULT_STATIONS, help="station CSV with demo_* columns")
+    parser.add_argument("--store", default=os.environ.get("QUICKFILL_SUITABILITY_STORE", DEFAULT_STORE))
+    parser.add_argument("--bbox", default=NCR_BBOX, help="min_lng,min_lat,max_lng,max_lat (default: NCR)")
+    parser.add_argument("--zoom", type=int, default=12)
+    parser.add_argument("--resolution", type=int, default=64, help="cells per tile side")
+    parser.add_argument("--time-of-day", default="afternoon", choices=["morning", "afternoon", "evening"])
+    parser.add_argument("--weekend", action="store_true")
+    parser.add_argument("--area-type", default="Office", choices=sorted(LocationOptimizer.AREA_MULTIPLIERS))
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--overwrite", action="store_true", help="rescore every tile, replacing a previous run")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.stations):
+        print(f"Station file not found: {args.stations}")
+        return 1
+    min_lng, min_lat, max_lng, max_lat = (float(v) for v in args.bbox.split(","))
+    bbox = {"min_lng": min_lng, "min_lat": min_lat, "max_lng": max_lng, "max_lat": max_lat}
+
+    settings = {
+        "zoom": args.zoom,
+        "resolution": args.resolution,
+        "time_info": {"time_of_day": args.time_of_day, "is_weekend": args.weekend},
+        "area_type": args.area_type,
+        "stations_file": os.path.basename(args.stations),
+        "stations_mtime": os.path.getmtime(args.stations),
+    }
+    store = SuitabilityTileStore(args.store)
+    previous = store.metadata()
+    if previous and previous.get("settings") != settings and not args.overwrite:
+        print(f"{args.store} holds tiles from a different run ({previous.get('settings')}); "
+              f"use --overwrite or another --store")
+        return 1
+    # Settings go in first, so a resumed run can tell the stored tiles are its own;
+    # tiles are written atomically, so any tile on disk is complete
+    store.write_metadata({"settings": settings, "bbox": bbox, "layers": list(SCORE_LAYERS)})
+
+    tiles = tiles_for_bbox(bbox, args.zoom)
+    todo = [t for t in tiles if args.overwrite or not store.has(args.zoom, *t)]
+    print(f"{len(tiles)} tiles at z{args.zoom} ({args.resolution}x{args.resolution} cells); "
+          f"{len(tiles) - len(todo)} already stored, {len(todo)} to score on {args.workers} workers")
+
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker,
+                             initargs=(args.stations, args.store, settings)) as pool:
+        # Keep a bounded number of tiles in flight
+        pending = deque()
+        for i, tile in enumerate(todo, 1):
+            pending.append(pool.submit(_score_and_write, tile))
+            if len(pending) >= 2 * args.workers:
+                pending.popleft().result()
+            if i % 50 == 0:
+                print(f"  {i}/{len(todo)} tiles submitted, {time.perf_counter() - started:.1f}s")
+        while pending:
+            pending.popleft().result()
+
+    print(f"Scored {len(todo)} tiles in {time.perf_counter() - started:.1f}s -> {args.store}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
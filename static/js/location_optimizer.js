@@ -246,9 +246,15 @@ class LocationOptimizer {
                 throw new Error(`HTTP ${response.status}: ${response.statusText} - ${errorText}`);
             }
             
-            const data = await response.json();
+            let data = await response.json();
             console.log('API Response:', data);
             
+            if (response.status === 202 && data.status_url) {
+                // Long optimization: poll the background job until it finishes
+                data = await this.waitForJob(data.status_url);
+                data = { candidates: data.result || [], error: data.error };
+            }
+            
             if (data.error) {
                 throw new Error(data.error);
             }
@@ -289,6 +295,21 @@ class LocationOptimizer {
         }
     }
     
+    async waitForJob(statusUrl) {
+        while (true) {
+            await new Promise(resolve => setTimeout(resolve, 1000));
+            const response = await fetch(statusUrl);
+            const job = await response.json();
+            if (!response.ok || job.status === 'failed') {
+                throw new Error(job.error || `Job failed (HTTP ${response.status})`);
+            }
+            if (job.status === 'done') {
+                return job;
+            }
+            this.showMessage(`Optimizing... ${Math.round((job.progress || 0) * 100)}%`, 'info');
+        }
+    }
+    
     async useMyLocation() {
         if (!navigator.geolocation) {
             this.showMessage('Geolocation is not supported by this browser', 'error');
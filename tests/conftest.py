@@ -0,0 +1,25 @@
+"""Unit tests. Run from the repository root with ``python -m pytest``."""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from factories import make_stations  # noqa: E402
+
+
+@pytest.fixture
+def app_module():
+    import app
+    return app
+
+
+@pytest.fixture
+def client(app_module, monkeypatch):
+    """Test client serving a 25-station snapshot (version 'v1')"""
+    from models.station_snapshot import SnapshotStore, StationSnapshot
+    store = SnapshotStore(lambda: None, app_module._build_stations_data, poll_interval=0)
+    store.current = StationSnapshot({'stations': make_stations(25), 'version': 'v1'}, path='test')
+    monkeypatch.setattr(app_module, 'station_snapshots', store)
+    return app_module.app.test_client()
@@ -0,0 +1,23 @@
+"""Seeded test data shared by the test modules"""
+import numpy as np
+
+
+def make_stations(n):
+    """n stations on a diagonal from (28.4, 77.0), about 140 m apart"""
+    return [{'name': f'Station {i}', 'position': {'lat': 28.4 + i * 0.001, 'lng': 77.0 + i * 0.001}}
+            for i in range(n)]
+
+
+def make_training_records(n, seed=0):
+    """Seeded predictor training rows; the wait grows with queue length and the evening peak"""
+    rng = np.random.default_rng(seed)
+    records, waits = [], []
+    for _ in range(n):
+        rec = {'active_chargers': int(rng.integers(1, 4)), 'total_chargers': 4,
+               'current_queue_length': int(rng.integers(0, 6)), 'hour_of_day': int(rng.integers(0, 24)),
+               'day_of_week': int(rng.integers(0, 7)), 'traffic_density': float(rng.uniform(0, 1)),
+               'historical_avg_wait_time': float(rng.uniform(2, 20))}
+        rec['is_weekend'] = int(rec['day_of_week'] >= 5)
+        records.append(rec)
+        waits.append(3 * rec['current_queue_length'] + (8 if 17 <= rec['hour_of_day'] < 21 else 0))
+    return records, waits
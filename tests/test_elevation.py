@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+from models.elevation import SRTM_VOID, ElevationModel, load_elevation_model
+from models.station_calculating_model import ChargingStationCalculator
+
+
+def _write_tile(directory, name, heights):
+    np.asarray(heights, dtype='>i2').tofile(str(directory / name))
+
+
+@pytest.fixture
+def dem(tmp_path):
+    # A plane over N31E077: 1000 m at the north-west corner, +10 m per column east, -20 m per row south
+    rows, cols = np.mgrid[0:3, 0:3]
+    _write_tile(tmp_path, 'N31E077.hgt', 1000 + 10 * cols - 20 * rows)
+    void = np.full((5, 5), 5)
+    void[1, 1] = SRTM_VOID
+    _write_tile(tmp_path, 's01w001.hgt', void)
+    (tmp_path / 'README.txt').write_text('not a tile')
+    return ElevationModel(str(tmp_path))
+
+
+def test_tiles_are_found_by_name(dem):
+    assert len(dem) == 2
+    assert set(dem._paths) == {(31, 77), (-1, -1)}
+
+
+def test_bilinear_interpolation_is_exact_on_a_plane(dem):
+    # The north and east edges belong to the neighbouring tiles
+    lats = [31.0, 31.5, 31.5, 31.25, 31.9999]
+    lngs = [77.0, 77.0, 77.5, 77.75, 77.9999]
+    expected = [1000 + 20 * (lng - 77) - 40 * (32 - lat) for lat, lng in zip(lats, lngs)]
+    np.testing.assert_allclose(dem.sample(lats, lngs), expected)
+
+
+def test_voids_and_missing_tiles_are_nan(dem):
+    heights = dem.sample([-0.2, -0.9, 10.0, 31.5], [-0.8, -0.1, 10.0, 77.5])
+    assert np.isnan(heights[0])          # a cell around the void
+    assert heights[1] == pytest.approx(5.0)
+    assert np.isnan(heights[2])          # no tile
+    assert heights[3] == pytest.approx(990.0)
+    assert dem.sample(31.5, 77.5).shape == (1,)
+
+
+def test_load_elevation_model_needs_tiles(tmp_path, dem):
+    assert load_elevation_model(None) is None
+    assert load_elevation_model(str(tmp_path / 'missing')) is None
+    empty = tmp_path / 'empty'
+    empty.mkdir()
+    assert load_elevation_model(str(empty)) is None
+    assert len(load_elevation_model(dem.directory)) == 2
+
+
+def test_slopes_raise_uphill_consumption_only(dem):
+    calculator = ChargingStationCalculator(elevation=dem)
+    # North to south along the plane is downhill; the reverse climbs
+    coords = np.array([[31.9, 77.5], [31.5, 77.5], [31.1, 77.5]])
+    segment_km = np.array([44.5, 44.5])
+    down = calculator._consumption_factors(coords, segment_km, 0.05, {})
+    up = calculator._consumption_factors(coords[::-1], segment_km, 0.05, {})
+    assert (up > 1.0).all() and (down < 1.0).all()
+    assert (down >= calculator.MIN_CONSUMPTION_FACTOR).all()
+    assert up - 1.0 == pytest.approx(1.0 - down)
+
+    flat = ChargingStationCalculator()._consumption_factors(coords, segment_km, 0.05, {})
+    assert flat.tolist() == [1.0, 1.0]
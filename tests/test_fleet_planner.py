@@ -0,0 +1,71 @@
+import math
+
+import pytest
+
+from models.fleet_planner import FleetPlanner, erlang_c_wait
+
+
+def test_single_server_matches_mm1():
+    # M/M/1: Wq = rho / (1 - rho) * service time; rho = 30/hr * 1 min = 0.5
+    assert erlang_c_wait(30, 1.0, 1) == pytest.approx(1.0)
+
+
+def test_two_servers_matches_closed_form():
+    # a = 1.5 Erlangs on 2 servers: P(wait) = 4.5 / 7, Wq = P(wait) * 1.5 / (2 - 1.5)
+    assert erlang_c_wait(60, 1.5, 2) == pytest.approx(4.5 / 7 * 1.5 / 0.5)
+
+
+def test_more_servers_never_wait_longer():
+    waits = [erlang_c_wait(100, 5.0, c) for c in range(9, 15)]
+    assert all(a > b for a, b in zip(waits, waits[1:]))
+
+
+def test_edge_cases():
+    assert math.isinf(erlang_c_wait(60, 2.0, 2))   # offered load equals capacity
+    assert erlang_c_wait(0, 5.0, 2) == 0.0
+    assert erlang_c_wait(10, 5.0, 0) == erlang_c_wait(10, 5.0, 1)
+
+
+class _FixedPoints:
+    """Calculator stub: every vehicle needs one fill at the same spot 20 km into its route"""
+
+    def find_refuel_points(self, route, ev_specs, current_charge):
+        return [{'lat': 28.6, 'lng': 77.2, 'arrival_charge': 1.0, 'departure_charge': 10.0,
+                 'charge_time': 5, 'distance_from_start': 20.0}]
+
+
+STATIONS = [
+    {'name': 'Near', 'lat': 28.6, 'lng': 77.2, 'servers': 1, 'service_time': 5.0, 'overall_arrivals': 0.0},
+    {'name': 'Far', 'lat': 28.609, 'lng': 77.2, 'servers': 4, 'service_time': 5.0, 'overall_arrivals': 0.0},
+]
+
+
+def _vehicles(n):
+    return [{'id': i, 'route': {}, 'ev_specs': {}, 'current_charge': 1.0} for i in range(n)]
+
+
+def test_single_vehicle_goes_to_the_nearest_station():
+    plan = FleetPlanner(_FixedPoints(), STATIONS).plan(_vehicles(1), departure_hour=14)
+    stop = plan['vehicles'][0]['stops'][0]
+    assert stop['name'] == 'Near' and stop['detourKm'] == 0.0
+    assert plan['converged']
+
+
+def test_fleet_spreads_over_capacity_and_beats_greedy():
+    planner = FleetPlanner(_FixedPoints(), STATIONS)
+    plan = planner.plan(_vehicles(10), departure_hour=14)
+    names = [v['stops'][0]['name'] for v in plan['vehicles']]
+    assert plan['converged'] and 0 < names.count('Near') < 10
+
+    # Everyone at the nearest station overloads its single pump (10 vehicles = 20/hr, 5 min each)
+    greedy_wait = 10 * planner._wait(0, 0, 10, 14)
+    assert plan['total_expected_wait_min'] < greedy_wait
+    # Reported fleet counts agree with the assignment
+    for v in plan['vehicles']:
+        stop = v['stops'][0]
+        assert stop['fleetVehiclesInSlot'] == names.count(stop['name'])
+
+
+def test_plan_without_stations_is_an_error():
+    with pytest.raises(ValueError):
+        FleetPlanner(_FixedPoints(), []).plan(_vehicles(1))
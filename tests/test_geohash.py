@@ -0,0 +1,32 @@
+from models import geohash
+
+NCR_BBOX = {'min_lat': 28.2, 'max_lat': 28.95, 'min_lng': 76.8, 'max_lng': 77.8}
+
+
+def test_encode_known_value():
+    assert geohash.encode(57.64911, 10.40744, 11) == 'u4pruydqqvj'
+    assert geohash.encode(28.6139, 77.2090, 5) == 'ttnfu'
+
+
+def test_prefixes_nest():
+    full = geohash.encode(28.6139, 77.2090, 9)
+    assert all(geohash.encode(28.6139, 77.2090, p) == full[:p] for p in range(1, 9))
+
+
+def test_cell_bounds_contain_point_and_match_cell_size():
+    for precision in range(1, 9):
+        bounds = geohash.cell_bounds(geohash.encode(28.6139, 77.2090, precision))
+        height, width = geohash.cell_size(precision)
+        assert bounds['min_lat'] <= 28.6139 < bounds['max_lat']
+        assert bounds['min_lng'] <= 77.2090 < bounds['max_lng']
+        assert abs(bounds['max_lat'] - bounds['min_lat'] - height) < 1e-12
+        assert abs(bounds['max_lng'] - bounds['min_lng'] - width) < 1e-12
+
+
+def test_cells_in_bbox_cover_the_bbox_once():
+    cells = geohash.cells_in_bbox(NCR_BBOX, 4)
+    assert len(cells) == len(set(cells))
+    for lat in (28.2, 28.5, 28.95):
+        for lng in (76.8, 77.3, 77.8):
+            assert geohash.encode(lat, lng, 4) in cells
+    assert geohash.cells_in_bbox(NCR_BBOX, 3) == ['ttn', 'ttp']
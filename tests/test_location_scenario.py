@@ -0,0 +1,144 @@
+import math
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from models.location_optimizer import LocationOptimizer, LocationScenario
+from models.scenario_store import ScenarioStore
+
+TIME_INFO = {'is_weekend': False, 'time_of_day': 'evening'}
+
+
+def _station(name, lat, lng, arrivals=12.0, wait=6.0):
+    return {'name': name, 'lat': lat, 'lng': lng, 'morning_arrivals': arrivals, 'evening_arrivals': arrivals * 1.5,
+            'overall_arrivals': arrivals, 'utilization': 0.6, 'wait_time_morning': wait,
+            'wait_time_evening': wait * 2, 'wait_time_overall': wait}
+
+
+def _stations():
+    rng = np.random.default_rng(4)
+    return [_station(f'S{i}', 28.6 + rng.uniform(-0.08, 0.08), 77.2 + rng.uniform(-0.08, 0.08),
+                     arrivals=float(rng.uniform(5, 25)), wait=math.inf if i == 3 else float(rng.uniform(1, 20)))
+            for i in range(12)]
+
+
+def _candidates():
+    return [{'lat': 28.6 + dy * 0.02, 'lng': 77.2 + dx * 0.02, 'area_type': ('Market', 'Office', 'Residential')[dx % 3],
+             'distance_from_center': math.hypot(dx, dy) * 2.2}
+            for dy in range(-4, 5) for dx in range(-4, 5)]
+
+
+@pytest.fixture
+def optimizer():
+    optimizer = LocationOptimizer()
+    optimizer.existing_stations = _stations()
+    return optimizer
+
+
+def _assert_same_scores(incremental, full):
+    for key, values in full.scores.items():
+        np.testing.assert_allclose(incremental.scores[key], values, atol=1e-9, err_msg=key)
+
+
+def test_adding_a_station_matches_a_full_recompute(optimizer):
+    scenario = LocationScenario(optimizer, _candidates(), optimizer.existing_stations, TIME_INFO)
+    new = _station('New', 28.61, 77.21, arrivals=30.0)
+    station_id, updated = scenario.add_station(new)
+    assert station_id == 12
+    assert 0 < updated < len(scenario.candidates) + 1
+
+    full = LocationScenario(optimizer, _candidates(), optimizer.existing_stations + [new], TIME_INFO)
+    _assert_same_scores(scenario, full)
+    assert scenario.results(3) == full.results(3)
+
+
+def test_removing_stations_matches_a_full_recompute(optimizer):
+    stations = optimizer.existing_stations
+    scenario = LocationScenario(optimizer, _candidates(), stations, TIME_INFO)
+    scenario.remove_station(3)    # the station with an unbounded wait
+    scenario.remove_station(0)
+    full = LocationScenario(optimizer, _candidates(), [s for i, s in enumerate(stations) if i not in (0, 3)],
+                            TIME_INFO)
+    _assert_same_scores(scenario, full)
+    np.testing.assert_array_equal(scenario.nearest_km, full.nearest_km)
+
+
+def test_add_then_remove_restores_the_original_scores(optimizer):
+    scenario = LocationScenario(optimizer, _candidates(), optimizer.existing_stations, TIME_INFO)
+    before = {k: v.copy() for k, v in scenario.scores.items()}
+    station_id, _ = scenario.add_station({'lat': 28.6, 'lng': 77.2})   # defaults fill the rest
+    assert scenario.stations[station_id]['utilization'] == pytest.approx(0.6)
+    scenario.remove_station(station_id)
+    for key, values in before.items():
+        np.testing.assert_allclose(scenario.scores[key], values, atol=1e-9, err_msg=key)
+    with pytest.raises(KeyError):
+        scenario.remove_station(station_id)
+
+
+def test_store_shares_scenarios_between_processes(optimizer, tmp_path):
+    worker_a, worker_b = ScenarioStore(str(tmp_path)), ScenarioStore(str(tmp_path))
+    scenario_id = worker_a.create(LocationScenario(optimizer, _candidates(), optimizer.existing_stations, TIME_INFO))
+
+    scenario, (station_id, _) = worker_b.update(scenario_id, lambda s: s.add_station({'lat': 28.6, 'lng': 77.2}))
+    assert station_id in worker_a.get(scenario_id).stations
+    assert worker_a.get(scenario_id).results(3) == scenario.results(3)
+
+    # A failed edit leaves the stored scenario untouched
+    with pytest.raises(KeyError):
+        worker_a.update(scenario_id, lambda s: s.remove_station(999))
+    assert len(worker_b.get(scenario_id).stations) == 13
+
+    assert worker_a.get('0' * 32) is None and worker_a.get('../etc') is None
+    assert worker_a.update('0' * 32, lambda s: None) is None
+
+
+def test_concurrent_edits_are_not_lost(optimizer, tmp_path):
+    store = ScenarioStore(str(tmp_path))
+    scenario_id = store.create(LocationScenario(optimizer, _candidates(), optimizer.existing_stations, TIME_INFO))
+    workers = [ScenarioStore(str(tmp_path)) for _ in range(4)]
+    with ThreadPoolExecutor(4) as pool:
+        list(pool.map(lambda i: workers[i % 4].update(
+            scenario_id, lambda s: s.add_station({'lat': 28.6 + i * 0.01, 'lng': 77.2})), range(8)))
+    assert len(store.get(scenario_id).stations) == 20
+
+
+def test_store_evicts_the_oldest_scenarios(optimizer, tmp_path):
+    store = ScenarioStore(str(tmp_path), max_scenarios=2)
+    ids = [store.create(LocationScenario(optimizer, _candidates()[:3], [], TIME_INFO)) for _ in range(3)]
+    assert store.get(ids[0]) is None
+    assert all(store.get(i) is not None for i in ids[1:])
+
+
+@pytest.fixture
+def scenario_client(client, app_module, optimizer, tmp_path, monkeypatch):
+    monkeypatch.setattr(app_module, 'scenario_store', ScenarioStore(str(tmp_path)))
+    monkeypatch.setattr(app_module, '_station_optimizer', lambda bbox: optimizer)
+    return client
+
+
+def test_scenario_api_round_trip(scenario_client):
+    created = scenario_client.post('/api/optimize-scenarios', json={'lat': 28.6, 'lng': 77.2, 'radius': 5})
+    assert created.status_code == 201
+    scenario_id = created.get_json()['scenario_id']
+    assert created.get_json()['stations'] == 12
+
+    added = scenario_client.post(f'/api/optimize-scenarios/{scenario_id}/stations?num_stations=2',
+                                 json={'lat': 28.61, 'lng': 77.21, 'name': 'Depot'})
+    assert added.status_code == 200
+    body = added.get_json()
+    assert body['station_id'] == 12 and body['stations'] == 13 and len(body['candidates']) <= 2
+
+    removed = scenario_client.delete(f'/api/optimize-scenarios/{scenario_id}/stations/12')
+    assert removed.status_code == 200 and removed.get_json()['stations'] == 12
+
+
+def test_scenario_api_errors(scenario_client):
+    scenario_id = scenario_client.post('/api/optimize-scenarios', json={'lat': 28.6, 'lng': 77.2}).get_json()[
+        'scenario_id']
+    assert scenario_client.delete(f'/api/optimize-scenarios/{scenario_id}/stations/0?num_stations=x').status_code == 400
+    assert scenario_client.delete(f'/api/optimize-scenarios/{scenario_id}/stations/99').status_code == 404
+    assert scenario_client.post(f'/api/optimize-scenarios/{scenario_id}/stations', json={'lat': 1}).status_code == 400
+    assert scenario_client.post('/api/optimize-scenarios/' + 'f' * 32 + '/stations',
+                                json={'lat': 28.6, 'lng': 77.2}).status_code == 404
+    assert scenario_client.post('/api/optimize-scenarios', json={'lng': 77.2}).status_code == 400
@@ -0,0 +1,52 @@
+import pytest
+
+from models import lru_cache
+from models.lru_cache import LRUCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(lru_cache.time, 'monotonic', lambda: now[0])
+    return now
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = LRUCache('test', ttl=10)
+    cache.put('a', 1, size=1)
+    clock[0] += 9
+    assert cache.get('a') == 1
+    clock[0] += 2
+    assert cache.get('a') is None
+    assert len(cache) == 0 and cache.bytes == 0
+
+
+def test_byte_budget_evicts_least_recently_used():
+    cache = LRUCache('test', max_bytes=30)
+    cache.put('a', 'A', size=10)
+    cache.put('b', 'B', size=10)
+    cache.put('c', 'C', size=10)
+    cache.get('a')                  # 'b' is now the least recently used
+    cache.put('d', 'D', size=10)
+    assert cache.get('b') is None
+    assert [cache.get(k) for k in 'acd'] == ['A', 'C', 'D']
+    assert cache.bytes == 30
+
+
+def test_entry_limit_and_oversized_values():
+    cache = LRUCache('test', max_bytes=100, max_entries=2)
+    for key in 'abc':
+        cache.put(key, key, size=1)
+    assert len(cache) == 2 and cache.get('a') is None
+    cache.put('big', 'x', size=101)
+    assert cache.get('big') is None
+
+
+def test_version_change_drops_everything():
+    cache = LRUCache('test')
+    cache.put('a', 1, size=5, version='v1')
+    assert cache.get('a', version='v1') == 1
+    assert cache.get('a', version='v2') is None
+    assert len(cache) == 0 and cache.bytes == 0
+    cache.put('a', 2, size=5, version='v2')
+    assert cache.get('a', version='v2') == 2
@@ -0,0 +1,55 @@
+from datetime import datetime, timedelta
+
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.preprocessing import StandardScaler
+
+from factories import make_training_records as _records
+from models.model_registry import ModelRegistry
+from models.wait_time_predictor import WaitTimePredictor
+
+
+def _register(tmp_path, with_training):
+    source = WaitTimePredictor()
+    X = source._prepare_features(_records(200)[0]).astype(float)
+    y = [float(w) for w in _records(200)[1]]
+    scaler = StandardScaler()
+    model = RandomForestRegressor(n_estimators=10, random_state=0).fit(scaler.fit_transform(X), y)
+    bundle = {'scaler': scaler, 'model': model}
+    if with_training:
+        bundle['training'] = (X, y)
+    registry = ModelRegistry(str(tmp_path))
+    registry.register('wait_time', bundle, {'family': 'random_forest'})
+    return registry
+
+
+def _report(predictor, n, now):
+    for i in range(n):
+        predictor.ingest_observation('s1', now - timedelta(minutes=i), 30.0)
+
+
+def test_registry_training_data_is_blended_into_online_refits(tmp_path):
+    predictor = WaitTimePredictor()
+    meta = predictor.load_from_registry(_register(tmp_path, with_training=True))
+    assert meta['version'] == 'v0001'
+    assert predictor._base_training[0].shape == (200, 8)
+
+    now = datetime.now()
+    _report(predictor, 5, now)
+    assert predictor.refit_from_observations(min_samples=5, now=now)
+    assert predictor.online_stats['refits'] == 1
+
+
+def test_refit_is_skipped_for_a_registry_model_without_training_data(tmp_path):
+    predictor = WaitTimePredictor()
+    predictor.load_from_registry(_register(tmp_path, with_training=False))
+    version = predictor.model_version
+
+    now = datetime.now()
+    _report(predictor, 5, now)
+    assert not predictor.refit_from_observations(min_samples=5, now=now)
+    assert predictor.model_version == version
+    assert predictor.online_stats['skipped_refits'] == 1
+
+    # An offline train() supplies base data again
+    predictor.train(*_records(50))
+    assert predictor.refit_from_observations(min_samples=5, now=now)
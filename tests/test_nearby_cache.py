@@ -0,0 +1,92 @@
+import math
+
+import pytest
+
+from factories import make_stations
+from models import geohash
+from models.lru_cache import LRUCache
+from models.station_snapshot import StationSnapshot
+
+
+def _haversine_km(lat1, lng1, lat2, lng2):
+    a = (math.sin(math.radians(lat2 - lat1) / 2) ** 2 +
+         math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) * math.sin(math.radians(lng2 - lng1) / 2) ** 2)
+    return 2 * 6371.0 * math.asin(math.sqrt(a))
+
+
+@pytest.fixture
+def nearby(client, app_module, monkeypatch):
+    monkeypatch.setattr(app_module, 'nearby_cache', LRUCache('nearby_stations', max_bytes=1024 * 1024))
+    monkeypatch.setattr(app_module, 'road_graph', None)
+    monkeypatch.setattr(app_module, 'get_time_info', lambda: {
+        'hour': 9, 'day_of_week': 0, 'is_weekend': False, 'time_of_day': 'morning'})
+
+    def get(lat, lng, radius=1.0):
+        response = client.get(f'/api/stations-with-wait/{lat}/{lng}?radius={radius}')
+        assert response.status_code == 200
+        return response.headers['X-Nearby-Cache'], response.get_json()['stations']
+    return get
+
+
+def _distances(stations):
+    return sorted((s['name'], s['distance_km']) for s in stations)
+
+
+def test_cell_size_tracks_the_radius(app_module):
+    cell, half_diagonal = app_module._nearby_cell(28.4, 77.0, 5.0)
+    assert len(cell) == 6 and half_diagonal <= 5.0 * app_module.NEARBY_CELL_FRACTION
+    cell, half_diagonal = app_module._nearby_cell(28.4, 77.0, 1.0)
+    assert len(cell) == 7 and half_diagonal <= 0.25
+
+
+def test_points_in_one_cell_share_an_entry_but_get_exact_results(nearby, app_module):
+    cell, _ = app_module._nearby_cell(28.4012, 77.0012, 1.0)
+    bounds = geohash.cell_bounds(cell)
+    inset = 1e-5
+    points = [(bounds['min_lat'] + inset, bounds['min_lng'] + inset),
+              (bounds['max_lat'] - inset, bounds['max_lng'] - inset)]
+
+    assert nearby(*points[0])[0] == 'MISS'
+    for lat, lng in points:
+        status, stations = nearby(lat, lng)
+        assert status == 'HIT'
+        expected = sorted((s['name'], round(_haversine_km(lat, lng, s['position']['lat'], s['position']['lng']), 3))
+                          for s in make_stations(25)
+                          if _haversine_km(lat, lng, s['position']['lat'], s['position']['lng']) <= 1.0)
+        assert _distances(stations) == expected
+    # The two corners see different stations near the edge of the radius
+    assert _distances(nearby(*points[0])[1]) != _distances(nearby(*points[1])[1])
+
+
+def test_cached_results_match_the_uncached_endpoint(nearby, client):
+    nearby(28.405, 77.005)
+    status, cached = nearby(28.405, 77.005)
+    uncached = client.get('/api/stations/28.405/77.005?radius=1').get_json()['stations']
+    assert status == 'HIT'
+    assert _distances(cached) == _distances(uncached)
+    assert all('predicted_wait' in s for s in cached)
+
+
+def test_responses_do_not_modify_the_cached_entry(nearby, app_module):
+    nearby(28.405, 77.005)
+    cell, _ = app_module._nearby_cell(28.405, 77.005, 1.0)
+    entries, _, _ = app_module.nearby_cache.get((cell, 1.0, 0, 9), version='v1')
+    before = [dict(e) for e in entries]
+    bounds = geohash.cell_bounds(cell)
+    assert nearby(bounds['min_lat'] + 1e-5, bounds['min_lng'] + 1e-5)[0] == 'HIT'
+    assert entries == before
+
+
+def test_a_new_snapshot_or_hour_is_a_miss(nearby, app_module, monkeypatch):
+    assert nearby(28.405, 77.005)[0] == 'MISS'
+    assert nearby(28.405, 77.005)[0] == 'HIT'
+
+    monkeypatch.setattr(app_module, 'get_time_info', lambda: {
+        'hour': 10, 'day_of_week': 0, 'is_weekend': False, 'time_of_day': 'morning'})
+    assert nearby(28.405, 77.005)[0] == 'MISS'
+
+    moved = [dict(s, name=f"Moved {i}") for i, s in enumerate(make_stations(25))]
+    app_module.station_snapshots.current = StationSnapshot({'stations': moved, 'version': 'v2'}, path='test')
+    status, stations = nearby(28.405, 77.005)
+    assert status == 'MISS'
+    assert all(s['name'].startswith('Moved') for s in stations)
@@ -0,0 +1,115 @@
+import json
+import os
+import time
+
+import pytest
+
+from models.optimization_jobs import OptimizationJobs, _worker_optimizer
+from models.station_shards import ShardedStationStore
+from scripts import build_station_shards
+
+STATION_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                            'CNG_pumps_with_Erlang-C_waiting_times_250.csv')
+PARAMS = {'lat': 28.6139, 'lng': 77.209, 'radius': 5, 'num_stations': 2}
+
+
+@pytest.fixture
+def jobs(tmp_path):
+    jobs = OptimizationJobs(str(tmp_path / 'jobs'), station_files=lambda params: [STATION_FILE], max_workers=1,
+                           ttl=60, stale_after=5)
+    yield jobs
+    if jobs._pool is not None:
+        jobs._pool.shutdown()
+
+
+def _write(jobs, job_id, **status):
+    status = dict({'job_id': job_id, 'params': {}, 'submitted_at': time.time()}, **status)
+    with open(jobs._path(job_id), 'w', encoding='utf-8') as f:
+        json.dump(status, f)
+
+
+def test_normalise_and_job_ids(jobs):
+    params = jobs.normalise(dict(PARAMS, lat='28.613904'))
+    assert params == {'lat': 28.6139, 'lng': 77.209, 'radius': 5.0, 'num_stations': 2,
+                      'time_of_day': 'afternoon', 'is_weekend': False}
+    files = jobs.files_for(params)
+    assert files == [(STATION_FILE, os.path.getmtime(STATION_FILE))]
+    assert jobs.job_id(params, files) == jobs.job_id(jobs.normalise(PARAMS), files)
+    assert jobs.job_id(params, files) != jobs.job_id(jobs.normalise(dict(PARAMS, num_stations=3)), files)
+    assert jobs.job_id(params, files) != jobs.job_id(params, [(STATION_FILE, files[0][1] + 1)])
+    for bad in ({'radius': 0}, {'num_stations': 51}, {'lat': 'x'}):
+        with pytest.raises((KeyError, TypeError, ValueError)):
+            jobs.normalise(dict(PARAMS, **bad))
+
+
+def test_only_silent_running_jobs_are_presumed_lost(jobs):
+    old = time.time() - 30
+    _write(jobs, 'aaaa', status='running', updated_at=old)
+    _write(jobs, 'bbbb', status='queued', updated_at=old)     # waiting behind other jobs
+    _write(jobs, 'cccc', status='queued', updated_at=time.time() - 120)
+    assert jobs.status('aaaa')['status'] == 'failed'
+    assert jobs.status('bbbb')['status'] == 'queued'
+    assert jobs.status('cccc')['status'] == 'failed'   # older than the TTL
+    assert jobs.status('../x') is None and jobs.status('dddd') is None
+
+
+def test_purge_removes_only_expired_finished_jobs(jobs):
+    _write(jobs, 'aaaa', status='done', updated_at=time.time() - 120)
+    _write(jobs, 'bbbb', status='done', updated_at=time.time())
+    _write(jobs, 'cccc', status='running', updated_at=time.time())
+    assert jobs.purge() == 1
+    assert sorted(os.listdir(jobs.job_dir)) == ['bbbb.json', 'cccc.json']
+
+
+def test_jobs_read_the_shards_around_their_area(tmp_path, app_module, monkeypatch):
+    out = tmp_path / 'shards'
+    assert build_station_shards.main(['--stations', STATION_FILE, '--out', str(out), '--precision', '3']) == 0
+    shards = ShardedStationStore(str(out), app_module._build_stations_data)
+    monkeypatch.setattr(app_module, 'station_shards', shards)
+
+    params = OptimizationJobs.normalise(PARAMS)
+    paths = app_module._job_station_files(params)
+    assert 0 < len(paths) < len(shards.shards)
+    assert paths == shards.files_for_bbox(ShardedStationStore.radius_bbox(28.6139, 77.209, 15.0))
+    assert not shards.stats()['loaded']     # the web process does not parse the shards
+
+    jobs = OptimizationJobs(str(tmp_path / 'jobs'), station_files=app_module._job_station_files)
+    files = jobs.files_for(params)
+    optimizer = _worker_optimizer(files)
+    assert len(optimizer.existing_stations) == sum(shards.shards[os.path.basename(p)[:-4]]['count'] for p in paths)
+    assert _worker_optimizer(files) is optimizer
+
+    # Rebuilt shards give the same parameters a new job
+    os.utime(files[0][0], (files[0][1] + 10, files[0][1] + 10))
+    assert jobs.job_id(params, jobs.files_for(params)) != jobs.job_id(params, files)
+
+
+def test_job_runs_in_the_pool_and_is_shared(jobs):
+    status = jobs.submit(PARAMS)
+    assert status['status'] == 'queued'
+    assert jobs.submit(PARAMS)['job_id'] == status['job_id']   # joins the live job
+
+    done = jobs.wait(status['job_id'], timeout=60)
+    assert done['status'] == 'done' and done['progress'] == 1.0
+    assert 0 < len(done['result']) <= 2
+    assert {'lat', 'lng', 'total_score'} <= set(done['result'][0])
+
+    cached = jobs.submit(PARAMS)
+    assert cached['cached'] and cached['result'] == done['result']
+    # Another web worker answers from the same status file
+    assert OptimizationJobs(jobs.job_dir).status(status['job_id']) == done
+
+
+def test_legacy_endpoint_answers_202_without_holding_the_request(client, app_module, jobs, monkeypatch):
+    monkeypatch.setattr(app_module, 'optimization_jobs', jobs)
+    monkeypatch.setattr(app_module, 'OPTIMIZE_SYNC_WAIT', 0)
+    response = client.get('/api/optimize-locations/28.6139/77.209?radius=5&num_stations=2')
+    assert response.status_code == 202
+    body = response.get_json()
+    assert body['status_url'].endswith(body['job_id'])
+
+    jobs.wait(body['job_id'], timeout=60)
+    response = client.get('/api/optimize-locations/28.6139/77.209?radius=5&num_stations=2')
+    assert response.status_code == 200 and response.get_json()['job_id'] == body['job_id']
+    assert client.get('/api/optimize-locations/28.6/77.2?radius=0').status_code == 400
+    assert client.get('/api/optimize-jobs/0123456789abcdef').status_code == 404
@@ -0,0 +1,71 @@
+import threading
+import time
+
+import pytest
+
+from models.overpass_client import OverpassClient
+
+
+@pytest.fixture
+def client(tmp_path):
+    client = OverpassClient(base_url='http://overpass.invalid', cache_dir=str(tmp_path), max_workers=4)
+    client.downloads = []
+
+    def download(tile):
+        client.downloads.append(tile)
+        time.sleep(0.05)
+        south, west, north, east = client.tile_bbox(tile)
+        return [{'type': 'node', 'id': tile[0] * 100000 + tile[1],
+                 'lat': (south + north) / 2, 'lon': (west + east) / 2}]
+
+    client._download_tile = download
+    return client
+
+
+def test_tiles_cover_the_query_circle(client):
+    tiles = client.tiles_for_radius(28.60, 77.20, 3000)
+    south, west, _, _ = client.tile_bbox(min(tiles))
+    _, _, north, east = client.tile_bbox(max(tiles))
+    assert south <= 28.60 - 0.027 and north >= 28.60 + 0.027
+    assert west <= 77.20 - 0.03 and east >= 77.20 + 0.03
+
+
+def test_tiles_are_downloaded_once_then_served_from_disk(client):
+    tiles = client.tiles_for_radius(28.60, 77.20, 3000)
+    first = client.get_tiles(tiles)
+    second = client.get_tiles(tiles)
+    assert sorted(client.downloads) == sorted(tiles)
+    assert first == second and len(first) == len(tiles)
+    assert client.stats == {'tile_hits': len(tiles), 'tile_misses': len(tiles), 'tile_errors': 0}
+
+
+def test_concurrent_requests_for_a_tile_share_one_download(client):
+    threads = [threading.Thread(target=client.get_tile, args=((572, 1544),)) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert client.downloads == [(572, 1544)]
+    assert client.stats['tile_hits'] + client.stats['tile_misses'] == 8
+    assert client._tile_locks == {}
+
+
+def test_expired_tiles_are_refetched_and_stale_ones_cover_failures(client):
+    tile = (572, 1544)
+    client.get_tile(tile)
+    client.ttl_seconds = -1      # everything on disk is now expired
+    client.get_tile(tile)
+    assert client.downloads == [tile, tile]
+
+    def fail(tile):
+        raise ConnectionError('overpass down')
+    client._download_tile = fail
+    assert client.get_tile(tile)[0]['type'] == 'node'
+    assert client.stats['tile_errors'] == 1
+    with pytest.raises(ConnectionError):
+        client.get_tile((0, 0))
+
+
+def test_fetch_filters_to_the_radius(client):
+    near = client.fetch_fuel_elements(28.625, 77.225, radius=100)
+    assert [e['id'] for e in near] == [572 * 100000 + 1544]
@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+
+from models.fleet_planner import erlang_c_wait
+from models.queue_simulator import (QueueSimulator, _fcfs_waits, hourly_rates, score_placements,
+                                    with_candidate_sites)
+
+
+def _steady(name='S', lat=28.6, lng=77.2, arrivals=20.0, servers=2, service=5.0):
+    return {'name': name, 'lat': lat, 'lng': lng, 'rush_pattern': 'Steady', 'overall_arrivals': arrivals,
+            'morning_arrivals': arrivals, 'evening_arrivals': arrivals, 'servers': servers,
+            'service_time': service}
+
+
+def test_fcfs_waits_by_hand():
+    arrivals, services = np.array([0.0, 1.0, 2.0]), np.array([5.0, 5.0, 5.0])
+    assert _fcfs_waits(arrivals, services, 1).tolist() == [0.0, 4.0, 8.0]
+    assert _fcfs_waits(arrivals, services, 2).tolist() == [0.0, 0.0, 3.0]
+
+
+def test_hourly_rates_keep_the_daily_total():
+    station = dict(_steady(arrivals=10.0), rush_pattern='Evening Rush', evening_arrivals=30.0)
+    rates = hourly_rates(station)
+    assert rates.sum() == pytest.approx(240.0)
+    assert rates[17:21].tolist() == [30.0] * 4
+    assert rates[2] == pytest.approx(rates[12] * 0.25)   # nights at NIGHT_FACTOR
+
+
+def test_steady_station_agrees_with_erlang_c():
+    # Flat profile: an M/M/2 queue at rho = 0.5 settles quickly, so a day is close to steady state
+    station = _steady(arrivals=12.0)
+    simulator = QueueSimulator([station], workers=1)
+    simulator.rates[:] = 12.0
+    result = simulator.run(replications=200, seed=1)
+    expected = erlang_c_wait(12.0, 5.0, 2)
+    simulated = result['stations'][0]
+    assert simulated['mean_wait'] == pytest.approx(expected, abs=3 * simulated['mean_wait_ci95'] + 0.05)
+    assert simulated['customers_per_day'] == pytest.approx(288, rel=0.05)
+
+
+def test_runs_are_reproducible_and_independent_of_worker_count():
+    stations = [_steady('A'), _steady('B', arrivals=30.0, servers=3)]
+    serial = QueueSimulator(stations, workers=1).run(replications=8, seed=7)
+    parallel = QueueSimulator(stations, workers=2).run(replications=8, seed=7)
+    assert serial == parallel
+    assert QueueSimulator(stations, workers=1).run(replications=8, seed=8) != serial
+
+
+def test_candidate_sites_move_demand_without_creating_it():
+    stations = [_steady('Near', lat=28.60, lng=77.20), _steady('Far', lat=29.5, lng=78.0)]
+    after = with_candidate_sites(stations, [{'lat': 28.61, 'lng': 77.21}], capture_share=0.3)
+    assert [s['name'] for s in after] == ['Near', 'Far', 'Candidate 1']
+    assert after[0]['overall_arrivals'] == pytest.approx(14.0)
+    assert after[1]['overall_arrivals'] == 20.0
+    assert after[2]['overall_arrivals'] == pytest.approx(6.0)
+    assert after[2]['candidate'] and after[2]['service_time'] == 5.0
+    assert stations[0]['overall_arrivals'] == 20.0     # inputs are not modified
+
+
+def test_opening_a_site_next_to_a_busy_station_cuts_the_network_wait():
+    busy = _steady('Busy', arrivals=22.0, servers=2)
+    result = score_placements([busy], [{'lat': 28.601, 'lng': 77.201}], replications=20, seed=3,
+                              workers=1, capture_share=0.4)
+    assert result['wait_reduction'] > 0
+    assert result['scenario_mean_wait'] < result['baseline_mean_wait']
+    assert len(result['sites']) == 1 and result['sites'][0]['servers'] == 2
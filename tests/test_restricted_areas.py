@@ -0,0 +1,47 @@
+import json
+
+import numpy as np
+
+from models.restricted_areas import RestrictedAreaIndex, load_restricted_areas
+
+# 0.01 degree square around (28.60, 77.20)
+LAKE = {'name': 'Lake', 'polygon': [
+    {'lat': 28.595, 'lng': 77.195}, {'lat': 28.595, 'lng': 77.205},
+    {'lat': 28.605, 'lng': 77.205}, {'lat': 28.605, 'lng': 77.195},
+]}
+
+
+def test_points_inside_or_in_the_buffer_are_rejected():
+    index = RestrictedAreaIndex([LAKE], buffer=0.001)
+    assert not index.is_valid(28.60, 77.20)          # inside
+    assert not index.is_valid(28.6055, 77.20)        # within the 0.001 buffer
+    assert index.is_valid(28.61, 77.20)              # well outside
+    assert index.area_names_at(28.60, 77.20) == ['Lake']
+    assert index.area_names_at(28.61, 77.20) == []
+
+
+def test_batch_validation_matches_single_points_and_rejects_nan():
+    index = RestrictedAreaIndex([LAKE])
+    lats = np.array([28.60, 28.61, np.nan, 28.5951])
+    lngs = np.array([77.20, 77.20, 77.20, 77.1951])
+    expected = [False, True, False, False]
+    assert index.validate_points(lats, lngs).tolist() == expected
+    assert [index.is_valid(a, b) for a, b in zip(lats[[0, 1, 3]], lngs[[0, 1, 3]])] == [False, True, False]
+
+
+def test_empty_index_accepts_every_finite_point():
+    index = RestrictedAreaIndex()
+    assert index.validate_points([28.6, np.inf], [77.2, 77.2]).tolist() == [True, False]
+
+
+def test_geojson_areas_are_added(tmp_path):
+    path = tmp_path / 'areas.geojson'
+    path.write_text(json.dumps({'type': 'FeatureCollection', 'features': [
+        {'type': 'Feature', 'properties': {'name': 'Sanctuary'},
+         'geometry': {'type': 'Polygon', 'coordinates': [[[77.0, 28.0], [77.1, 28.0], [77.1, 28.1], [77.0, 28.0]]]}},
+        {'type': 'Feature', 'properties': {'name': 'Road'},
+         'geometry': {'type': 'LineString', 'coordinates': [[77.0, 28.0], [77.1, 28.1]]}},
+    ]}))
+    index = load_restricted_areas([LAKE], str(path))
+    assert len(index) == 2
+    assert index.area_names_at(28.02, 77.08) == ['Sanctuary']
@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from models.road_network import RoadGraph
+
+# A 4-node line 0 - 1 - 2 - 3 along a parallel, ~1 km per edge, plus a one-way shortcut 3 -> 0
+LNG_STEP = 1.0 / (111.195 * np.cos(np.radians(28.6)))
+LATS = [28.6] * 4
+LNGS = [77.2 + i * LNG_STEP for i in range(4)]
+
+
+@pytest.fixture
+def graph():
+    src = [0, 1, 1, 2, 2, 3, 3]
+    dst = [1, 0, 2, 1, 3, 2, 0]
+    length = [1000, 1000, 1000, 1000, 1000, 1000, 500]
+    return RoadGraph.from_edges(LATS, LNGS, src, dst, length)
+
+
+def test_network_distance_follows_edges_and_one_way_streets(graph):
+    from_start = graph.distances_km(LATS[0], LNGS[0], LATS, LNGS)
+    assert from_start == pytest.approx([0.0, 1.0, 2.0, 3.0], abs=1e-6)
+    # The 500 m one-way edge only helps in the 3 -> 0 direction
+    assert graph.distances_km(LATS[3], LNGS[3], [LATS[0]], [LNGS[0]])[0] == pytest.approx(0.5, abs=1e-6)
+
+
+def test_snap_distance_is_added_at_both_ends(graph):
+    north = 28.6 + 0.1 / 111.195     # 100 m north of node 0
+    dist = graph.distances_km(north, LNGS[0], [north], [LNGS[1]])[0]
+    assert dist == pytest.approx(1.2, abs=0.005)
+
+
+def test_targets_beyond_the_limit_are_infinite(graph):
+    dist = graph.distances_km(LATS[0], LNGS[0], LATS, LNGS, max_km=1.5)
+    assert dist[:2] == pytest.approx([0.0, 1.0], abs=1e-6)
+    assert np.isinf(dist[2:]).all()
+
+
+def test_parallel_edges_keep_the_shortest(graph):
+    g = RoadGraph.from_edges(LATS[:2], LNGS[:2], [0, 0], [1, 1], [900, 400])
+    assert g.distances_km(LATS[0], LNGS[0], [LATS[1]], [LNGS[1]])[0] == pytest.approx(0.4, abs=1e-6)
+
+
+def test_save_and_load_round_trip(graph, tmp_path):
+    path = str(tmp_path / 'graph.npz')
+    graph.save(path)
+    loaded = RoadGraph.load(path)
+    assert len(loaded) == 4
+    assert loaded.distances_km(LATS[0], LNGS[0], LATS, LNGS) == pytest.approx([0.0, 1.0, 2.0, 3.0], abs=1e-6)
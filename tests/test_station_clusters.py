@@ -0,0 +1,47 @@
+import numpy as np
+
+from models.station_clusters import StationClusterIndex
+
+NCR = {'min_lat': 28.2, 'max_lat': 28.95, 'min_lng': 76.8, 'max_lng': 77.8}
+
+
+def _index(n=500, seed=0):
+    rng = np.random.default_rng(seed)
+    lats = rng.uniform(28.4, 28.8, n)
+    lngs = rng.uniform(77.0, 77.5, n)
+    waits = rng.uniform(1, 30, n)
+    return StationClusterIndex(lats, lngs, waits), lats, lngs, waits
+
+
+def test_every_zoom_accounts_for_every_station():
+    index, _, _, waits = _index()
+    for zoom in range(0, index.individual_zoom):
+        clusters = index.query(NCR, zoom)['clusters']
+        assert sum(c['count'] for c in clusters) == len(index)
+        assert min(c['min_predicted_wait'] for c in clusters) == round(waits.min(), 2)
+
+
+def test_clusters_get_finer_as_zoom_increases():
+    index, _, _, _ = _index()
+    counts = [len(index.query(NCR, z)['clusters']) for z in (6, 9, 12)]
+    assert counts[0] < counts[1] < counts[2]
+
+
+def test_high_zoom_returns_individual_stations_in_the_viewport():
+    index, lats, lngs, _ = _index()
+    bbox = {'min_lat': 28.6, 'max_lat': 28.62, 'min_lng': 77.2, 'max_lng': 77.22}
+    result = index.query(bbox, 16)
+    inside = ((lats >= 28.6) & (lats <= 28.62) & (lngs >= 77.2) & (lngs <= 77.22)).sum()
+    assert result['clusters'] == [] and len(result['stations']) == inside
+
+
+def test_too_many_stations_at_high_zoom_fall_back_to_clusters():
+    index, _, _, _ = _index()
+    result = index.query(NCR, 16, max_stations=10)
+    assert result['stations'] == [] and sum(c['count'] for c in result['clusters']) == len(index)
+
+
+def test_cluster_endpoint(client):
+    body = client.get('/api/station-clusters?bbox=76.9,28.3,77.1,28.5&zoom=5').get_json()
+    assert body['version'] == 'v1' and sum(c['count'] for c in body['clusters']) == 25
+    assert client.get('/api/station-clusters?zoom=5').status_code == 400
@@ -0,0 +1,62 @@
+import csv
+
+import pytest
+
+from models.station_shards import ShardedStationStore
+from scripts import build_station_shards
+
+# 'ttn' and 'ttp' meet at lng 77.34375; 'tdr' is far to the south (Bengaluru)
+STATIONS = [
+    ('West of border', 28.60, 77.33),
+    ('East of border', 28.60, 77.36),
+    ('Deep east', 28.60, 78.50),
+    ('Bengaluru', 12.97, 77.59),
+]
+
+
+@pytest.fixture
+def shard_dir(tmp_path):
+    source = tmp_path / 'stations.csv'
+    with open(source, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['name', '@lat', '@lon'])
+        writer.writerows(STATIONS)
+    out = tmp_path / 'shards'
+    assert build_station_shards.main(['--stations', str(source), '--out', str(out), '--precision', '3']) == 0
+    return str(out)
+
+
+@pytest.fixture
+def store(shard_dir, app_module):
+    return ShardedStationStore(shard_dir, app_module._build_stations_data)
+
+
+def test_index_lists_one_shard_per_prefix(store):
+    assert sorted(store.shards) == ['tdr', 'ttn', 'ttp']
+    assert store.shards['ttp']['count'] == 2
+
+
+def test_radius_query_fans_out_across_the_shard_border(store):
+    names = sorted(s['name'] for s, _ in store.within(28.60, 77.345, 5.0))
+    assert names == ['East of border', 'West of border']
+    assert sorted(store.stats()['loaded']) == ['ttn', 'ttp']   # Bengaluru's shard never loaded
+
+
+def test_shards_are_evicted_least_recently_used(shard_dir, app_module):
+    store = ShardedStationStore(shard_dir, app_module._build_stations_data, memory_budget_mb=0.003)
+    store.within(28.60, 77.33, 1.0)     # ttn
+    store.within(28.60, 77.36, 1.0)     # ttp: one station over budget, evicts ttn
+    assert store.stats()['loaded'] == ['ttp']
+    assert [s['name'] for s, _ in store.within(28.60, 77.33, 1.0)] == ['West of border']
+
+
+def test_nearest_searches_outward_when_nearby_shards_are_empty(store):
+    found = store.nearest(20.0, 77.5, 2)
+    assert [s['name'] for s, _ in found] == ['Bengaluru', 'East of border']
+    assert found[0][1] < found[1][1]
+
+
+def test_route_fallback_uses_other_shards(store, app_module, monkeypatch):
+    monkeypatch.setattr(app_module, 'station_shards', store)
+    stations = app_module.fetch_stations_in_bbox({'min_lat': 19.9, 'max_lat': 20.1, 'min_lng': 77.4, 'max_lng': 77.6})
+    assert stations[0]['name'] == 'Bengaluru' and len(stations) == 4
@@ -0,0 +1,98 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+from factories import make_stations
+from models.station_snapshot import SnapshotStore, StationSnapshot
+
+
+def _parse(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return {'stations': json.load(f)}
+    except ValueError as e:
+        return {'error': f'Bad station file: {e}', 'stations': []}
+
+
+def _write(path, content, mtime):
+    path.write_text(content if isinstance(content, str) else json.dumps(content))
+    os.utime(path, (mtime, mtime))
+
+
+@pytest.fixture
+def station_file(tmp_path):
+    path = tmp_path / 'stations.json'
+    _write(path, make_stations(3), 1_700_000_000)
+    return path
+
+
+@pytest.fixture
+def store(station_file):
+    return SnapshotStore(lambda: str(station_file), _parse, poll_interval=0)
+
+
+def test_first_get_loads_synchronously(store):
+    snapshot = store.get()
+    assert len(snapshot) == 3
+    assert snapshot.version == format(1_700_000_000_000, 'x')
+    assert store.get() is snapshot
+    assert not store.reload_if_changed()     # unchanged file
+
+
+def test_changed_file_is_published_after_it_settles(store, station_file):
+    old = store.get()
+    _write(station_file, make_stations(5), 1_700_000_060)
+    assert not store.reload_if_changed()     # first sighting: the write may still be going on
+    assert store.current is old
+    assert store.reload_if_changed()
+    assert len(store.current) == 5 and store.reloads == 1
+    assert len(old) == 3 and len(old.stations) == 3   # holders of the old snapshot are unaffected
+    assert not store.reload_if_changed()
+
+
+def test_a_file_still_changing_is_not_read(store, station_file):
+    store.get()
+    for i, mtime in enumerate((1_700_000_060, 1_700_000_061, 1_700_000_062)):
+        _write(station_file, make_stations(4 + i), mtime)
+        assert not store.reload_if_changed()
+    assert store.reload_if_changed()
+    assert len(store.current) == 6
+
+
+def test_failed_reload_keeps_the_current_snapshot(store, station_file):
+    good = store.get()
+    _write(station_file, '{not json', 1_700_000_060)
+    assert not store.reload_if_changed()
+    assert not store.reload_if_changed()      # built, failed, kept the old one
+    assert store.current is good and store.reloads == 0
+    assert not store.reload_if_changed()      # the same broken file is not retried
+
+    _write(station_file, make_stations(2), 1_700_000_120)
+    store.reload_if_changed()
+    assert store.reload_if_changed()
+    assert len(store.current) == 2
+
+
+def test_missing_file_serves_an_error_until_it_appears(tmp_path):
+    path = tmp_path / 'late.json'
+    store = SnapshotStore(lambda: str(path), _parse, poll_interval=0)
+    assert store.get().error == 'Stations file not found' and len(store.get()) == 0
+    _write(path, make_stations(2), 1_700_000_000)
+    store.reload_if_changed()
+    assert store.reload_if_changed()
+    assert store.current.error is None and len(store.current) == 2
+
+
+def test_within_is_an_exact_great_circle_radius():
+    stations = make_stations(25)
+    snapshot = StationSnapshot({'stations': stations, 'version': 'v1'})
+    idx, dist = snapshot.within(28.4, 77.0, 1.0)
+    lat, lng = np.radians(snapshot.lats), np.radians(snapshot.lngs)
+    a = np.sin((lat - np.radians(28.4)) / 2) ** 2 + \
+        np.cos(lat) * np.cos(np.radians(28.4)) * np.sin((lng - np.radians(77.0)) / 2) ** 2
+    expected = np.flatnonzero(2 * 6371.0 * np.arcsin(np.sqrt(a)) <= 1.0)
+    assert idx.tolist() == expected.tolist() == list(range(7))
+    assert dist[0] == 0.0 and (np.diff(dist) > 0).all()
+    assert StationSnapshot({'stations': []}).within(28.4, 77.0, 5)[0].size == 0
@@ -0,0 +1,40 @@
+import json
+
+from factories import make_stations
+
+
+def test_cursor_pages_cover_every_station_once(client):
+    names, cursor = [], None
+    while True:
+        query = '/api/stations-from-file?limit=10' + (f'&cursor={cursor}' if cursor else '')
+        body = client.get(query).get_json()
+        names += [s['name'] for s in body['stations']]
+        cursor = body['next_cursor']
+        if cursor is None:
+            break
+    assert names == [s['name'] for s in make_stations(25)]
+
+
+def test_cursor_with_bbox_and_fields(client):
+    first = client.get('/api/stations-from-file?limit=2&fields=name&bbox=77.004,28.404,77.02,28.42').get_json()
+    assert first['stations'] == [{'name': 'Station 4'}, {'name': 'Station 5'}]
+    second = client.get(f"/api/stations-from-file?limit=2&fields=name&bbox=77.004,28.404,77.02,28.42"
+                        f"&cursor={first['next_cursor']}").get_json()
+    assert second['stations'] == [{'name': 'Station 6'}, {'name': 'Station 7'}]
+
+
+def test_cursor_from_an_older_snapshot_is_rejected(client, app_module):
+    cursor = app_module._encode_cursor(10, 'v0')
+    response = client.get(f'/api/stations-from-file?limit=10&cursor={cursor}')
+    assert response.status_code == 410
+
+
+def test_malformed_cursor_is_a_bad_request(client):
+    assert client.get('/api/stations-from-file?cursor=not-a-cursor').status_code == 400
+
+
+def test_ndjson_streams_one_station_per_line(client):
+    response = client.get('/api/stations-from-file?format=ndjson&limit=3&fields=name')
+    lines = response.get_data(as_text=True).strip().split('\n')
+    assert response.mimetype == 'application/x-ndjson'
+    assert [json.loads(line) for line in lines] == [{'name': f'Station {i}'} for i in range(3)]
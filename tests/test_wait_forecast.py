@@ -0,0 +1,65 @@
+from datetime import datetime
+
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+
+from factories import make_training_records as _records
+from models.wait_time_predictor import WaitTimePredictor
+
+
+@pytest.fixture
+def predictor():
+    predictor = WaitTimePredictor(model_factory=lambda: RandomForestRegressor(n_estimators=20, random_state=0))
+    predictor.train(*_records(400))
+    return predictor
+
+
+START = datetime(2026, 10, 19, 7, 45)
+
+
+def test_forecast_matches_per_hour_predictions(predictor):
+    hour_starts, matrix = predictor.forecast(['a', 'b'], start=START, hours=24)
+    assert matrix.shape == (2, 24)
+    assert hour_starts[0] == datetime(2026, 10, 19, 7) and hour_starts[-1] == datetime(2026, 10, 20, 6)
+
+    defaults = WaitTimePredictor.FORECAST_DEFAULTS
+    records = [dict(defaults, id=h, hour_of_day=t.hour, day_of_week=t.weekday(), is_weekend=int(t.weekday() >= 5))
+               for h, t in enumerate(hour_starts)]
+    expected = [p['predicted_wait'] for p in predictor.predict_wait_time(records)]
+    assert matrix[0] == pytest.approx(expected)
+    assert matrix[1] == pytest.approx(expected)
+
+
+def test_station_features_override_defaults(predictor):
+    _, matrix = predictor.forecast(['idle', 'busy'], start=START, hours=4,
+                                   station_features={'busy': {'current_queue_length': 5}})
+    assert (matrix[1] > matrix[0]).all()
+
+
+def test_forecasts_are_cached_until_inputs_change(predictor):
+    _, first = predictor.forecast(['a'], start=START, hours=6)
+    _, again = predictor.forecast(['a'], start=START, hours=6)
+    assert again is first
+
+    # A report moves the station's average wait: the cached forecast must not be reused
+    predictor.ingest_observation('a', START, 60.0)
+    _, after_report = predictor.forecast(['a'], start=START, hours=6)
+    assert after_report is not first
+
+    predictor.train(*_records(400, seed=1))
+    _, after_retrain = predictor.forecast(['a'], start=START, hours=6)
+    assert after_retrain is not after_report
+
+
+def test_untrained_predictor_forecasts_with_the_heuristic():
+    _, matrix = WaitTimePredictor().forecast(['a'], start=START, hours=3)
+    assert matrix.shape == (1, 3) and np.isfinite(matrix).all()
+
+
+def test_forecast_endpoint_returns_one_row_per_nearby_station(client):
+    body = client.get('/api/wait-forecast/28.4/77.0?radius=0.5&hours=3').get_json()
+    assert len(body['hours']) == 3
+    assert [s['name'] for s in body['stations']] == ['Station 0', 'Station 1', 'Station 2', 'Station 3']
+    assert all(len(s['forecast']) == 3 for s in body['stations'])
+    assert client.get('/api/wait-forecast/28.4/77.0?hours=soon').status_code == 400
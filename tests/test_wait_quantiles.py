@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+from sklearn.ensemble import HistGradientBoostingRegressor, RandomForestRegressor
+
+from factories import make_training_records as _records
+from models.wait_time_predictor import WaitTimePredictor
+
+
+@pytest.fixture(scope='module')
+def forest():
+    predictor = WaitTimePredictor(model_factory=lambda: RandomForestRegressor(n_estimators=30, random_state=0))
+    predictor.train(*_records(400))
+    return predictor
+
+
+def _with_ids(records):
+    return [dict(r, id=i) for i, r in enumerate(records)]
+
+
+def test_quantiles_match_the_spread_of_individual_trees(forest):
+    records = _with_ids(_records(20, seed=5)[0])
+    result = forest.predict_wait_time(records, quantiles=(0.1, 0.9))
+
+    scaler, model, _ = forest._fitted
+    X = scaler.transform(forest._prepare_features(records))
+    per_tree = np.stack([tree.predict(X) for tree in model.estimators_], axis=1)
+    p10, p90 = np.maximum(np.quantile(per_tree, [0.1, 0.9], axis=1), 0)
+    assert [r['quantiles']['p10'] for r in result] == pytest.approx(p10)
+    assert [r['quantiles']['p90'] for r in result] == pytest.approx(p90)
+    assert [r['predicted_wait'] for r in result] == pytest.approx(np.maximum(model.predict(X), 0))
+
+
+def test_intervals_are_ordered(forest):
+    result = forest.predict_wait_time(_with_ids(_records(50, seed=6)[0]), quantiles=(0.1, 0.5, 0.9))
+    for r in result:
+        q = r['quantiles']
+        assert 0 <= q['p10'] <= q['p50'] <= q['p90']
+
+
+def test_models_without_trees_skip_intervals():
+    predictor = WaitTimePredictor(model_factory=lambda: HistGradientBoostingRegressor(max_iter=20))
+    predictor.train(*_records(200))
+    result = predictor.predict_wait_time(_with_ids(_records(3, seed=7)[0]), quantiles=(0.1, 0.9))
+    assert all('quantiles' not in r for r in result)
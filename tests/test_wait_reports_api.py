@@ -0,0 +1,29 @@
+import pytest
+
+from models.wait_time_predictor import WaitTimePredictor
+
+
+@pytest.mark.parametrize('report', [
+    {'station_id': 's1', 'wait_minutes': 5, 'features': [1, 2]},
+    {'station_id': 's1', 'wait_minutes': 5, 'timestamp': '2026-13-01'},
+    {'wait_minutes': 5},
+    'not an object',
+])
+def test_invalid_wait_reports_are_rejected(client, report):
+    response = client.post('/api/wait-reports', json=[report])
+    assert response.status_code == 400
+    assert response.get_json()['errors'][0]['index'] == 0
+
+
+def test_valid_reports_are_accepted_alongside_invalid_ones(client, app_module, monkeypatch):
+    predictor = WaitTimePredictor()
+    monkeypatch.setattr(predictor, 'start_online_learning', lambda **kwargs: None)
+    monkeypatch.setattr(app_module, 'wait_time_predictor', predictor)
+    response = client.post('/api/wait-reports', json=[
+        {'station_id': 's1', 'wait_minutes': 5, 'timestamp': '2026-10-19T08:00:00+05:30'},
+        {'station_id': 's1', 'wait_minutes': 'soon'},
+    ])
+    body = response.get_json()
+    assert response.status_code == 202
+    assert body['accepted'] == 1 and [e['index'] for e in body['errors']] == [1]
+    assert len(predictor.observations) == 1
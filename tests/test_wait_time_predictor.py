@@ -0,0 +1,47 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from models.wait_time_predictor import WaitTimePredictor
+
+
+@pytest.fixture
+def predictor():
+    return WaitTimePredictor(observation_buffer_size=100)
+
+
+def test_aware_timestamps_are_stored_as_naive_local_time(predictor):
+    aware = datetime(2026, 10, 19, 8, 0, tzinfo=timezone(timedelta(hours=5, minutes=30)))
+    predictor.ingest_observation('s1', aware.isoformat(), 12.0)
+    predictor.ingest_observation('s1', aware, 12.0)
+    predictor.ingest_observation('s1', aware.timestamp(), 12.0)
+    expected = aware.astimezone().replace(tzinfo=None)
+    assert [ts for ts, _, _ in predictor.observations] == [expected] * 3
+
+
+def test_refit_accepts_mixed_naive_and_aware_reports(predictor):
+    now = datetime.now()
+    for i in range(6):
+        ts = now - timedelta(minutes=i)
+        predictor.ingest_observation('s1', ts.astimezone(timezone.utc) if i % 2 else ts, 5.0 + i)
+    assert predictor.refit_from_observations(min_samples=5, now=now)
+    assert predictor.online_stats['last_refit_samples'] == 6
+
+
+@pytest.mark.parametrize('timestamp', ['yesterday', 1e20])
+def test_unusable_timestamps_raise_value_error(predictor, timestamp):
+    with pytest.raises(ValueError):
+        predictor.ingest_observation('s1', timestamp, 5.0)
+    assert not predictor.observations
+
+
+def test_features_come_from_timestamp_and_running_average(predictor):
+    monday_9 = datetime(2026, 10, 19, 9, 30)
+    predictor.ingest_observation('s1', monday_9, 10.0)
+    predictor.ingest_observation('s1', monday_9, 20.0, {'current_queue_length': 3})
+    _, record, wait = predictor.observations[-1]
+    assert (record['hour_of_day'], record['day_of_week'], record['is_weekend']) == (9, 0, 0)
+    assert record['current_queue_length'] == 3.0
+    assert record['historical_avg_wait_time'] == 10.0   # the average before this report
+    assert predictor._station_avg_wait['s1'] == pytest.approx(12.0)
+    assert wait == 20.0
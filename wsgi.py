@@ -0,0 +1,26 @@
+"""Production entry point.
+
+gunicorn (Linux/macOS, preforked workers)::
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+waitress (any platform, single process with a thread pool)::
+
+    python wsgi.py
+"""
+import os
+
+from app import create_app
+
+app = create_app()
+
+
+if __name__ == '__main__':
+    from waitress import serve
+
+    serve(
+        app,
+        host=os.environ.get('QUICKFILL_HOST', '0.0.0.0'),
+        port=int(os.environ.get('QUICKFILL_PORT', 8000)),
+        threads=int(os.environ.get('QUICKFILL_THREADS', 8)),
+    )